@@ -7,7 +7,21 @@ import torch  # Import the torch library
 import re
 import time
 import os
+from contextlib import aclosing
 from .WIDGETS import system, timer, project, camera
+from .tool_fence import ToolFenceParser
+from .conversation_context import ConversationContext, estimate_tokens
+from .prompts import SYSTEM_PROMPT, MODEL, MODEL_PARAMS
+from .startup import warm_start
+from .turns import TurnController
+from .announcer import Announcer
+from .tool_executor import ToolRegistry
+from .intent_router import IntentRouter
+from .response_cache import ResponseCache, RESPONSE_CACHE
+from .audio_cache import AudioCache
+from .audio_output import AudioOutput
+from .text_chunker import TextChunker, chunked
+from .tracing import Tracer
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 VOICE_ID = 'pFZP5JQG7iQjIQuC4Bku'
@@ -19,7 +33,9 @@ RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
 
 class SPARC:
-    def __init__(self):
+    def __init__(self, ollama_host=None, components=None, stt_options=None, response_cache=RESPONSE_CACHE, audio_cache=None):
+        # ollama_host, components (startup step overrides), stt_options (recorder settings) and
+        # audio_cache let test/e2e_latency_benchmark.py run the pipeline against local stand-ins
         print("initializing...")
 
         # Check for CUDA availability
@@ -30,57 +46,58 @@ class SPARC:
             self.device = "cpu"
             print("CUDA is not available. Using CPU.")
 
-        self.model = "gemma3:4b-it-q4_K_M" #This is the smallest version of gemma3 for consistent function calling use gemma3:4b-it-q4_K_M  or higher if your computer is not strong enough use sparc_online
-        self.system_behavior = """
-            Your name is SPARC (Synthetic Personal Assistant and Resource Coordinator) you are a helpful AI assistant.  You are an expert in All STEM Fields providing concise and accurate information. When asked to perform a task, respond with the code to perform that task wrapped in ```tool_code```.  If the task does not require a function call, provide a direct answer without using ```tool_code```.  Always respond in a helpful and informative manner."
+        self.model = MODEL # gemma3:4b-it-q4_K_M by default. This is the smallest version of gemma3 for consistent function calling use gemma3:4b-it-q4_K_M  or higher if your computer is not strong enough use sparc_online
+        # Static system prompt + tool catalogue first, then the history that only grows by appending,
+        # so Ollama can reuse the cached KV prefix instead of re-evaluating the whole prompt each turn
+        self.system_prompt = SYSTEM_PROMPT
+        self.keep_alive = "30m" # keep the model (and its prompt cache) loaded between turns
 
-            You speak with a british accent and address people as Sir.
-        """
+        self.model_params = dict(MODEL_PARAMS)
 
-        self.instruction_prompt_with_function_calling = '''
-            At each turn, if you decide to invoke any of the function(s), it should be wrapped with ```tool_code```. If you decide to call a function the response should only have the function wrapped in tool code nothing more. The python methods described below are imported and available, you can only use defined methods also only call methods when you are sure they need to be called. The generated code should be resparcble and efficient. 
-            
-            The response to a method will be wrapped in ```tool_output``` use the response to give the user an answer based on the information provided that is wrapped in ```tool_ouput```.
+        # One AsyncClient for the whole session so every request (including the
+        # follow-up after a tool result) reuses the same pooled HTTP connection
+        # and streaming never blocks the event loop.
+        self.ollama_host = ollama_host # None = the default local Ollama server
+        self.client = ollama.AsyncClient(host=ollama_host)
 
-            For regular prompts do not call any functions or wrap the response in ```tool_code```.
+        # Last few turns verbatim, older ones folded into a running summary between turns
+        self.context = ConversationContext(self.client, self.model, token_budget=1536, keep_turns=4, keep_alive=self.keep_alive)
 
-            The following Python methods are available:
-
-            ```python
-            def camera.open() -> None:
-                """Open the camera"""
-
-            def system.info() -> None:
-                """ Gathers and prints system information including CPU, RAM, and GPU details. Only call when user ask about computer information. """
-
-            def timer.set(time_str):
-                """
-                Counts down from a specified time in HH:MM:SS format.
-
-                Args:
-                    time_str (str): The time to count down from in HH:MM:SS format.
-                """
-            def project.create_folder(folder_name):
-                """
-                Creates a project folder and a text file to store chat history.
-
-                Args:
-                    folder_name (str): The name of the project folder to create.
-                """
-        ```
-
-        User: {user_message}
-        '''
-
-        self.model_params = {
-            'temperature': 0.1,
-            'top_p': 0.9,
-        }
-        self.conversation_history = []
+        # Opt-in (SPARC_RESPONSE_CACHE=exact or semantic): repeated questions are answered from memory.
+        # Semantic matching needs the embedding model pulled in Ollama.
+        self.embed_model = "nomic-embed-text"
+        self.cache = None
+        if response_cache in ("exact", "semantic"):
+            self.cache = ResponseCache(embed=self.embed if response_cache == "semantic" else None)
 
         self.input_queue = asyncio.Queue()
         self.response_queue = asyncio.Queue()
         self.audio_queue = asyncio.Queue()
+
+        # Model-written tool calls only reach these WIDGETS functions, on a thread pool with timeouts
+        self.tools = ToolRegistry()
+        self.tools.register("camera.open", camera.open, timeout=10.0)
+        self.tools.register("camera.close", camera.close, timeout=5.0)
+        self.tools.register("camera.snapshot", camera.snapshot, timeout=5.0)
+        self.tools.register("system.info", system.info, timeout=2.0)
+        self.tools.register("timer.set", timer.set, timeout=1.0)
+        self.tools.register("timer.cancel", timer.cancel, timeout=1.0)
+        self.tools.register("timer.remaining", timer.remaining, timeout=1.0)
+        self.tools.register("timer.list", timer.list, timeout=1.0)
+        self.tools.register("project.create_folder", project.create_folder, timeout=5.0)
+        # Timers, camera, system info, project folders, time and date run straight away, without Ollama
+        self.router = IntentRouter(self.tools)
+
+        # Barge-in: every queued chunk carries the generation of the turn that produced it
+        self.turns = TurnController()
+        self.generation_task = None
+        self.loop = None
+        # Timer alerts wait for the current answer to finish, then play as a turn of their own
+        self.announcer = Announcer(self.turns, self.response_queue, self.idle)
+        timer.service.on_expire = lambda name: self.announce(f"Sir, your {name} is up.")
+        self.tracer = Tracer(backend="local") # per-turn latency spans, one JSON line per turn
+        self.recording = None # (generation, text, chunks) while a phrase for the audio cache is being synthesized
+
         self.recorder_config = {
             'model': 'large-v3',
             'spinner': False,
@@ -90,31 +107,58 @@ class SPARC:
             'post_speech_silence_duration': 0.1,
             'min_length_of_recording': 0.2,
             'min_gap_between_recordings': 0,
+            'on_recording_start': self.on_recording_start, # barge-in as soon as the user starts talking
+            'on_recording_stop': self.on_recording_stop,
 
             #'realtime_model_type': 'tiny.en',
             #'enable_realtime_transcription': True,
             #'on_realtime_transcription_update': self.clear_queues,
         }
-
-        try:
-            self.recorder = AudioToTextRecorder(**self.recorder_config)
-        except Exception as e:
-            print(f"Error initializing AudioToTextRecorder: {e}")
-            self.recorder = None  # Or handle this appropriately
-
-        try:
-            self.pya = pyaudio.PyAudio()
-        except Exception as e:
-            print(f"Error initializing PyAudio: {e}")
-            self.pya = None
-        
-        self.response_start_time = None
-        self.audio_start_time = None
-        #self.engine = CoquiEngine()
-        self.engine = SystemEngine()
-        self.stream = TextToAudioStream(self.engine)
-        self.first_audio_byte_time = None
-        self.speech_to_text_time = None
+        self.recorder_config.update(stt_options or {})
+
+        # Load STT, audio, TTS and the LLM side by side instead of one after another,
+        # warming each one up so the first real turn runs at steady-state latency
+        steps = {
+            "stt": lambda: AudioToTextRecorder(**self.recorder_config),
+            "pyaudio": pyaudio.PyAudio,
+            "tts": self.load_tts,
+            "llm": self.warm_up_llm,
+            "telemetry": system.sampler.start, # so system.info has history to report
+        }
+        steps.update(components or {})
+        components = warm_start(steps)
+        self.recorder = components["stt"]
+        self.pya = components["pyaudio"]
+        self.engine, self.stream = components["tts"] or (None, None)
+        self.chunker = TextChunker() # regroups tokens into words, clauses and sentences for the TTS
+
+        # Short recurring phrases ("Camera is open", timer announcements) are synthesized once and then
+        # played from disk through our own output stream. The engine and its output format are the key;
+        # add the voice here if you pass one to the engine.
+        self.audio_cache = audio_cache or AudioCache()
+        self.tts_voice = None
+        self.output = None
+        if self.engine is not None and self.pya is not None:
+            audio_format, channels, rate = self.engine.get_stream_info()
+            self.tts_voice = {"engine": type(self.engine).__name__, "stream": [audio_format, channels, rate]}
+            self.output = AudioOutput(self.pya, rate=rate, channels=channels, format=audio_format)
+
+    def load_tts(self):
+        """Creates the TTS engine and stream and synthesizes a muted phrase so the voice is loaded."""
+        #engine = CoquiEngine()
+        engine = SystemEngine()
+        stream = TextToAudioStream(engine, on_audio_stream_start=self.on_audio_stream_start, on_audio_stream_stop=self.on_audio_stream_stop)
+        stream.feed("Hello sir.").play(muted=True)
+        return engine, stream
+
+    def warm_up_llm(self):
+        """Loads the model into Ollama and evaluates the static system prompt so its KV prefix is cached."""
+        ollama.Client(host=self.ollama_host).chat(
+            model=self.model,
+            messages=[{"role": "system", "content": self.system_prompt}, {"role": "user", "content": "Hello"}],
+            options={**self.model_params, 'num_predict': 1},
+            keep_alive=self.keep_alive,
+        )
 
     async def clear_queues(self, text=""):
         """Clears all data from the input, response, and audio queues."""
@@ -133,109 +177,267 @@ class SPARC:
                 if prompt.lower() == "exit":
                     await self.input_queue.put(None)  # Signal to exit
                     break
-                await self.clear_queues()
-                self.prompt_start_time = time.time()
+                await self.interrupt()
+                self.tracer.mark_next("typed")
                 await self.input_queue.put(prompt)
             except Exception as e:
                 print(f"Error in input_message: {e}")
                 continue  # Continue the loop even if there's an error
 
     async def send_prompt(self):
+        self.loop = asyncio.get_running_loop()
+        self.announcer.start()
         while True:
             try:
                 prompt = await self.input_queue.get()
                 if prompt is None:
                     break  # Exit loop if None is received
-                
-                self.response_start_time = time.time() #start timer when prompt is sent
-                
-                messages = [{"role": "system", "content": self.system_behavior}] + self.conversation_history + [{"role": "user", "content": self.instruction_prompt_with_function_calling.format(user_message=prompt)}]
-                try:
-                    response = ollama.chat(model=self.model, messages=messages, stream=True)
-                    full_response = ""
-                    in_function_call = False
-                    function_call = ""
-
-                    for chunk in response:
-                        chunk_content = chunk['message']['content']
-                        if chunk_content == "```":
-                            if in_function_call == True:
-                                in_function_call = False
-                                function_call += "```"
-                                tool_output = self.extract_tool_call(function_call)
-
-                                messages = [{"role": "system", "content": self.system_behavior}] + self.conversation_history + [{"role": "user", "content": self.instruction_prompt_with_function_calling.format(user_message=tool_output)}]
-                                
-                                response = ollama.chat(model=self.model, messages=messages, stream=True)
-                                for chunk in response:
-                                    chunk_content = chunk['message']['content']
-                                    print(chunk_content, end="", flush=True)
-                                    await self.response_queue.put(chunk_content)
-                                print()
-                                continue
-                            else:
-                               in_function_call = True
-
-                        if in_function_call == False:
-                            await self.response_queue.put(chunk_content)
-                            await asyncio.sleep(0)
-                        else:
-                            function_call += chunk_content                        
-                        if chunk_content:
-                            print(chunk_content, end="", flush=True) #print chunks on same line
-                            full_response += chunk_content
-                    print() # new line
-                    self.conversation_history.append({"role": "user", "content": prompt})
-                    self.conversation_history.append({"role": "assistant", "content": full_response})
-
-                except Exception as e:
-                    print(f"An error occurred in send_prompt: {e}")
+
+                # Run each answer as its own task so a barge-in can cancel the Ollama stream mid-reply
+                route = self.router.route(prompt)
+                generation = self.turns.new_turn()
+                self.tracer.begin(generation, intent=route["intent"] if route else None)
+                if route is not None:
+                    self.generation_task = asyncio.create_task(self.answer_locally(route, prompt, generation))
+                else:
+                    self.generation_task = asyncio.create_task(self.respond(prompt, generation))
+                await asyncio.wait({self.generation_task})
             except asyncio.CancelledError:
+                if self.generation_task:
+                    self.generation_task.cancel()
                 break
             except Exception as e:
                 print(f"Unexpected error in send_prompt: {e}")
-
-            finally:  # Ensure the sentinel value is added even if an error occurs
-                await self.response_queue.put(None)
+        await self.announcer.close()
+        self.tracer.close()
+        print(f"Intent router: {self.router.stats()}")
+        print(f"Announcer: {self.announcer.stats()}")
+        if self.cache is not None:
+            print(f"Response cache: {self.cache.stats()}")
+        self.tools.shutdown()
+
+    async def answer_locally(self, route, prompt, generation):
+        """Speaks the result of a command the intent router recognised, without a round trip to Ollama."""
+        start = time.perf_counter()
+        try:
+            reply, result = await self.router.answer(route)
+            if result is not None:
+                self.tracer.span(f"tool {result['tool']}", start, time.perf_counter(), generation, ok=result["ok"])
+            self.tracer.mark("first_token", generation)
+            print(reply)
+            await self.response_queue.put((generation, reply))
+            # Keep the exchange in the history so follow-ups ("cancel that timer") make sense to the model
+            self.context.add_turn({"role": "user", "content": prompt}, {"role": "assistant", "content": reply})
+            self.router.handled(time.perf_counter() - start)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"An error occurred answering {route['intent']}: {e}")
+        finally:
+            self.response_queue.put_nowait((generation, None))
+
+    async def respond(self, prompt, generation):
+        """Streams one answer onto the response queue, tagging every chunk with its generation."""
+        user_message = {"role": "user", "content": prompt}
+        messages = self.context.messages(self.system_prompt, user_message)
+        start = time.perf_counter()
+        try:
+            cached = await self.cache.get(prompt) if self.cache is not None else None
+            if cached is not None:
+                # Same question as before: the stored answer goes straight to the TTS
+                self.tracer.mark("first_token", generation)
+                print(f"[cached] {cached}")
+                await self.response_queue.put((generation, cached))
+                self.context.add_turn(user_message, {"role": "assistant", "content": cached})
+                return
+
+            full_response = ""
+            spoken = [] # the text sent to the TTS, without any fenced block: what the cache replays
+            tool_call = None
+            parser = ToolFenceParser()
+
+            async with aclosing(self.stream_chat(messages, generation)) as stream:
+                async for chunk_content in stream:
+                    if chunk_content:
+                        print(chunk_content, end="", flush=True) #print chunks on same line
+                        full_response += chunk_content
+                    for kind, text in parser.feed(chunk_content):
+                        if kind == "text":
+                            spoken.append(text)
+                            await self.response_queue.put((generation, text))
+                        else:
+                            tool_call = self.extract_tool_call(text)
+                            if tool_call is not None:
+                                break # any other fenced block (```python) is skipped, the text after it still comes
+                    if tool_call is not None:
+                        break # the tool call is the whole answer, release the connection for the follow-up
+            print() # new line
+            if tool_call is None:
+                for kind, text in parser.flush():
+                    spoken.append(text)
+                    await self.response_queue.put((generation, text))
+                self.context.add_turn(user_message, {"role": "assistant", "content": full_response})
+                if self.cache is not None:
+                    self.cache.put(prompt, "".join(spoken)) # answers that needed a tool are never cached
+            else:
+                tool_output = await self.run_tool_call(tool_call, generation)
+                # Append the call and its result so the follow-up shares the whole prefix just evaluated
+                turn = [user_message, {"role": "assistant", "content": full_response}, {"role": "user", "content": tool_output}]
+                messages = messages[:-1] + turn
+                follow_up = ""
+                async for chunk_content in self.stream_chat(messages, generation):
+                    print(chunk_content, end="", flush=True)
+                    follow_up += chunk_content
+                    await self.response_queue.put((generation, chunk_content))
+                print()
+                self.context.add_turn(*turn, {"role": "assistant", "content": follow_up})
+            self.router.observe_llm(time.perf_counter() - start)
+
+        except asyncio.CancelledError:
+            print("\n[reply interrupted]")
+            raise
+        except Exception as e:
+            print(f"An error occurred in send_prompt: {e}")
+        finally:  # Ensure the sentinel value is added even if an error occurs
+            self.response_queue.put_nowait((generation, None))
+
+    async def interrupt(self, speech_start=None):
+        """Barge-in: drops everything from the current turn, cancels the Ollama stream and stops playback."""
+        self.turns.interrupt(speech_start)
+        if self.generation_task and not self.generation_task.done():
+            self.generation_task.cancel()
+        await self.clear_queues()
+        was_playing = self.stream is not None and self.stream.is_playing()
+        if was_playing:
+            await asyncio.to_thread(self.stream.stop)
+        if self.output is not None and self.output.flush():
+            was_playing = True
+        self.turns.silenced(was_playing)
+
+    def announce(self, text):
+        """Speaks text outside of a model reply, once the current answer has finished. Safe to call from any thread."""
+        self.announcer.say(text)
+
+    def idle(self):
+        """Nothing is waiting to be answered, being answered, queued for the TTS or playing."""
+        return (self.input_queue.empty() and (self.generation_task is None or self.generation_task.done())
+                and self.response_queue.empty() and not (self.stream is not None and self.stream.is_playing())
+                and not (self.output is not None and self.output.buffered))
+
+    def on_recording_start(self):
+        """RealtimeSTT callback (recorder thread): the user started speaking."""
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.interrupt(time.perf_counter()), self.loop)
+
+    def on_recording_stop(self):
+        """RealtimeSTT callback (recorder thread): the user stopped speaking, the next turn's clock starts."""
+        self.tracer.mark_next("end_of_speech")
+
+    def on_audio_stream_start(self):
+        """RealtimeTTS callback: the first synthesized audio of an answer reached the speaker."""
+        self.tracer.mark("first_sample_played", self.turns.generation)
+
+    def on_audio_chunk(self, chunk):
+        """RealtimeTTS callback for every synthesized audio chunk."""
+        self.tracer.mark("first_tts_byte", self.turns.generation)
+        recording = self.recording
+        if recording is not None:
+            recording[2].append(chunk)
+
+    def on_audio_stream_stop(self):
+        """RealtimeTTS callback: playback finished. Stores the phrase that was being recorded, unless it was cut off."""
+        recording, self.recording = self.recording, None
+        if recording is not None and recording[2] and self.turns.is_current(recording[0]):
+            self.audio_cache.put(recording[1], self.tts_voice, b"".join(recording[2]))
+
+    async def stream_chat(self, messages, generation=None):
+        """Streams the content of each chunk from Ollama, yielding to the event loop between chunks."""
+        self.tracer.mark("request_sent", generation)
+        response = await self.client.chat(model=self.model, messages=messages, stream=True, options=self.model_params, keep_alive=self.keep_alive)
+        try:
+            async for chunk in response:
+                if chunk['message']['content']:
+                    self.tracer.mark("first_token", generation)
+                if chunk.get('done'):
+                    estimate = sum(estimate_tokens(m["content"]) for m in messages)
+                    eval_ms = (chunk.get('prompt_eval_duration') or 0) / 1e6
+                    print(f"\n[prompt tokens: {chunk.get('prompt_eval_count')} evaluated in {eval_ms:.0f} ms, ~{estimate} sent]")
+                    self.tracer.llm(
+                        generation,
+                        prompt_eval_count=chunk.get('prompt_eval_count'),
+                        prompt_eval_duration=chunk.get('prompt_eval_duration'),
+                        eval_count=chunk.get('eval_count'),
+                        eval_duration=chunk.get('eval_duration'),
+                        load_duration=chunk.get('load_duration'),
+                        total_duration=chunk.get('total_duration'),
+                    )
+                yield chunk['message']['content']
+        finally:
+            await response.aclose() # hand the connection back to the pool even when the caller stops early
+
+    async def embed(self, text):
+        """Embedding of text for the response cache."""
+        response = await self.client.embed(model=self.embed_model, input=text, keep_alive=self.keep_alive)
+        return response["embeddings"][0]
 
     def extract_tool_call(self, text):
-        import io
-        from contextlib import redirect_stdout
-
+        """Returns the code inside a ```tool_code``` block, or None for any other fenced block."""
         pattern = r"```tool_code\s*(.*?)\s*```"
         match = re.search(pattern, text, re.DOTALL)
         if match:
-            code = match.group(1).strip()
-            # Capture stdout in a string buffer
-            f = io.StringIO()
-            with redirect_stdout(f):
-                result = eval(code)
-            output = f.getvalue()
-            r = result if output == '' else output
-            return f'```tool_output\n{str(r).strip()}\n```'''
+            return match.group(1).strip()
         return None
 
+    async def run_tool_call(self, code, generation=None):
+        """Runs a tool call through the registry and formats its result for the model."""
+        start = time.perf_counter()
+        result = await self.tools.call(code)
+        self.tracer.span(f"tool {result['tool']}", start, time.perf_counter(), generation, ok=result["ok"])
+        print(f"[tool {result['tool']}: {'ok' if result['ok'] else 'failed'} in {result['duration']:.2f} s]")
+        output = result["result"] if result["ok"] else f"Error: {result['error']}"
+        return f'```tool_output\n{str(output).strip()}\n```'
+
     async def tts(self):
-        while True:
-            chunk = await self.response_queue.get()
-            if chunk == None:
-                continue
-            if self.first_audio_byte_time is None:
-                self.first_audio_byte_time = time.time()
-                time_to_first_audio = self.first_audio_byte_time - self.prompt_start_time
-                print(f"Time from prompt to first audio byte: {time_to_first_audio:.4f} seconds")
-            self.stream.feed(chunk)
-            self.stream.play_async()
+        try:
+            async for generation, chunk, reason in chunked(self.response_queue, self.chunker):
+                if chunk == None or not self.turns.is_current(generation):
+                    continue # end of turn, or a chunk left over from an interrupted turn
+                self.tracer.mark("tts_request", generation)
+
+                # A whole short utterance said while nothing else is playing may already be on disk
+                self.recording = None
+                if (reason == "end" and self.output is not None and not self.stream.is_playing()
+                        and not self.output.is_playing and self.audio_cache.cacheable(chunk)):
+                    clip = self.audio_cache.get(chunk, self.tts_voice)
+                    if clip is not None:
+                        await asyncio.to_thread(self.output.start)
+                        self.tracer.mark("first_tts_byte", generation)
+                        await self.output.play(clip, on_played=lambda t, g=generation: self.tracer.mark("first_sample_played", g, t))
+                        self.output.end()
+                        continue
+                    self.recording = (generation, chunk, []) # synthesize it this once and keep the audio
+
+                # Whole clauses and sentences instead of single tokens; playback starts once per answer
+                self.stream.feed(chunk + " ")
+                if not self.stream.is_playing():
+                    self.stream.play_async(on_audio_chunk=self.on_audio_chunk)
+        finally:
+            if self.output is not None:
+                self.output.close()
+            print(f"TTS chunks: {self.chunker.stats()}")
+            print(f"Audio cache: {self.audio_cache.stats()}")
 
     async def stt(self):
         if self.recorder is None:
             print("Audio recorder is not initialized.")
             return
 
+        self.loop = asyncio.get_running_loop()
         while True:
             try:
                 text = await asyncio.to_thread(self.recorder.text)
-                await self.clear_queues()
+                self.tracer.mark_next("transcribed")
+                await self.interrupt()
                 await self.input_queue.put(text)
                 print(text)
             except Exception as e:
@@ -6,15 +6,27 @@ import pyaudio
 from RealtimeSTT import AudioToTextRecorder
 import torch  # Import the torch library
 import re
+import time
 from google.genai import types
 import asyncio
 from google import genai
 import os
 from google.genai.types import Tool, GoogleSearch, Part, Blob, Content
-import python_weather
 import googlemaps # Added for travel duration
-from datetime import datetime # Added for travel duration
 from dotenv import load_dotenv # Added for API key loading
+from .startup import warm_start
+from .turns import TurnController
+from .announcer import Announcer
+from .audio_output import AudioOutput
+from .elevenlabs_ws import ElevenLabsStreams
+from .text_chunker import TextChunker, chunked
+from .tracing import Tracer
+from .tool_executor import ToolRegistry
+from .intent_router import IntentRouter
+from .response_cache import ResponseCache, RESPONSE_CACHE
+from .audio_cache import AudioCache
+from . import weather, maps
+from .WIDGETS import system, timer, project, camera
 
 # --- Load Environment Variables ---
 load_dotenv()
@@ -29,6 +41,8 @@ if not MAPS_API_KEY: print("Error: MAPS_API_KEY not found in environment variabl
 # --- End API Key Validation ---
 
 VOICE_ID = 'pFZP5JQG7iQjIQuC4Bku'
+# inactivity_timeout=180 lets a pre-opened spare wait for the next turn (the default is 20 s)
+ELEVENLABS_URI = f"wss://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}/stream-input?model_id=eleven_flash_v2_5&output_format=pcm_24000&inactivity_timeout=180"
 
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
@@ -37,7 +51,10 @@ RECEIVE_SAMPLE_RATE = 24000 # For ElevenLabs output
 CHUNK_SIZE = 1024
 
 class SPARC:
-    def __init__(self):
+    def __init__(self, elevenlabs_uri=ELEVENLABS_URI, client=None, components=None, stt_options=None, response_cache=RESPONSE_CACHE,
+                 audio_cache=None):
+        # elevenlabs_uri, client (a genai.Client stand-in), components (startup step overrides), stt_options
+        # (recorder settings) and audio_cache let test/e2e_latency_benchmark.py run against local stand-ins
         print("initializing...")
 
         # Check for CUDA availability
@@ -49,7 +66,7 @@ class SPARC:
             print("CUDA is not available. Using CPU.")
 
         # --- Initialize Google GenAI Client ---
-        self.client = genai.Client(api_key=GOOGLE_API_KEY, http_options={'api_version': 'v1beta'})
+        self.client = client or genai.Client(api_key=GOOGLE_API_KEY, http_options={'api_version': 'v1beta'})
         self.model = "gemini-2.0-flash-live-001"
 
         # --- System Behavior Prompt (Updated from reference) ---
@@ -71,13 +88,13 @@ class SPARC:
         )
         self.get_travel_duration_func = types.FunctionDeclaration(
             name="get_travel_duration",
-            description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode.",
+            description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode. For a follow-up about the same trip with another mode (e.g. 'and by walking?'), pass only the mode.",
             parameters=types.Schema(
                 type=types.Type.OBJECT, properties={
-                    "origin": types.Schema(type=types.Type.STRING, description="The starting address or place name."),
-                    "destination": types.Schema(type=types.Type.STRING, description="The destination address or place name."),
-                    "mode": types.Schema(type=types.Type.STRING, description="Optional: Mode of transport ('driving', 'walking', etc.). Defaults to 'driving'.")
-                }, required=["origin", "destination"]
+                    "origin": types.Schema(type=types.Type.STRING, description="The starting address or place name. Optional for a follow-up: defaults to the previous trip's origin."),
+                    "destination": types.Schema(type=types.Type.STRING, description="The destination address or place name. Optional for a follow-up: defaults to the previous trip's destination."),
+                    "mode": types.Schema(type=types.Type.STRING, description="Optional: Mode of transport ('driving', 'walking', 'bicycling' or 'transit'). Defaults to 'driving'.")
+                }
             )
         )
         # --- End Function Declarations ---
@@ -112,6 +129,46 @@ class SPARC:
         self.response_queue = asyncio.Queue()
         self.audio_queue = asyncio.Queue() # Renamed from audio_output_queue for consistency
 
+        # --- Barge-in: every queued chunk carries the generation of the turn that produced it ---
+        self.turns = TurnController()
+        self.tts_websocket = None
+        self.tts_generation = None # generation the open ElevenLabs stream is speaking
+        self.tracer = Tracer(backend="online") # per-turn latency spans, one JSON line per turn
+        # Gemini fragments are regrouped into whole words, clauses and sentences before TTS.
+        # ElevenLabs' own buffer follows the same length schedule (it accepts 50-500 characters).
+        self.chunker = TextChunker(schedule=(50, 80, 160, 250))
+        # Pre-opened ElevenLabs streams, so a turn never waits for the TLS and WebSocket handshake
+        self.tts_streams = ElevenLabsStreams(
+            elevenlabs_uri, ELEVENLABS_API_KEY,
+            voice_settings={"stability": 0.4, "similarity_boost": 0.8, "speed": 1.1},
+            generation_config={"chunk_length_schedule": list(self.chunker.schedule)},
+        )
+        # Short recurring phrases are synthesized once and then played from disk. The URI (voice, model,
+        # output format) and the voice settings are part of the key, so changing either misses.
+        self.audio_cache = audio_cache or AudioCache()
+        self.tts_voice = {"uri": elevenlabs_uri, "voice_settings": self.tts_streams.voice_settings}
+        self.loop = None
+        self.responding = False # send_prompt has taken a message and not yet queued the end of its answer
+        # Timer alerts wait for the current answer to finish, then play as a turn of their own
+        self.announcer = Announcer(self.turns, self.response_queue, self.idle)
+
+        # --- Intent router: timers, camera, system info, project folders, time and date skip Gemini ---
+        self.tools = ToolRegistry()
+        self.tools.register("camera.open", camera.open, timeout=10.0)
+        self.tools.register("camera.close", camera.close, timeout=5.0)
+        self.tools.register("system.info", system.info, timeout=2.0)
+        self.tools.register("timer.set", timer.set, timeout=1.0)
+        self.tools.register("timer.list", timer.list, timeout=1.0)
+        self.tools.register("project.create_folder", project.create_folder, timeout=5.0)
+        timer.service.on_expire = lambda name: self.announce(f"Sir, your {name} is up.")
+        self.router = IntentRouter(self.tools)
+
+        # --- Opt-in answer cache (SPARC_RESPONSE_CACHE=exact or semantic) for repeated questions ---
+        self.embed_model = "text-embedding-004"
+        self.cache = None
+        if response_cache in ("exact", "semantic"):
+            self.cache = ResponseCache(embed=self.embed if response_cache == "semantic" else None)
+
         # --- Recorder Config (Kept original) ---
         self.recorder_config = {
             'model': 'large-v3',
@@ -122,92 +179,65 @@ class SPARC:
             'post_speech_silence_duration': 0.1,
             'min_length_of_recording': 0.2,
             'min_gap_between_recordings': 0,
+            'on_recording_start': self.on_recording_start, # barge-in as soon as the user starts talking
+            'on_recording_stop': self.on_recording_stop,
         }
-
-        # --- Initialize Recorder and PyAudio (Kept original) ---
-        try:
-            self.recorder = AudioToTextRecorder(**self.recorder_config)
-        except Exception as e:
-            print(f"Error initializing AudioToTextRecorder: {e}")
-            self.recorder = None
-
-        try:
-            self.pya = pyaudio.PyAudio()
-        except Exception as e:
-            print(f"Error initializing PyAudio: {e}")
-            self.pya = None
+        self.recorder_config.update(stt_options or {})
+
+        # --- Initialize Recorder and PyAudio in parallel ---
+        # The Whisper model load dominates startup, so PyAudio no longer waits behind it.
+        # Gemini needs no warm-up here: send_prompt opens the live session before the first turn.
+        steps = {
+            "stt": lambda: AudioToTextRecorder(**self.recorder_config),
+            "pyaudio": pyaudio.PyAudio,
+        }
+        steps.update(components or {})
+        components = warm_start(steps)
+        self.recorder = components["stt"]
+        self.pya = components["pyaudio"]
+        # Speaker engine: PortAudio pulls from a ring buffer, 60 ms prebuffer against network jitter
+        self.output = AudioOutput(self.pya, rate=RECEIVE_SAMPLE_RATE, channels=CHANNELS) if self.pya else None
         # --- End Initialization ---
 
     # --- Function Implementations ---
 
     async def get_weather(self, location: str) -> dict | None:
-        """ Fetches current weather. (Removed SocketIO emit) """
-        async with python_weather.Client(unit=python_weather.IMPERIAL) as client:
-            try:
-                weather = await client.get(location)
-                weather_data = {
-                    'location': location,
-                    'current_temp_f': weather.temperature,
-                    'precipitation': weather.precipitation,
-                    'description': weather.description,
-                }
-                print(f"Weather data fetched: {weather_data}")
-                # --- SocketIO Emit Removed ---
-                return weather_data # Return data for Gemini
-
-            except Exception as e:
-                print(f"Error fetching weather for {location}: {e}")
-                return {"error": f"Could not fetch weather for {location}."} # Return error info
-
-    # --- Added Travel Duration Functions (from reference, removed SocketIO emit) ---
-    def _sync_get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> str:
-        """ Synchronous helper for Google Maps API call """
-        if not MAPS_API_KEY or MAPS_API_KEY == "YOUR_PROVIDED_KEY": # Check the actual key
-            print("Error: Google Maps API Key is missing or invalid.")
-            return "Error: Missing or invalid Google Maps API Key configuration."
+        """ Fetches current weather through the shared weather service (pooled session, 60 s cache). """
         try:
-            gmaps = googlemaps.Client(key=MAPS_API_KEY) # Use the loaded key
-            now = datetime.now()
-            print(f"Requesting directions: From='{origin}', To='{destination}', Mode='{mode}'")
-            directions_result = gmaps.directions(origin, destination, mode=mode, departure_time=now)
-            if directions_result:
-                leg = directions_result[0]['legs'][0]
-                duration_text = "Not available"
-                result = f"Duration information not found in response for {mode}." # Default result
-                if mode == "driving" and 'duration_in_traffic' in leg:
-                    duration_text = leg['duration_in_traffic']['text']
-                    result = f"Estimated travel duration ({mode}, with current traffic): {duration_text}"
-                elif 'duration' in leg:
-                    duration_text = leg['duration']['text']
-                    result = f"Estimated travel duration ({mode}): {duration_text}"
-
-                print(f"Directions Result: {result}")
-                return result
-            else:
-                print(f"No route found from {origin} to {destination} via {mode}.")
-                return f"Could not find a route from {origin} to {destination} via {mode}."
-        except googlemaps.exceptions.ApiError as api_err:
-             print(f"Google Maps API Error: {api_err}")
-             return f"Error contacting Google Maps: {api_err}"
+            weather_data = await weather.service.get(location)
+            print(f"Weather data fetched: {weather_data}")
+            return weather_data # Return data for Gemini
+
         except Exception as e:
-            print(f"An unexpected error occurred during travel duration lookup: {e}")
-            return f"An unexpected error occurred: {e}"
+            print(f"Error fetching weather for {location}: {e}")
+            return {"error": f"Could not fetch weather for {location}."} # Return error info
 
-    async def get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> dict:
-        """ Async wrapper to get travel duration. (Removed SocketIO emit) """
-        print(f"Received request for travel duration from: {origin} to: {destination}, Mode: {mode}")
-        if not mode:
-            mode = "driving"
+    async def embed(self, text):
+        """ Embedding of text for the response cache. """
+        result = await self.client.aio.models.embed_content(model=self.embed_model, contents=text)
+        return result.embeddings[0].values
 
+    # --- Travel Duration (shared route service: persistent Maps client, cached routes) ---
+    async def get_travel_duration(self, origin: str = None, destination: str = None, mode: str = "driving") -> dict:
+        """ Travel duration through maps.service. Origin and destination default to the previous trip's. """
+        print(f"Received request for travel duration from: {origin} to: {destination}, Mode: {mode}")
         try:
-            result_string = await asyncio.to_thread(
-                self._sync_get_travel_duration, origin, destination, mode
-            )
-            # --- SocketIO Emit Removed ---
+            route, origin, destination, mode = await maps.service.get(origin, destination, mode)
+            result_string = maps.describe(route, origin, destination, mode)
+            print(f"Directions Result: {result_string}")
             return {"duration_result": result_string} # Return result for Gemini
 
+        except ValueError as e: # Missing key, unknown mode, or a follow-up without a previous trip
+            print(f"Travel duration request not sent: {e}")
+            return {"duration_result": f"Error: {e}"}
+        except asyncio.TimeoutError:
+            print(f"Google Maps did not answer within {maps.service.timeout:.0f} s")
+            return {"duration_result": "Google Maps took too long to answer. Please try again."}
+        except googlemaps.exceptions.ApiError as api_err:
+            print(f"Google Maps API Error: {api_err}")
+            return {"duration_result": f"Error contacting Google Maps: {api_err}"}
         except Exception as e:
-            print(f"Error calling _sync_get_travel_duration via to_thread: {e}")
+            print(f"An unexpected error occurred during travel duration lookup: {e}")
             return {"duration_result": f"Failed to execute travel duration request: {e}"}
     # --- End Travel Duration Functions ---
 
@@ -223,6 +253,59 @@ class SPARC:
                 except asyncio.QueueEmpty:
                     break  # Queue is empty
 
+    async def interrupt(self, speech_start=None):
+        """ Barge-in: drops the current turn's text and audio, stops ElevenLabs and flushes the speaker. """
+        self.turns.interrupt(speech_start)
+        await self.clear_queues()
+        # Stop ElevenLabs synthesizing the old answer; tts() opens a fresh stream for the next turn
+        if self.tts_websocket is not None and self.tts_generation is not None:
+            asyncio.create_task(self.tts_websocket.close())
+        # Drop whatever is still queued for the speaker; the next device period is already silence
+        if self.output is not None:
+            self.turns.silenced(self.output.flush())
+
+    def announce(self, text):
+        """ Speaks text outside of a Gemini reply, once the current answer has finished. Safe to call from any thread. """
+        self.announcer.say(text)
+
+    def idle(self):
+        """ Nothing is waiting to be answered, being answered, synthesized or playing. """
+        return (not self.responding and self.input_queue.empty() and self.response_queue.empty()
+                and self.tts_generation is None and self.audio_queue.empty()
+                and not (self.output is not None and self.output.buffered))
+
+    async def answer_locally(self, route, message, generation, session):
+        """ Speaks the result of a command the intent router recognised, without a round trip to Gemini. """
+        start = time.perf_counter()
+        try:
+            reply, result = await self.router.answer(route)
+            if result is not None:
+                self.tracer.span(f"tool {result['tool']}", start, time.perf_counter(), generation, ok=result["ok"])
+            self.tracer.mark("first_token", generation)
+            print(reply)
+            await self.response_queue.put((generation, reply))
+            self.router.handled(time.perf_counter() - start)
+            # Keep the exchange in the session so follow-ups ("cancel that timer") make sense to Gemini
+            await self.add_context(session, message, reply)
+        except Exception as e:
+            print(f"Error answering {route['intent']}: {e}")
+        finally:
+            await self.response_queue.put((generation, None))
+
+    async def add_context(self, session, message, reply):
+        """ Adds an exchange Gemini didn't answer itself to the session. end_of_turn=False: context only, no reply. """
+        await session.send(input=[Content(role="user", parts=[Part(text=message)]),
+                                  Content(role="model", parts=[Part(text=reply)])], end_of_turn=False)
+
+    def on_recording_start(self):
+        """ RealtimeSTT callback (recorder thread): the user started speaking. """
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.interrupt(time.perf_counter()), self.loop)
+
+    def on_recording_stop(self):
+        """ RealtimeSTT callback (recorder thread): the user stopped speaking, the next turn's clock starts. """
+        self.tracer.mark_next("end_of_speech")
+
     async def input_message(self):
         """ Handles user text input (Kept original) """
         while True:
@@ -232,7 +315,8 @@ class SPARC:
                     await self.input_queue.put("exit")  # Signal to exit
                     print("exit input")
                     break
-                await self.clear_queues()
+                await self.interrupt()
+                self.tracer.mark_next("typed")
                 await self.input_queue.put(prompt)
             except Exception as e:
                 print(f"Error in input_message: {e}")
@@ -242,13 +326,17 @@ class SPARC:
     async def send_prompt(self):
         """Manages the Gemini conversation session, handling text and tool calls."""
         print("Starting Gemini session manager...")
+        self.loop = asyncio.get_running_loop()
+        self.announcer.start()
         try:
             # Establish connection (same as original)
             async with self.client.aio.live.connect(model=self.model, config=self.config) as session:
                 print("Gemini session connected.")
 
                 while True: # Loop to process text inputs
+                    self.responding = False
                     message = await self.input_queue.get()
+                    self.responding = True
 
                     if message.lower() == "exit":
                         print("Exit signal received in send_prompt.")
@@ -258,8 +346,32 @@ class SPARC:
                         print("Gemini session is not active.")
                         self.input_queue.task_done(); continue # Should not happen here
 
+                    route = self.router.route(message)
+                    generation = self.turns.new_turn()
+                    self.tracer.begin(generation, intent=route["intent"] if route else None)
+                    if route is not None:
+                        await self.answer_locally(route, message, generation, session)
+                        self.input_queue.task_done()
+                        continue
+
+                    cached = await self.cache.get(message) if self.cache is not None else None
+                    if cached is not None:
+                        # Same question as before: the stored answer goes straight to the TTS
+                        self.tracer.mark("first_token", generation)
+                        print(f"[cached] {cached}")
+                        await self.response_queue.put((generation, cached))
+                        await self.response_queue.put((generation, None))
+                        # The model never saw this exchange; a follow-up ("and why is that?") refers to it
+                        await self.add_context(session, message, cached)
+                        self.input_queue.task_done()
+                        continue
+
                     # Send the final text input for the turn (same as original)
+                    turn_start = time.perf_counter()
+                    answer = [] # text of this turn, for the response cache
+                    grounded = False # a function call, search grounding or code execution makes the answer uncacheable
                     print(f"Sending FINAL text input to Gemini: {message}")
+                    self.tracer.mark("request_sent", generation)
                     await session.send(input=message, end_of_turn=True)
                     print("Final text message sent to Gemini, waiting for response...")
 
@@ -268,6 +380,7 @@ class SPARC:
                         try:
                             # --- Handle Tool Calls (Function Calling) ---
                             if response.tool_call:
+                                grounded = True
                                 function_call_details = response.tool_call.function_calls[0]
                                 tool_call_id = function_call_details.id
                                 tool_call_name = function_call_details.name
@@ -275,11 +388,18 @@ class SPARC:
 
                                 print(f"--- Received Tool Call: {tool_call_name} with args: {tool_call_args} (ID: {tool_call_id}) ---")
 
-                                if tool_call_name in self.available_functions:
+                                if not self.turns.is_current(generation):
+                                    # Interrupted: answer the call without running it so the stale turn can finish quickly
+                                    await session.send(input=types.FunctionResponse(
+                                        id=tool_call_id, name=tool_call_name, response={"content": "Cancelled, the user interrupted."}
+                                    ), end_of_turn=False)
+                                elif tool_call_name in self.available_functions:
                                     function_to_call = self.available_functions[tool_call_name]
                                     try:
                                         # Execute the corresponding async function
+                                        tool_start = time.perf_counter()
                                         function_result = await function_to_call(**tool_call_args)
+                                        self.tracer.span(f"tool {tool_call_name}", tool_start, time.perf_counter(), generation)
 
                                         # Construct the response to send back to Gemini
                                         func_resp = types.FunctionResponse(
@@ -302,15 +422,22 @@ class SPARC:
 
                             # --- Handle Text Responses ---
                             elif response.text:
+                                # The live session has no per-turn cancel for text, so an interrupted turn is
+                                # drained here and its chunks dropped before they reach TTS
+                                if not self.turns.is_current(generation):
+                                    continue
                                 text_chunk = response.text
+                                answer.append(text_chunk)
+                                self.tracer.mark("first_token", generation)
                                 print(text_chunk, end="", flush=True) # Print chunk immediately (like original)
-                                await self.response_queue.put(text_chunk) # Put chunk onto queue for TTS
+                                await self.response_queue.put((generation, text_chunk)) # Put chunk onto queue for TTS
 
                             # --- (Optional) Handle Executable Code Tool (like reference, no SocketIO) ---
                             elif (response.server_content and
                                   response.server_content.model_turn and
                                   response.server_content.model_turn.parts and
                                   response.server_content.model_turn.parts[0].executable_code):
+                                grounded = True
                                 try:
                                     executable_code = response.server_content.model_turn.parts[0].executable_code
                                     code_string = executable_code.code
@@ -322,13 +449,28 @@ class SPARC:
                                 except (AttributeError, IndexError, TypeError) as e:
                                     pass # Ignore errors if structure isn't as expected
 
+                            if response.server_content and getattr(response.server_content, "grounding_metadata", None):
+                                grounded = True # answered from Google Search
+
+                            if response.usage_metadata:
+                                usage = response.usage_metadata
+                                self.tracer.llm(
+                                    generation,
+                                    prompt_token_count=usage.prompt_token_count,
+                                    response_token_count=usage.response_token_count,
+                                    total_token_count=usage.total_token_count,
+                                )
+
                         except Exception as e:
                              print(f"\nError processing Gemini response chunk: {e}")
                              # Potentially break or continue depending on severity
                     # --- End Processing Responses ---
 
                     print("\nEnd of Gemini response stream for this turn.")
-                    await self.response_queue.put(None) # Signal end of response for TTS
+                    self.router.observe_llm(time.perf_counter() - turn_start)
+                    if self.cache is not None and not grounded and self.turns.is_current(generation):
+                        self.cache.put(message, "".join(answer))
+                    await self.response_queue.put((generation, None)) # Signal end of response for TTS
                     self.input_queue.task_done() # Mark input processed
 
         except asyncio.CancelledError:
@@ -336,140 +478,170 @@ class SPARC:
         except Exception as e:
             print(f"Error in Gemini session manager: {e}")
         finally:
+            await self.announcer.close()
+            self.tracer.close()
+            print(f"Intent router: {self.router.stats()}")
+            print(f"Announcer: {self.announcer.stats()}")
+            if self.cache is not None:
+                print(f"Response cache: {self.cache.stats()}")
+            print(f"Weather: {weather.service.stats()}")
+            print(f"Routes: {maps.service.stats()}")
+            await weather.service.close()
+            self.tools.shutdown()
             print("Gemini session manager finished.")
             # No specific cleanup needed here unless tasks were managed differently
 
     async def tts(self):
-        """ Send text to ElevenLabs API and stream the returned audio. (Kept Original Logic)"""
-        uri = f"wss://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}/stream-input?model_id=eleven_flash_v2_5&output_format=pcm_24000"
-        while True: # Outer loop to handle reconnections
-            print("Attempting to connect to ElevenLabs WebSocket...")
-            try:
-                async with websockets.connect(uri) as websocket:
-                    print("ElevenLabs WebSocket Connected.")
-                    try:
-                        # Send initial configuration
-                        await websocket.send(json.dumps({
-                            "text": " ",
-                            "voice_settings": {"stability": 0.4, "similarity_boost": 0.8, "speed": 1.1},
-                            "xi_api_key": ELEVENLABS_API_KEY,
-                        }))
-
-                        async def listen():
-                            """Listen to the websocket for audio data and queue it."""
-                            while True:
-                                try:
-                                    message = await websocket.recv()
-                                    data = json.loads(message)
-                                    if data.get("audio"):
-                                        # Put raw audio bytes onto the queue
-                                        await self.audio_queue.put(base64.b64decode(data["audio"]))
-                                    elif data.get("isFinal"):
-                                        # Optional: Handle end-of-stream signal from ElevenLabs if needed
-                                        pass
-                                    # Removed `elif text is None:` check as it was incorrect scope
-                                except websockets.exceptions.ConnectionClosedOK:
-                                    print("ElevenLabs connection closed normally by server.")
-                                    break # Exit listener loop
-                                except websockets.exceptions.ConnectionClosedError as e:
-                                     print(f"ElevenLabs connection closed with error: {e}")
-                                     break # Exit listener loop
-                                except json.JSONDecodeError as e:
-                                    print(f"JSON Decode Error in ElevenLabs listener: {e}")
-                                    # Decide whether to break or continue
-                                except asyncio.CancelledError:
-                                     print("ElevenLabs listener task cancelled.")
-                                     raise # Re-raise cancellation
-                                except Exception as e:
-                                    print(f"Error in ElevenLabs listener: {e}")
-                                    break # Exit listener loop on other errors
-
-                        listen_task = asyncio.create_task(listen())
-
+        """ Send text to ElevenLabs API and stream the returned audio. One stream per turn, dropped on barge-in. """
+        self.tts_streams.start() # start warming the first stream while the user is still talking
+        chunks = chunked(self.response_queue, self.chunker) # (generation, text, reason), text None ends a turn
+        pending = None # chunk already taken off the queue that belongs to the next stream
+        try:
+            while True:
+                if pending is None:
+                    pending = await anext(chunks)
+                generation, text, reason = pending
+                if not self.turns.is_current(generation) or text is None:
+                    pending = None
+                    continue # left over from an interrupted turn, or a turn without text
+
+                # A whole short utterance (greeting, announcement, command result) may already be on disk
+                record = None
+                if reason == "end" and self.audio_cache.cacheable(text):
+                    clip = self.audio_cache.get(text, self.tts_voice)
+                    if clip is not None:
+                        self.tracer.mark("tts_request", generation)
+                        self.tracer.mark("first_tts_byte", generation)
+                        await self.audio_queue.put((generation, clip))
+                        await self.audio_queue.put((generation, None))
+                        pending = None
+                        continue
+                    record = text # synthesize it this once and keep the audio
+
+                # First chunk of a turn: take a hot stream (its replacement starts connecting now)
+                self.tts_generation = generation # busy from here, idle() must not see a gap while connecting
+                websocket = await self.tts_streams.acquire()
+                self.tts_websocket = websocket
+                listen_task = asyncio.create_task(self.tts_listen(websocket, generation, record))
+                try:
+                    # Send text chunks from response queue
+                    while True:
+                        if pending is not None:
+                            generation, text, reason = pending
+                            pending = None
+                            first = True
+                        else:
+                            generation, text, reason = await anext(chunks)
+                            first = False
+
+                        if not self.turns.is_current(generation):
+                            continue # left over from an interrupted turn
+
+                        if generation != self.tts_generation:
+                            # The turn this stream was speaking got interrupted, start over on a fresh one
+                            pending = (generation, text, reason)
+                            break
+
+                        if text is None: # Signal to end the TTS stream for this turn
+                            print("End of text stream signal received for TTS.")
+                            await websocket.send(json.dumps({"text": ""})) # Send EOS signal
+                            break # the server closes the stream after EOS
+
+                        self.tracer.mark("tts_request", generation)
+                        message = {"text": text + " "} # chunks end on a word boundary, ElevenLabs wants the trailing space
+                        if first or reason == "timeout":
+                            message["flush"] = True # voice the opening clause (or stalled text) right away
+                        await websocket.send(json.dumps(message))
+
+                    # Wait for the listener to receive the remaining audio after EOS
+                    if not listen_task.done() and pending is None:
                         try:
-                            # Send text chunks from response queue
-                            while True:
-                                text = await self.response_queue.get()
-                                if text is None: # Signal to end the TTS stream for this turn
-                                    print("End of text stream signal received for TTS.")
-                                    await websocket.send(json.dumps({"text": ""})) # Send EOS signal
-                                    break # Exit inner loop (sending text)
-
-                                if text: # Ensure text is not empty
-                                    # Added space for potential word breaks
-                                    await websocket.send(json.dumps({"text": text + " "}))
-
-                                self.response_queue.task_done() # Mark item as processed
-
-                        except asyncio.CancelledError:
-                            print("TTS text sender cancelled.")
-                            listen_task.cancel() # Cancel listener if sender is cancelled
-                            raise # Re-raise cancellation
-                        except Exception as e:
-                            print(f"Error processing text for TTS: {e}")
-                            listen_task.cancel() # Cancel listener on error
-                        finally:
-                            # Wait for the listener task to finish after text sending stops or errors
-                            if not listen_task.done():
-                                print("Waiting for TTS listener task to complete...")
-                                try:
-                                    await asyncio.wait_for(listen_task, timeout=5.0)
-                                except asyncio.TimeoutError:
-                                    print("Timeout waiting for TTS listener task.")
-                                    listen_task.cancel()
-                                except asyncio.CancelledError:
-                                     print("TTS Listener was already cancelled.") # Expected if sender was cancelled
-                                except Exception as e:
-                                     print(f"Error awaiting listener task: {e}")
-
-
-                    except websockets.exceptions.ConnectionClosed as e:
-                         print(f"ElevenLabs WebSocket connection closed during operation: {e}")
-                         # Outer loop will handle reconnection attempt
-                    except Exception as e:
-                        print(f"Error during ElevenLabs websocket communication: {e}")
-                        # Outer loop will handle reconnection attempt
-
-            except websockets.exceptions.WebSocketException as e:
-                print(f"ElevenLabs WebSocket connection failed: {e}")
+                            await asyncio.wait_for(listen_task, timeout=5.0)
+                        except asyncio.TimeoutError:
+                            print("Timeout waiting for TTS listener task.")
+
+                except websockets.exceptions.ConnectionClosed as e:
+                    if self.turns.is_current(self.tts_generation):
+                        print(f"ElevenLabs WebSocket connection closed during operation: {e}")
+                        pending = (generation, text, reason) # speak the rest of the answer on a fresh stream
+                    # otherwise it was closed for barge-in, nothing went wrong
+                except Exception as e:
+                    print(f"Error during ElevenLabs websocket communication: {e}")
+                finally:
+                    if not listen_task.done():
+                        listen_task.cancel()
+                    self.tts_websocket = None
+                    self.tts_generation = None
+                    asyncio.create_task(websocket.close())
+        except asyncio.CancelledError:
+            print("TTS main task cancelled.")
+        finally:
+            await self.tts_streams.close()
+            print(f"ElevenLabs streams: {self.tts_streams.stats()}")
+            print(f"Audio cache: {self.audio_cache.stats()}")
+            print(f"TTS chunks: {self.chunker.stats()}")
+
+    async def tts_listen(self, websocket, generation, record=None):
+        """Listen to the websocket for audio data and queue it, tagged with the turn it belongs to.
+        With `record` (the text being spoken) the complete audio is stored in the audio cache."""
+        recorded = []
+        while True:
+            try:
+                message = await websocket.recv()
+                data = json.loads(message)
+                if not self.turns.is_current(generation):
+                    break # interrupted, don't queue any more of this answer
+                if data.get("audio"):
+                    self.tracer.mark("first_tts_byte", generation)
+                    audio = base64.b64decode(data["audio"])
+                    if record is not None:
+                        recorded.append(audio)
+                    # Put raw audio bytes onto the queue
+                    await self.audio_queue.put((generation, audio))
+                elif data.get("isFinal"):
+                    await self.audio_queue.put((generation, None)) # lets the speaker play out the tail
+                    if record is not None and recorded:
+                        await asyncio.to_thread(self.audio_cache.put, record, self.tts_voice, b"".join(recorded))
+                    break # ElevenLabs has sent all the audio for this turn
+            except websockets.exceptions.ConnectionClosedOK:
+                print("ElevenLabs connection closed normally by server.")
+                break # Exit listener loop
+            except websockets.exceptions.ConnectionClosedError as e:
+                 print(f"ElevenLabs connection closed with error: {e}")
+                 break # Exit listener loop
+            except json.JSONDecodeError as e:
+                print(f"JSON Decode Error in ElevenLabs listener: {e}")
             except asyncio.CancelledError:
-                 print("TTS main task cancelled.")
-                 break # Exit outer loop if cancelled
+                 print("ElevenLabs listener task cancelled.")
+                 raise # Re-raise cancellation
             except Exception as e:
-                print(f"Error connecting to ElevenLabs websocket: {e}")
-
-            print("Waiting 5 seconds before attempting ElevenLabs reconnection...")
-            await asyncio.sleep(5) # Wait before retrying connection
+                print(f"Error in ElevenLabs listener: {e}")
+                break # Exit listener loop
 
     # Removed extract_tool_call method as it's replaced by direct handling in send_prompt
 
     async def play_audio(self):
-        """ Plays audio chunks from the audio_queue. (Kept Original Logic) """
-        if self.pya is None:
+        """ Moves audio chunks from the audio_queue into the callback-driven speaker engine. """
+        if self.output is None:
             print("PyAudio is not initialized. Cannot play audio.")
             return
 
-        stream = None # Initialize stream variable
         try:
             print("Opening PyAudio stream...")
-            stream = await asyncio.to_thread(
-                self.pya.open,
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=RECEIVE_SAMPLE_RATE,
-                output=True,
-            )
+            await asyncio.to_thread(self.output.start)
             print("PyAudio stream opened. Waiting for audio chunks...")
             while True:
                 try:
                     # Wait for audio data from the TTS task
-                    bytestream = await self.audio_queue.get()
-                    if bytestream is None: # Potential signal to stop? (Not currently used)
-                         print("Received None in audio queue, stopping playback loop.")
-                         break
-                    # Write audio data to the stream in a separate thread
-                    await asyncio.to_thread(stream.write, bytestream)
+                    generation, bytestream = await self.audio_queue.get()
                     self.audio_queue.task_done() # Mark item as processed
+                    if not self.turns.is_current(generation):
+                        continue # interrupt() already flushed the speaker, drop the rest of that turn
+                    if bytestream is None:
+                        self.output.end() # end of the turn, play the tail without waiting for the prebuffer
+                        continue
+                    # Copies into the ring and returns at once; only waits if the ring is full
+                    await self.output.play(bytestream, on_played=lambda t, g=generation: self.tracer.mark("first_sample_played", g, t))
                 except asyncio.CancelledError:
                     print("Audio playback task cancelled.")
                     break  # Exit loop if task is cancelled
@@ -483,11 +655,9 @@ class SPARC:
         except Exception as e:
             print(f"Error setting up audio stream: {e}")
         finally:
-            if stream:
-                print("Closing PyAudio stream...")
-                await asyncio.to_thread(stream.stop_stream)
-                await asyncio.to_thread(stream.close)
-                print("PyAudio stream closed.")
+            print("Closing PyAudio stream...")
+            await asyncio.to_thread(self.output.close)
+            print(f"PyAudio stream closed. Audio out: {self.output.stats()}")
             # Don't terminate PyAudio here if other parts might use it
             # await asyncio.to_thread(self.pya.terminate)
 
@@ -498,13 +668,15 @@ class SPARC:
             return
 
         print("Starting Speech-to-Text engine...")
+        self.loop = asyncio.get_running_loop()
         while True:
             try:
                 # Blocking call handled in a thread
                 text = await asyncio.to_thread(self.recorder.text)
                 if text: # Only process if text is not empty
+                    self.tracer.mark_next("transcribed")
                     print(f"STT Detected: {text}")
-                    await self.clear_queues() # Clear queues before adding new input
+                    await self.interrupt() # Drop anything left of the previous answer
                     await self.input_queue.put(text) # Put transcribed text onto the input queue
             except asyncio.CancelledError:
                  print("STT task cancelled.")
@@ -1,24 +1,168 @@
+import os
+import threading
+import time
+
 import cv2
+import numpy as np
 
-def open():
-    """Opens the default camera using OpenCV and displays the video feed. Press 'q' to exit."""
 
-    return "Camera is open"
+class CameraService:
+    """
+    Owns the camera on one capture thread and publishes frames into a preallocated ring buffer.
+
+    Opening the device costs about a second, so it happens once on the capture thread and every
+    consumer (the camera tool, the Live API streamer, snapshots) reads from the ring instead of
+    opening its own VideoCapture. Frames are decoded straight into the ring slots by cap.read(),
+    and read() copies the newest one out exactly once, into a buffer the caller can reuse.
+    """
+
+    def __init__(self, device=0, slots=4):
+        self.device = device
+        self.slots = slots
+        self._ring = None  # slots x H x W x 3, allocated from the first frame
+        self._slot_seq = [0] * slots  # sequence number of the frame held in each slot
+        self._seq = 0  # sequence number of the newest published frame
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._open = False  # frames are flowing; only changed under _cond
+        self.error = None
+
+    def start(self):
+        """Starts the capture thread if needed. Returns the sequence number the new frames will come after."""
+        with self._cond:
+            if self._thread is None:
+                self._running = True
+                self.error = None
+                self._thread = threading.Thread(target=self._run, name="camera", daemon=True)
+                self._thread.start()
+            return self._seq
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._open = False
+            thread, self._thread = self._thread, None
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def open(self, timeout=5.0):
+        """Starts the camera and waits for its first frame. Returns None once it is open, or an error message."""
+        after = self.start()  # frames from an earlier session don't count
+        seq = self.wait_for_frame(after, timeout)
+        with self._cond:
+            if seq is not None and self._running:
+                self._open = True
+                return None
+        self.stop()
+        return self.error or "Camera did not deliver a frame."
+
+    def close(self):
+        self.stop()
+
+    @property
+    def is_open(self):
+        with self._cond:
+            return self._open
 
-    global cap  # Access the global cap variable
-    cap = cv2.VideoCapture(0)
+    def _run(self):
+        cap = cv2.VideoCapture(self.device)
+        try:
+            if not cap.isOpened():
+                self.error = "Could not open camera."
+                return
+            ok, first = cap.read()
+            if not ok:
+                self.error = "Could not read frame."
+                return
+            self._ring = np.empty((self.slots,) + first.shape, dtype=first.dtype)
+            slot = self._seq % self.slots
+            self._ring[slot] = first
+            self._publish(slot)
+            while self._running:
+                slot = self._seq % self.slots
+                self._slot_seq[slot] = 0  # mark the slot as being written so readers retry
+                ok, _ = cap.read(self._ring[slot])  # decode in place, no per-frame allocation
+                if not ok:
+                    self.error = "Could not read frame."
+                    break
+                self._publish(slot)
+        finally:
+            cap.release()
+            with self._cond:
+                self._running = False
+                self._open = False
+                if self._thread is threading.current_thread():
+                    self._thread = None  # let start() reopen the device after a failure
+                self._cond.notify_all()
+
+    def _publish(self, slot):
+        with self._cond:
+            self._slot_seq[slot] = self._seq + 1
+            self._seq += 1
+            self._open = self._running  # also when the feed was started without open() (the Live API streamer)
+            self._cond.notify_all()
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """Blocks until a frame newer than after_seq exists. Returns its sequence number, or None."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._seq <= after_seq:
+                if not self._running:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._seq
+
+    def read(self, out=None):
+        """
+        Copies the newest frame into `out` (allocated if None) and returns (seq, frame),
+        or (0, None) before the first frame. The copy is retried if the capture thread
+        overwrote the slot while it was being read.
+        """
+        while True:
+            seq = self._seq
+            if seq == 0 or self._ring is None:
+                return 0, None
+            slot = (seq - 1) % self.slots
+            if out is None:
+                out = np.empty_like(self._ring[slot])
+            np.copyto(out, self._ring[slot])
+            if self._slot_seq[slot] == seq:
+                return seq, out
+
+    def snapshot(self, path):
+        seq, frame = self.read()
+        if frame is None:
+            return None
+        cv2.imwrite(path, frame)
+        return path
+
+
+service = CameraService()
+
+
+def open():
+    """Opens the default camera and keeps the feed running in the background."""
+    error = service.open(timeout=5.0)
+    if error is not None:
+        return f"Error: {error}"
+    return "Camera is open"
 
-    if not cap.isOpened():
-        print("Error: Could not open camera.")
-        return
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Could not read frame.")
-            break
+def close():
+    """Closes the camera."""
+    service.close()
+    return "Camera is closed"
 
-        cv2.imshow('Camera Feed', frame)
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+def snapshot(folder="snapshots"):
+    """Saves the current camera frame as a JPEG and returns its path."""
+    if not service.is_open:
+        return "Error: the camera is not open."
+    os.makedirs(folder, exist_ok=True)
+    path = service.snapshot(os.path.join(folder, time.strftime("snapshot_%Y%m%d_%H%M%S.jpg")))
+    return f"Snapshot saved to {path}" if path else "Error: no frame available yet."
@@ -1,6 +1,6 @@
 import os
 
-def create_folder(folder_name, chat_history_file):
+def create_folder(folder_name, chat_history_file="chat_history.txt"):
     """
     Creates a project folder and a text file to store chat history.
 
@@ -1,59 +1,150 @@
 import platform
+import threading
+import time
+from collections import deque
+
 import psutil
 import GPUtil
 
-def info():
+
+class TelemetrySampler:
+    """
+    Samples CPU, RAM and GPU usage on a background thread into a fixed-size ring buffer.
+
+    psutil.cpu_percent(interval=None) measures usage since the previous call, so each sample is
+    free instead of blocking for a second. GPUtil shells out to nvidia-smi, so the GPU is only
+    read every `gpu_every` samples and the last reading is reused in between.
+
+    Only the sampler thread measures: cpu_percent's baseline and the GPU reading are its own, and
+    readers (tool calls on other threads) only copy samples out under the lock.
+    """
+
+    def __init__(self, interval=1.0, history_seconds=300, gpu_every=5):
+        self.interval = interval
+        self.gpu_every = gpu_every
+        self.samples = deque(maxlen=int(history_seconds / interval))
+        self._gpus = []
+        self._count = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                psutil.cpu_percent(percpu=True)  # the first call only sets the baseline
+                self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        time.sleep(min(self.interval, 0.1))  # a short first interval, so the first sample is there quickly
+        while True:
+            self._sample()
+            time.sleep(self.interval)
+
+    def _sample(self):
+        per_core = psutil.cpu_percent(percpu=True)
+        memory = psutil.virtual_memory()
+        if self._count % self.gpu_every == 0:
+            try:
+                self._gpus = [(gpu.load * 100, gpu.memoryUsed, gpu.memoryTotal, gpu.temperature) for gpu in GPUtil.getGPUs()]
+            except Exception:
+                self._gpus = []
+        self._count += 1
+        sample = {
+            "time": time.monotonic(),
+            "cpu": sum(per_core) / len(per_core) if per_core else 0.0,
+            "cpu_max_core": max(per_core, default=0.0),
+            "ram": memory.percent,
+            "ram_used_gb": memory.used / (1024.0 ** 3),
+            "gpus": self._gpus,
+        }
+        with self._cond:
+            self.samples.append(sample)
+            self._cond.notify_all()
+
+    def latest(self, timeout=0.0):
+        """The newest sample, waiting up to `timeout` seconds for the first one. None if there is none yet."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.samples, timeout)
+            return self.samples[-1] if self.samples else None
+
+    def window(self, seconds):
+        cutoff = time.monotonic() - seconds
+        with self._cond:
+            return [s for s in self.samples if s["time"] >= cutoff]
+
+
+sampler = TelemetrySampler()
+_static = None
+
+
+def _static_info():
+    """Facts that never change while SPARC runs, gathered once."""
+    global _static
+    if _static is None:
+        uname = platform.uname()
+        try:
+            gpu_names = [gpu.name for gpu in GPUtil.getGPUs()]
+        except Exception:
+            gpu_names = []
+        _static = {
+            "system": f"{uname.system} {uname.release} ({uname.machine})",
+            "cores": psutil.cpu_count(logical=False),
+            "threads": psutil.cpu_count(logical=True),
+            "ram_total_gb": psutil.virtual_memory().total / (1024.0 ** 3),
+            "gpu_names": gpu_names,
+        }
+    return _static
+
+
+def _stats(values):
+    return f"{min(values):.0f}/{sum(values) / len(values):.0f}/{max(values):.0f}"
+
+
+def info(window=None):
     """
-    Gathers and prints system information including CPU, RAM, and GPU details.
+    Returns a compact snapshot of CPU, RAM and GPU usage. Instant: values come from the background sampler.
+
+    Args:
+        window (float): Optional number of seconds of history to summarise as min/avg/max.
     """
-    
-    print("="*40, "System Information", "="*40)
-    uname = platform.uname()
-    print(f"System: {uname.system}")
-    print(f"Node Name: {uname.node}")
-    print(f"Release: {uname.release}")
-    print(f"Version: {uname.version}")
-    print(f"Machine: {uname.machine}")
-    print(f"Processor: {uname.processor}")
-
-    # CPU information
-    print("="*40, "CPU Info", "="*40)
-    print("Physical cores:", psutil.cpu_count(logical=False))
-    print("Total cores:", psutil.cpu_count(logical=True))
+    if window is not None:
+        # Model-written calls may pass the number as a string ("5")
+        try:
+            window = float(window)
+        except (TypeError, ValueError):
+            return f"Invalid window '{window}'. Please give a number of seconds, like 60."
+        if not 0 <= window < float("inf"):
+            return "The window needs to be a positive number of seconds."
+    sampler.start()
+    static = _static_info()
+    current = sampler.latest(timeout=1.0)  # only waits right after start, for the sampler's first reading
+    if current is None:
+        return "System usage isn't available yet, please ask again in a moment."
+
     cpufreq = psutil.cpu_freq()
-    print(f"Max Frequency: {cpufreq.max:.2f}Mhz")
-    print(f"Min Frequency: {cpufreq.min:.2f}Mhz")
-    print(f"Current Frequency: {cpufreq.current:.2f}Mhz")
-    print("CPU Usage Per Core:")
-    for i, percentage in enumerate(psutil.cpu_percent(percpu=True, interval=1)):
-        print(f"Core {i}: {percentage}%")
-    print(f"Total CPU Usage: {psutil.cpu_percent()}%")
-
-    # Memory Information
-    print("="*40, "Memory Information", "="*40)
-    svmem = psutil.virtual_memory()
-    print(f"Total: {svmem.total / (1024.0 ** 3):.2f} GB")
-    print(f"Available: {svmem.available / (1024.0 ** 3):.2f} GB")
-    print(f"Used: {svmem.used / (1024.0 ** 3):.2f} GB")
-    print(f"Percentage: {svmem.percent}%")
-
-    # GPU information
-    print("="*40, "GPU Info", "="*40)
-    try:
-        gpus = GPUtil.getGPUs()
-        for gpu in gpus:
-            print(f"GPU ID: {gpu.id}")
-            print(f"  GPU Name: {gpu.name}")
-            print(f"  GPU Load: {gpu.load*100:.2f}%")
-            print(f"  GPU Memory Total: {gpu.memoryTotal:.2f}MB")
-            print(f"  GPU Memory Used: {gpu.memoryUsed:.2f}MB")
-            print(f"  GPU Memory Free: {gpu.memoryFree:.2f}MB")
-            print(f"  GPU Temperature: {gpu.temperature:.2f} °C")
-    except Exception as e:
-        return(f"Error getting GPU information: {e}")
-    
-    return("system information has been returned")
+    freq = f", {cpufreq.current / 1000:.1f} GHz" if cpufreq else ""
+    lines = [
+        static["system"],
+        f"CPU {current['cpu']:.0f}% (busiest core {current['cpu_max_core']:.0f}%, {static['cores']} cores/{static['threads']} threads{freq})",
+        f"RAM {current['ram_used_gb']:.1f}/{static['ram_total_gb']:.1f} GB ({current['ram']:.0f}%)",
+    ]
+    for i, (load, used, total, temp) in enumerate(current["gpus"]):
+        name = static["gpu_names"][i] if i < len(static["gpu_names"]) else f"GPU {i}"
+        lines.append(f"GPU {i} {name}: {load:.0f}% load, {used / 1024:.1f}/{total / 1024:.1f} GB, {temp:.0f} °C")
+
+    if window:
+        samples = sampler.window(window)
+        if samples:
+            lines.append(f"Last {window:g} s min/avg/max: CPU {_stats([s['cpu'] for s in samples])}%, RAM {_stats([s['ram'] for s in samples])}%")
+            gpu_loads = [s["gpus"][0][0] for s in samples if s["gpus"]]
+            if gpu_loads:
+                lines.append(f"GPU 0 load min/avg/max: {_stats(gpu_loads)}%")
+
+    return "\n".join(lines)
 
 
 if __name__ == "__main__":
-    info()
+    print(info())
+    time.sleep(3)
+    print(info(window=60))
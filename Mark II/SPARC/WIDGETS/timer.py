@@ -1,36 +1,149 @@
+import heapq
+import threading
 import time
-import sys
 
-def set(time_str):
+
+class TimerService:
+    """
+    Runs any number of named countdown timers on one background thread.
+
+    Deadlines live in a single heap and the thread sleeps on a condition until the earliest one,
+    so an idle service uses no CPU. Setting or cancelling a timer wakes the thread to re-check.
+    Cancelled or replaced timers are left in the heap and skipped when they reach the top.
+    """
+
+    def __init__(self, on_expire=None):
+        self.on_expire = on_expire  # called as on_expire(name) from the timer thread
+        self._heap = []  # (deadline, seq, name)
+        self._timers = {}  # name -> (deadline, seq, duration)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="timer-service", daemon=True)
+                self._thread.start()
+
+    def set(self, name, seconds):
+        self.start()
+        with self._cond:
+            self._seq += 1
+            deadline = time.monotonic() + seconds
+            self._timers[name] = (deadline, self._seq, seconds)
+            heapq.heappush(self._heap, (deadline, self._seq, name))
+            self._cond.notify()
+        return deadline
+
+    def cancel(self, name):
+        with self._cond:
+            found = self._timers.pop(name, None) is not None
+            self._cond.notify()
+        return found
+
+    def remaining(self, name):
+        with self._cond:
+            timer = self._timers.get(name)
+        return None if timer is None else max(0.0, timer[0] - time.monotonic())
+
+    def timers(self):
+        """[(name, seconds left)] soonest first."""
+        now = time.monotonic()
+        with self._cond:
+            active = sorted(self._timers.items(), key=lambda item: item[1][0])
+        return [(name, max(0.0, deadline - now)) for name, (deadline, _, _) in active]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Drop heap entries for timers that were cancelled or replaced
+                    while self._heap and self._timers.get(self._heap[0][2], (None, None))[1] != self._heap[0][1]:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                _, _, name = heapq.heappop(self._heap)
+                del self._timers[name]
+            print(f"\rTime's up! ({name})")
+            if self.on_expire:
+                try:
+                    self.on_expire(name)
+                except Exception as e:
+                    print(f"Error announcing timer {name}: {e}")
+
+
+service = TimerService()
+
+
+def _format(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _describe(seconds):
+    parts = []
+    for unit, size in (("hour", 3600), ("minute", 60), ("second", 1)):
+        count, seconds = divmod(seconds, size)
+        if count:
+            parts.append(f"{count} {unit}")
+    return " ".join(parts) + " timer"
+
+
+def set(time_str, name=None):
     """
-    Counts down from a specified time in HH:MM:SS format.
+    Starts a countdown from a specified time in HH:MM:SS format and returns immediately.
 
     Args:
         time_str (str): The time to count down from in HH:MM:SS format.
+        name (str): Optional name for the timer, e.g. "pasta". Setting an existing name restarts it.
     """
-    
     try:
         hours, minutes, seconds = map(int, time_str.split(':'))
-        total_seconds = hours * 3600 + minutes * 60 + seconds
+    except ValueError:
+        return "Invalid time format. Please use HH:MM:SS."
 
-        if not (0 <= hours <= 99 and 0 <= minutes <= 59 and 0 <= seconds <= 59):
-            print("Invalid time format. Hours should be between 00 and 99, minutes and seconds between 00 and 59.")
-            return
+    if not (0 <= hours <= 99 and 0 <= minutes <= 59 and 0 <= seconds <= 59):
+        return "Invalid time format. Hours should be between 00 and 99, minutes and seconds between 00 and 59."
 
-        while total_seconds > 0:
-            timer = divmod(total_seconds, 60)
-            hours = timer[0] // 60
-            minutes = timer[0] % 60
-            seconds = timer[1]
-            sys.stdout.write(f"\r{hours:02d}:{minutes:02d}:{seconds:02d}")
-            sys.stdout.flush()
-            time.sleep(1)
-            total_seconds -= 1
+    total_seconds = hours * 3600 + minutes * 60 + seconds
+    if total_seconds == 0:
+        return "The timer needs to be longer than zero seconds."
+    name = name or _describe(total_seconds)
+    service.set(name, total_seconds)
+    return f"Timer '{name}' set for {_format(total_seconds)}."
 
-        print("\rTime's up!          ")
 
-    except ValueError:
-        print("Invalid time format. Please use HH:MM:SS.")
+def cancel(name):
+    """Cancels the named timer."""
+    if service.cancel(name):
+        return f"Timer '{name}' cancelled."
+    return f"There is no timer called '{name}'."
+
+
+def remaining(name):
+    """Returns the time left on the named timer."""
+    left = service.remaining(name)
+    if left is None:
+        return f"There is no timer called '{name}'."
+    return f"Timer '{name}' has {_format(left)} left."
+
+
+def list():
+    """Lists every running timer with the time left on it."""
+    timers = service.timers()
+    if not timers:
+        return "No timers are running."
+    return "\n".join(f"{name}: {_format(left)} left" for name, left in timers)
+
 
 if __name__ == "__main__":
-    set(time_str="00:10:00")
+    print(set(time_str="00:00:03"))
+    print(set(time_str="00:00:05", name="tea"))
+    print(list())
+    time.sleep(6)
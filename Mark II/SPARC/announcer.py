@@ -0,0 +1,69 @@
+import asyncio
+
+
+class Announcer:
+    """
+    Speaks text that isn't a reply (timer alerts) as a turn of its own, between turns.
+
+    say() can be called from any thread. Announcements wait in their own queue until `idle()`
+    says nothing is being answered, synthesized or played, so they are never spliced into an
+    answer and an answer's end marker can't cut them off. Each one then gets a new generation
+    from `turns` and goes onto `response_queue` followed by its end marker. A barge-in drops it
+    like any other turn.
+    """
+
+    def __init__(self, turns, response_queue, idle, poll=0.05):
+        self.turns = turns
+        self.response_queue = response_queue
+        self.idle = idle  # () -> bool
+        self.poll = poll
+        self.loop = None
+        self._queue = None
+        self._task = None
+
+        self.spoken = 0
+        self.waited = 0.0  # seconds announcements spent waiting for a turn to finish
+
+    def start(self):
+        """Call from the event loop before the first say()."""
+        if self._task is None:
+            self.loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    def say(self, text):
+        """Queues `text`. Safe to call from any thread; ignored until start()."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._queue.put_nowait, text)
+
+    async def _run(self):
+        while True:
+            text = await self._queue.get()
+            start = self.loop.time()
+            # Idle twice in a row, `poll` apart: a stage handing text or audio to the next one is busy
+            # for a moment without anything queued
+            settled = False
+            while True:
+                if self.idle():
+                    if settled:
+                        break
+                    settled = True
+                else:
+                    settled = False
+                await asyncio.sleep(self.poll)
+            self.waited += self.loop.time() - start
+            # No await between the last idle check and the new turn, so no answer can start in between
+            generation = self.turns.new_turn()
+            print(f"[announcement] {text}")
+            self.response_queue.put_nowait((generation, text))
+            self.response_queue.put_nowait((generation, None))
+            self.spoken += 1
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        return f"{self.spoken} announcements, {self.waited:.1f} s waiting for turns to finish"
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+
+AUDIO_CACHE_DIR = os.getenv("SPARC_AUDIO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".sparc", "audio_cache"))
+
+
+def normalize(text):
+    """Case and whitespace don't change the audio; punctuation does, so it is kept."""
+    text = text.replace("’", "'").replace("“", '"').replace("”", '"')
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized PCM for short phrases that come up again and again
+    ("Hello sir.", "Camera is open", "Sir, your 10 second timer is up.").
+
+    A clip is stored as <sha256>.pcm in `folder`, keyed by the voice (engine or voice ID, model,
+    settings, output format) and the normalized text, so changing any of them misses instead of
+    playing the wrong voice. Reads are memory-mapped, so a hit costs no copy until the speaker
+    ring takes the bytes. The folder is capped at `max_bytes`; the least recently played clips go first.
+    Only phrases up to `max_chars` long are cached.
+    """
+
+    def __init__(self, folder=AUDIO_CACHE_DIR, max_bytes=64 * 2 ** 20, max_chars=120):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # key -> size, least recently used first
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+        os.makedirs(folder, exist_ok=True)
+        clips = []
+        for name in os.listdir(folder):
+            if name.endswith(".pcm"):
+                stat = os.stat(os.path.join(folder, name))
+                clips.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(clips):  # oldest first, a hit refreshes the mtime
+            self._files[key] = size
+            self.size += size
+
+    def cacheable(self, text):
+        return 0 < len(normalize(text)) <= self.max_chars
+
+    def key(self, text, voice):
+        """sha256 of the voice description (any JSON-serialisable dict) and the normalized text."""
+        identity = json.dumps({"voice": voice, "text": normalize(text)}, sort_keys=True, default=str)
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + ".pcm")
+
+    def get(self, text, voice):
+        """Returns the clip as a read-only memory map (bytes-like), or None."""
+        if not self.cacheable(text):
+            return None
+        key = self.key(text, voice)
+        with self._lock:
+            if key not in self._files:
+                self.misses += 1
+                return None
+            self._files.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                clip = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(self._path(key))
+        except (OSError, ValueError) as e:  # deleted behind our back, or empty
+            print(f"Audio cache: dropping unreadable clip {key[:12]}: {e}")
+            with self._lock:
+                self.size -= self._files.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += len(clip)
+        return clip
+
+    def put(self, text, voice, pcm):
+        """Stores a clip and evicts the least recently used ones beyond max_bytes."""
+        if not pcm or not self.cacheable(text) or len(pcm) > self.max_bytes:
+            return
+        key = self.key(text, voice)
+        path = self._path(key)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(pcm)
+            os.replace(temp, path)  # readers never see a half-written clip
+        except OSError as e:
+            print(f"Audio cache: could not store clip: {e}")
+            return
+        with self._lock:
+            self.size += len(pcm) - self._files.pop(key, 0)
+            self._files[key] = len(pcm)
+            self.stores += 1
+            evict = []
+            while self.size > self.max_bytes and len(self._files) > 1:
+                old, size = self._files.popitem(last=False)
+                self.size -= size
+                self.evictions += 1
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass  # still mapped by a clip that is playing (Windows); picked up again on the next start
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        rate = f" ({self.hits / lookups * 100:.0f}%)" if lookups else ""
+        return (f"{self.hits}/{lookups} hits{rate}, {self.bytes_served / 2 ** 20:.1f} MB served, "
+                f"{len(self._files)} clips ({self.size / 2 ** 20:.1f} MB), {self.stores} stored, {self.evictions} evicted")
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from collections import deque
+
+import numpy as np
+import pyaudio
+
+
+class AudioInput:
+    """
+    Microphone capture driven by PyAudio's callback thread, with an energy-based voice gate.
+
+    The callback copies each chunk into a preallocated ring of slots and wakes the event loop;
+    read() hands chunks out in order without a thread hop per chunk. If the consumer falls more
+    than `slots` chunks behind, the oldest chunks are overwritten and counted as overflows.
+
+    gate() decides what is worth streaming: a chunk opens the gate when its RMS clears both
+    `threshold` and `floor_ratio` times the tracked noise floor. The last `preroll_ms` before
+    the onset is sent along so the first syllable is not clipped, and the gate stays open for
+    `hangover_ms` after the voice stops so the server's own VAD still hears the end of speech.
+    """
+
+    def __init__(self, pya, rate=16000, channels=1, chunk=1024, slots=64,
+                 threshold=300.0, floor_ratio=3.0, preroll_ms=300, hangover_ms=1000):
+        self.pya = pya
+        self.rate = rate
+        self.channels = channels
+        self.chunk = chunk
+        self.chunk_bytes = chunk * channels * 2  # 16-bit PCM
+        self.slots = slots
+        self._ring = bytearray(self.chunk_bytes * slots)
+        self._written = 0  # chunks written by the callback
+        self._read = 0  # chunks handed out by read()
+        self._lock = threading.Lock()
+        self._ready = None
+        self._loop = None
+        self._stream = None
+
+        chunk_ms = 1000 * chunk / rate
+        self.threshold = threshold
+        self.floor_ratio = floor_ratio
+        self.noise_floor = threshold / floor_ratio
+        self._preroll = deque(maxlen=max(1, int(preroll_ms / chunk_ms)))
+        self._hangover_chunks = max(1, int(hangover_ms / chunk_ms))
+        self._hangover = 0
+
+        self.captured = 0
+        self.overflows = 0
+        self.sent = 0
+        self.gated = 0
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        mic_info = await asyncio.to_thread(self.pya.get_default_input_device_info)
+        self._stream = await asyncio.to_thread(
+            self.pya.open,
+            format=pyaudio.paInt16,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            input_device_index=mic_info["index"],
+            frames_per_buffer=self.chunk,
+            stream_callback=self._callback,
+        )
+        self._stream.start_stream()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        with self._lock:
+            slot = self._written % self.slots
+            offset = slot * self.chunk_bytes
+            self._ring[offset:offset + len(in_data)] = in_data
+            self._written += 1
+            self.captured += 1
+            if self._written - self._read > self.slots:
+                self.overflows += self._written - self._read - self.slots
+                self._read = self._written - self.slots
+        self._loop.call_soon_threadsafe(self._ready.set)
+        return None, pyaudio.paContinue
+
+    async def read(self):
+        """Returns the next captured chunk as bytes, waiting for the callback if none is queued."""
+        while True:
+            with self._lock:
+                if self._read < self._written:
+                    offset = (self._read % self.slots) * self.chunk_bytes
+                    self._read += 1
+                    return bytes(self._ring[offset:offset + self.chunk_bytes])
+                self._ready.clear()
+            await self._ready.wait()
+
+    def gate(self, data):
+        """Returns the chunks to stream for this captured chunk: none while quiet, pre-roll + chunk at onset."""
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+        voiced = rms >= max(self.threshold, self.noise_floor * self.floor_ratio)
+        if not voiced:
+            # Follow the noise floor down quickly and up slowly, so speech never drags it up
+            rate = 0.3 if rms < self.noise_floor else 0.02
+            self.noise_floor += rate * (rms - self.noise_floor)
+
+        if voiced:
+            out = list(self._preroll) if self._hangover == 0 else []
+            self._preroll.clear()
+            out.append(data)
+            self._hangover = self._hangover_chunks
+        elif self._hangover > 0:
+            out = [data]
+            self._hangover -= 1
+        else:
+            if len(self._preroll) == self._preroll.maxlen:
+                self.gated += 1  # the oldest pre-roll chunk will never be sent
+            self._preroll.append(data)
+            return []
+        self.sent += len(out)
+        return out
+
+    def stats(self):
+        return (f"{self.captured} chunks captured, {self.sent} sent, {self.gated} gated as silence, "
+                f"{self.overflows} overflows")
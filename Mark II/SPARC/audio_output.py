@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import pyaudio
+
+
+class AudioOutput:
+    """
+    Speaker output driven by PyAudio's callback thread, fed from a preallocated ring buffer.
+
+    Producers copy PCM into the ring with write()/play() and return immediately; PortAudio pulls
+    exactly one device period at a time from its own thread, so there is no thread-pool hop per
+    chunk. Playback starts once `prebuffer_ms` of audio is queued (or end() says no more is coming),
+    which absorbs network jitter. flush() empties the ring for barge-in: the next period is silence.
+
+    Counters: underruns (the ring ran dry mid-utterance) and the latency from write() until the
+    sample reaches the DAC.
+    """
+
+    def __init__(self, pya, rate=24000, channels=1, period_ms=20, prebuffer_ms=60, capacity_seconds=60, format=pyaudio.paInt16):
+        self.pya = pya
+        self.rate = rate
+        self.channels = channels
+        self.format = format  # 16-bit PCM unless an engine delivers e.g. paFloat32
+        self.frame_bytes = channels * pyaudio.get_sample_size(format)
+        self.bytes_per_second = rate * self.frame_bytes
+        self.frames_per_buffer = rate * period_ms // 1000
+        self.prebuffer = self.bytes_per_second * prebuffer_ms // 1000
+        self.capacity = self.bytes_per_second * capacity_seconds
+        self._ring = bytearray(self.capacity)
+        self._read = 0  # absolute byte positions, the ring index is position % capacity
+        self._write = 0
+        self._marks = deque()  # (position, perf_counter at write, on_played) for the latency counter
+        self._priming = True  # waiting for the prebuffer to fill
+        self._ending = False  # producer said the utterance is complete
+        self._epoch = 0  # bumped by flush() so an in-flight play() stops writing
+        self._lock = threading.Lock()
+        self._stream = None
+
+        self.underruns = 0
+        self.flushes = 0
+        self.bytes_played = 0
+        self.latencies = deque(maxlen=500)
+
+    def start(self):
+        if self._stream is None:
+            self._stream = self.pya.open(
+                format=self.format,
+                channels=self.channels,
+                rate=self.rate,
+                output=True,
+                frames_per_buffer=self.frames_per_buffer,
+                stream_callback=self._callback,
+            )
+            self._stream.start_stream()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    @property
+    def buffered(self):
+        return self._write - self._read
+
+    @property
+    def space(self):
+        return self.capacity - (self._write - self._read)
+
+    @property
+    def is_playing(self):
+        return self.buffered > 0 and not self._priming
+
+    def write(self, data, on_played=None):
+        """
+        Copies as much of `data` as fits into the ring. Returns the number of bytes accepted.
+        on_played(t) is called from the audio thread with the perf_counter() time the first byte reaches the DAC.
+        """
+        with self._lock:
+            n = min(len(data), self.capacity - (self._write - self._read))
+            n -= n % self.frame_bytes  # keep whole samples
+            if n <= 0:
+                return 0
+            start = self._write % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start:start + first] = data[:first]
+            if first < n:
+                self._ring[:n - first] = data[first:n]
+            self._marks.append((self._write, time.perf_counter(), on_played))
+            self._write += n
+            self._ending = False
+            return n
+
+    async def play(self, data, on_played=None):
+        """Writes all of `data`, waiting for room if the ring is full. Gives up if flush() runs meanwhile."""
+        epoch = self._epoch
+        view = memoryview(data)
+        while view:
+            if self._epoch != epoch:
+                return False
+            n = self.write(view, on_played)
+            on_played = None
+            view = view[n:]
+            if view:
+                await asyncio.sleep(0.02)
+        return True
+
+    def end(self):
+        """No more audio for this utterance: play out the tail even if it is shorter than the prebuffer."""
+        with self._lock:
+            self._ending = True
+
+    def flush(self):
+        """Drops everything still queued. Returns True if audio was audible when it was dropped."""
+        with self._lock:
+            was_playing = self._write > self._read and not self._priming
+            self._read = self._write
+            self._marks.clear()
+            self._priming = True
+            self._ending = False
+            self._epoch += 1
+            self.flushes += 1
+            return was_playing
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        wanted = frame_count * self.frame_bytes
+        out = bytearray(wanted)  # silence unless there is audio to play
+        played = []
+        with self._lock:
+            available = self._write - self._read
+            if self._priming and (available >= self.prebuffer or (self._ending and available > 0)):
+                self._priming = False
+            if not self._priming:
+                n = min(wanted, available)
+                start = self._read % self.capacity
+                first = min(n, self.capacity - start)
+                out[:first] = self._ring[start:start + first]
+                if first < n:
+                    out[first:n] = self._ring[:n - first]
+                self._read += n
+                self.bytes_played += n
+
+                # Every write whose first sample just went out yields one latency measurement
+                dac_delay = max(0.0, time_info.get("output_buffer_dac_time", 0.0) - time_info.get("current_time", 0.0))
+                now = time.perf_counter()
+                while self._marks and self._marks[0][0] < self._read:
+                    _, written, on_played = self._marks.popleft()
+                    self.latencies.append(now - written + dac_delay)
+                    if on_played is not None:
+                        played.append(on_played)
+
+                if n < wanted or self._read == self._write:
+                    if not self._ending and n < wanted:
+                        self.underruns += 1  # ran dry while more audio was still expected
+                    self._priming = True
+        for on_played in played:
+            on_played(now + dac_delay)
+        return bytes(out), pyaudio.paContinue
+
+    def stats(self):
+        latency = ""
+        if self.latencies:
+            values = sorted(self.latencies)
+            latency = f", enqueue->play p50 {values[len(values) // 2] * 1000:.0f} ms p95 {values[int(len(values) * 0.95) - 1] * 1000:.0f} ms"
+        return (f"{self.bytes_played / self.bytes_per_second:.1f} s played, {self.underruns} underruns, "
+                f"{self.flushes} flushes{latency}")
@@ -0,0 +1,113 @@
+import asyncio
+
+SUMMARY_PROMPT = """
+    Update the running summary of a conversation between a user and SPARC, their assistant.
+    Keep names, numbers, decisions, open tasks and anything the user asked SPARC to remember.
+    Drop greetings and small talk. Reply with the updated summary only, in at most {max_words} words.
+
+    Current summary:
+    {summary}
+
+    New conversation to fold in:
+    {transcript}
+"""
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+class ConversationContext:
+    """
+    Token-budgeted conversation history for the local model.
+
+    Nothing is summarized while the history fits in `token_budget`. Once it doesn't, the oldest
+    turns are folded into a running summary in one batch, down to `low_water` tokens (half the
+    budget by default), by a background request to the model that runs between turns. The last
+    `keep_turns` turns stay verbatim unless they alone are over the budget.
+
+    Every fold rewrites the summary right after the system prompt, which invalidates the cached
+    prompt prefix from there on; folding in batches keeps that to one turn in many. Between folds
+    the history only grows by appending, so the prefix stays cacheable.
+    """
+
+    def __init__(self, client, model, token_budget=1536, keep_turns=4, summary_words=120, keep_alive=None, low_water=None):
+        self.client = client
+        self.model = model
+        self.token_budget = token_budget
+        self.low_water = token_budget // 2 if low_water is None else low_water
+        self.keep_turns = keep_turns
+        self.summary_words = summary_words
+        self.keep_alive = keep_alive
+
+        self.summary = ""
+        self.turns = []  # each turn is the list of messages it added to the history
+        self.summary_task = None
+        self.folds = 0  # summaries written, each one a rewrite of the prompt right after the system prompt
+
+    def history(self):
+        """The messages to send between the system prompt and the new user message."""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+        for turn in self.turns:
+            messages.extend(turn)
+        return messages
+
+    def messages(self, system_prompt, user_message):
+        """The whole request: the fixed system prompt, the history, then the new user message."""
+        return [{"role": "system", "content": system_prompt}] + self.history() + [user_message]
+
+    def history_tokens(self):
+        return sum(estimate_tokens(m["content"]) for m in self.history())
+
+    def add_turn(self, *messages):
+        """Records a finished turn and starts folding old turns if the history is over budget."""
+        self.turns.append(list(messages))
+        self.maybe_summarize()
+
+    def clear(self):
+        if self.summary_task and not self.summary_task.done():
+            self.summary_task.cancel()
+        self.summary = ""
+        self.turns = []
+
+    def maybe_summarize(self):
+        if self.summary_task and not self.summary_task.done():
+            return  # one fold at a time, the next turn will pick up anything left over
+        if self._tokens(self.turns) <= self.token_budget:
+            return
+        fold_count = 0
+        while fold_count < len(self.turns) - self.keep_turns and self._tokens(self.turns[fold_count:]) > self.low_water:
+            fold_count += 1
+        while fold_count < len(self.turns) - 1 and self._tokens(self.turns[fold_count:]) > self.token_budget:
+            fold_count += 1
+        if fold_count == 0:
+            return
+        self.summary_task = asyncio.create_task(self._summarize(self.turns[:fold_count]))
+
+    async def _summarize(self, folded):
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for turn in folded for m in turn)
+        prompt = SUMMARY_PROMPT.format(max_words=self.summary_words, summary=self.summary or "(empty)", transcript=transcript)
+        try:
+            response = await self.client.chat(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                options={'temperature': 0.0},
+                keep_alive=self.keep_alive,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error summarizing conversation history: {e}")
+            return
+        # Only drop the turns once the summary that replaces them exists
+        self.summary = response['message']['content'].strip()
+        self.turns = self.turns[len(folded):]
+        self.folds += 1
+        print(f"Folded {len(folded)} turn(s) into the conversation summary ({self.history_tokens()} history tokens).")
+
+    @staticmethod
+    def _tokens(turns):
+        return sum(estimate_tokens(m["content"]) for turn in turns for m in turn)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+
+def is_open(websocket):
+    # Both the legacy and the new websockets connection classes expose a State enum
+    state = getattr(websocket, "state", None)
+    return state is not None and state.name == "OPEN"
+
+
+class ElevenLabsStreams:
+    """
+    Keeps hot, already-initialised ElevenLabs stream-input connections ready for the next turn.
+
+    ElevenLabs closes a stream after its EOS, so every answer needs a fresh connection. Instead
+    of paying DNS, TLS and the WebSocket handshake after the first text arrives, a background task
+    keeps `spares` connections open with the voice settings already sent. acquire() hands one out
+    and the replacement starts connecting immediately, while the current turn is still speaking.
+    Spares older than `max_idle` are replaced before the server's inactivity timeout can close them.
+
+    Failed connects back off exponentially with full jitter (`backoff_base` doubling up to
+    `backoff_max`) instead of sleeping a flat 5 s. `uri` can point at a local stand-in server.
+    """
+
+    def __init__(self, uri, api_key, voice_settings=None, generation_config=None, spares=1, max_idle=150.0,
+                 backoff_base=0.25, backoff_max=10.0, open_timeout=10.0):
+        self.uri = uri
+        self.api_key = api_key
+        self.voice_settings = voice_settings or {}
+        self.generation_config = generation_config
+        self.spares = spares
+        self.max_idle = max_idle
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.open_timeout = open_timeout
+
+        self._ready = None  # asyncio.Queue of (opened_at, websocket)
+        self._wanted = None  # set whenever the pool drops below `spares`
+        self._task = None
+        self._failures = 0
+
+        self.connects = 0
+        self.connect_failures = 0
+        self.hits = 0  # acquire() served from a hot spare
+        self.misses = 0  # acquire() had to wait for a connection
+        self.connect_time = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._ready = asyncio.Queue()
+            self._wanted = asyncio.Event()
+            self._wanted.set()
+            self._task = asyncio.create_task(self._keep_warm())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._ready is not None and not self._ready.empty():
+            _, websocket = self._ready.get_nowait()
+            await websocket.close()
+
+    async def open(self):
+        """Connects and sends the initial message (voice settings and API key), ready for text."""
+        start = time.perf_counter()
+        websocket = await asyncio.wait_for(websockets.connect(self.uri), timeout=self.open_timeout)
+        message = {"text": " ", "voice_settings": self.voice_settings, "xi_api_key": self.api_key}
+        if self.generation_config:
+            message["generation_config"] = self.generation_config
+        try:
+            await websocket.send(json.dumps(message))
+        except Exception:
+            await websocket.close()
+            raise
+        self.connects += 1
+        self.connect_time += time.perf_counter() - start
+        return websocket
+
+    def backoff(self):
+        """Delay before the next connect attempt: full jitter over base * 2^failures, capped."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** self._failures))
+
+    async def _open_with_backoff(self):
+        while True:
+            try:
+                websocket = await self.open()
+                self._failures = 0
+                return websocket
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connect_failures += 1
+                delay = self.backoff()
+                self._failures += 1
+                print(f"ElevenLabs WebSocket connection failed ({e}), retrying in {delay:.2f} s")
+                await asyncio.sleep(delay)
+
+    def _fresh(self, opened_at, websocket):
+        return is_open(websocket) and time.monotonic() - opened_at < self.max_idle
+
+    async def _keep_warm(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wanted.wait(), timeout=self.max_idle / 2)
+            except asyncio.TimeoutError:
+                pass  # periodic check so idle spares are rotated before they go stale
+            self._wanted.clear()
+            for _ in range(self._ready.qsize()):
+                opened_at, websocket = self._ready.get_nowait()
+                if self._fresh(opened_at, websocket):
+                    self._ready.put_nowait((opened_at, websocket))
+                else:
+                    await websocket.close()
+            while self._ready.qsize() < self.spares:
+                websocket = await self._open_with_backoff()
+                self._ready.put_nowait((time.monotonic(), websocket))
+
+    async def acquire(self):
+        """Returns an open, initialised connection for one turn. Usually instant."""
+        self.start()
+        while not self._ready.empty():
+            opened_at, websocket = self._ready.get_nowait()
+            self._wanted.set()
+            if self._fresh(opened_at, websocket):
+                self.hits += 1
+                return websocket
+            asyncio.create_task(websocket.close())  # stale spare, the server may drop it any moment
+        self.misses += 1
+        self._wanted.set()
+        opened_at, websocket = await self._ready.get()
+        self._wanted.set()
+        return websocket
+
+    def stats(self):
+        average = self.connect_time / self.connects * 1000 if self.connects else 0.0
+        return (f"{self.hits} hot / {self.misses} cold acquires, {self.connects} connects "
+                f"(avg {average:.0f} ms), {self.connect_failures} failed")
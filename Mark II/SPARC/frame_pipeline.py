@@ -0,0 +1,118 @@
+import base64
+import time
+
+import cv2
+
+# Steps the pipeline walks down when the uplink is slow and back up when it recovers
+QUALITY_STEPS = [80, 70, 60, 50, 40]
+SIDE_STEPS = [1024, 768, 512, 384]
+FPS_STEPS = [1.0, 0.5, 0.25]
+
+
+class FramePipeline:
+    """
+    Turns BGR (or BGRA screen) frames into Live API image messages, sending only what is worth sending.
+
+    - Frames are resized and JPEG-encoded straight from the OpenCV buffer (no RGB/PIL/BytesIO round trip).
+    - A frame is skipped unless a 32x18 grayscale thumbnail differs enough from the last one sent,
+      with a keyframe every `keyframe_interval` seconds so the model never goes stale.
+    - Send latency reported back by the caller (see report_send_latency) lowers JPEG quality,
+      then resolution, then frame rate while the uplink is slow, and raises them again once it recovers.
+    """
+
+    def __init__(self, change_threshold=3.0, keyframe_interval=10.0, target_latency=0.25):
+        self.change_threshold = change_threshold
+        self.keyframe_interval = keyframe_interval
+        self.target_latency = target_latency
+
+        self.level = 0  # 0 = best quality, each step degrades one knob
+        self.latency = None  # EWMA of send latency in seconds
+        self._last_thumb = None
+        self._last_sent = 0.0
+
+        self.frames_seen = 0
+        self.frames_sent = 0
+        self.frames_unchanged = 0
+        self.bytes_sent = 0
+
+    # --- Current settings, derived from the degradation level ---
+    @property
+    def quality(self):
+        return QUALITY_STEPS[min(self.level, len(QUALITY_STEPS) - 1)]
+
+    @property
+    def max_side(self):
+        return SIDE_STEPS[min(max(0, self.level - len(QUALITY_STEPS) + 1), len(SIDE_STEPS) - 1)]
+
+    @property
+    def fps(self):
+        return FPS_STEPS[min(max(0, self.level - len(QUALITY_STEPS) - len(SIDE_STEPS) + 2), len(FPS_STEPS) - 1)]
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps
+
+    @property
+    def max_level(self):
+        return len(QUALITY_STEPS) + len(SIDE_STEPS) + len(FPS_STEPS) - 3
+
+    def changed(self, frame):
+        """Cheap change check on a tiny grayscale thumbnail of the frame."""
+        thumb = cv2.resize(frame, (32, 18), interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGRA2GRAY if thumb.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        if self._last_thumb is None:
+            self._last_thumb = thumb
+            return True
+        diff = cv2.absdiff(thumb, self._last_thumb).mean()
+        if diff < self.change_threshold:
+            return False
+        self._last_thumb = thumb
+        return True
+
+    def encode(self, frame):
+        h, w = frame.shape[:2]
+        scale = self.max_side / max(h, w)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return None
+        return jpeg
+
+    def process(self, frame, now=None, changed=None):
+        """
+        Returns a {"mime_type", "data"} message for the frame, or None if it should not be sent.
+        Pass `changed` to use the caller's own change check (e.g. dirty screen tiles) instead of the thumbnail.
+        """
+        now = time.monotonic() if now is None else now
+        self.frames_seen += 1
+        keyframe = now - self._last_sent >= self.keyframe_interval
+        if changed is None:
+            changed = self.changed(frame)
+        if not changed and not keyframe:
+            self.frames_unchanged += 1
+            return None
+        jpeg = self.encode(frame)
+        if jpeg is None:
+            return None
+        self._last_sent = now
+        self.frames_sent += 1
+        self.bytes_sent += len(jpeg)
+        return {"mime_type": "image/jpeg", "data": base64.b64encode(jpeg).decode()}
+
+    def report_send_latency(self, seconds):
+        """Feeds back how long session.send took for a frame and adapts quality, size and rate."""
+        self.latency = seconds if self.latency is None else 0.7 * self.latency + 0.3 * seconds
+        if self.latency > self.target_latency * 1.5 and self.level < self.max_level:
+            self.level += 1
+            self.latency = self.target_latency  # give the new setting a chance before stepping again
+        elif self.latency < self.target_latency * 0.5 and self.level > 0:
+            self.level -= 1
+            self.latency = self.target_latency
+
+    def stats(self):
+        return (f"frames sent {self.frames_sent}/{self.frames_seen} ({self.frames_unchanged} unchanged), "
+                f"{self.bytes_sent / 1024:.0f} KiB, q{self.quality} {self.max_side}px {self.fps:g} fps")
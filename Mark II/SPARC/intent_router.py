@@ -0,0 +1,259 @@
+import math
+import re
+import time
+from collections import Counter
+from datetime import datetime
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "thirty": 30, "forty": 40, "forty-five": 45, "fifty": 50, "sixty": 60, "ninety": 90,
+}
+UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1}
+DURATION = re.compile(
+    r"\b(\d+|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")[\s-]*"
+    r"(hours?|hrs?|minutes?|mins?|seconds?|secs?)\b", re.I)
+TOKEN = re.compile(r"[a-z']+|\d+")
+
+# Commands answered without the LLM. Each pattern finds the command, the classifier below has to agree.
+PATTERNS = [
+    ("timer.set", re.compile(r"\btimer\b", re.I)),
+    ("timer.list", re.compile(r"\b(what|which|list|show|any)\b.*\btimers\b|\btimers\b.*\b(running|left|set)\b", re.I)),
+    # Imperatives only: "is the camera on" and "check if the camera on my laptop works" are questions
+    ("camera.open", re.compile(r"^\s*(please\s+|(can|could|would|will) you\s+)?((open|start|turn on|switch on|activate)\b.*\bcamera\b"
+                               r"|(turn|switch) (the |my )?camera on\b)|^\s*camera on( please)?\W*$", re.I)),
+    ("camera.close", re.compile(r"^\s*(please\s+|(can|could|would|will) you\s+)?((close|stop|turn off|switch off|shut)\b.*\bcamera\b"
+                                r"|(turn|switch) (the |my )?camera off\b)|^\s*camera off( please)?\W*$", re.I)),
+    ("system.info", re.compile(r"\b(system|cpu|gpu|ram|memory)\b.*\b(info|information|usage|stats|status|using|load)\b"
+                               r"|\bhow much (ram|memory|cpu|gpu)\b|\b(cpu|gpu|ram) (info|usage|load)\b", re.I)),
+    ("project.create_folder", re.compile(r"\b(create|make|start|new)\b.*\bproject\b", re.I)),
+    # The whole utterance: "what is the time complexity of quicksort" is not a question about the clock
+    ("time", re.compile(r"^\s*(what time is it|what's the time|what is the time|tell me the time|current time)"
+                        r"( (right )?now)?( please)?\s*[?.!]?\s*$", re.I)),
+    ("date", re.compile(r"^\s*(what's the date|what is the date|what's today's date|what is today's date|today's date"
+                        r"|what day is it|what is today|tell me the date)( today)?( please)?\s*[?.!]?\s*$", re.I)),
+]
+# Questions about a topic ("how does a 555 timer work", "tell me about this camera") are for the LLM
+QUESTION = re.compile(r"^\s*(how (does|do|did|is|are|can|could|would|should)|why|explain|describe|tell me about|what (is|are) an?)\b", re.I)
+# Commands the user is taking back ("don't set a timer") and intents that only look like ours
+NEGATION = re.compile(r"\b(don'?t|do not|not|never)\b", re.I)
+GUARDS = {
+    # "cancel the 10 minute timer", "add 5 minutes to the timer": a timer that already runs
+    "timer.set": re.compile(r"\b(cancel|stop|delete|remove|clear|reset|add|extend|pause|resume|snooze)\b", re.I),
+    "project.create_folder": re.compile(r"\b(delete|remove|rename|open|close)\b", re.I),
+    # "what time is it in tokyo", "what day is it tomorrow": another place or day
+    "time": re.compile(r"\b(in|of|for|complexity|zone|there|tomorrow|yesterday)\b", re.I),
+    "date": re.compile(r"\b(in|of|for|complexity|zone|there|tomorrow|yesterday)\b", re.I),
+}
+PROJECT_NAME = [
+    re.compile(r"\bproject(?: folder)?\s+(?:called|named|name|titled)\s+(.+)$", re.I),
+    re.compile(r"\b(?:create|make|start)\s+(?:me\s+)?(?:a\s+)?(?:new\s+)?(.+?)\s+project\b", re.I),
+]
+# Words around a project name that aren't part of it ("create a new project folder" has no name)
+PROJECT_FILLER = {"a", "an", "the", "my", "me", "new", "project", "folder", "called", "named", "name", "titled"}
+
+# Training phrases for the classifier; "none" is everything the LLM should answer
+EXAMPLES = {
+    "timer.set": [
+        "set a timer for ten minutes", "set 10 second timer", "start a 5 minute timer", "timer for 2 hours",
+        "set me a timer for 1 minute", "countdown 30 seconds", "start a timer for twenty minutes",
+        "timer for 10 minutes and 10 seconds", "set me 33 second timer", "start a 10 hour timer",
+        "can you set a timer for 45 seconds", "put a timer on for three minutes",
+    ],
+    "timer.list": [
+        "what timers are running", "list my timers", "show the timers", "any timers running",
+        "which timers are set", "how many timers do i have left",
+    ],
+    "camera.open": [
+        "open the camera", "open camera", "turn on the camera", "start the camera", "can you open the camera",
+        "switch on the camera", "activate the camera", "camera on please",
+    ],
+    "camera.close": [
+        "close the camera", "turn off the camera", "stop the camera", "switch off the camera",
+        "shut the camera", "camera off please",
+    ],
+    "system.info": [
+        "give me system info", "show me system info", "show me gpu information", "how much ram am i using",
+        "give me cpu info", "what is my cpu usage", "system status", "memory usage", "gpu load",
+        "show system information", "how much memory am i using",
+    ],
+    "project.create_folder": [
+        "create new project called iron man", "make a new project folder name robot arm",
+        "start a new project called robot car", "create new web shooter project",
+        "make me a new project folder called ai assistant", "create a project named drone",
+        "new project folder called rover",
+    ],
+    "time": [
+        "what time is it", "what's the time", "tell me the time", "current time please", "what is the time now",
+    ],
+    "date": [
+        "what's the date", "what is today's date", "what day is it", "what is the date today", "tell me the date",
+    ],
+    "none": [
+        "hello how are you", "difference between dc and ac", "briefly explain gravity", "explain the internet",
+        "what is the chemical symbol for water", "who painted the mona lisa", "how many continents are there",
+        "what is a brushless motor", "thank you very much", "goodnight", "briefly explain ai",
+        "how does a 555 timer work", "design a timer circuit for 10 seconds", "what is a watchdog timer",
+        "how does a camera sensor work", "which camera should i buy for my project",
+        "what time zone is london in", "how long does it take to boil an egg", "what year did the war end",
+        "how much ram does a raspberry pi have", "what gpu is best for machine learning",
+        "what does system on a chip mean", "how do i start a project in python", "tell me about my project",
+        "what is the speed of light", "how much memory does a float use", "what's the weather in london",
+        "how long will it take to drive to work", "what ocean is larger the atlantic or pacific",
+        "open the project notes and summarise them", "why is my cpu so hot",
+        "cancel the 10 minute timer", "delete my 5 minute timer", "stop the timer", "remove the timer",
+        "don't set a timer for 10 minutes",
+    ],
+}
+
+
+def tokenize(text):
+    """Lowercase words with numbers folded into one token, plus bigrams."""
+    words = ["<num>" if word.isdigit() or (word in NUMBER_WORDS and len(word) > 2) else word for word in TOKEN.findall(text.lower())]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over words and bigrams with add-one smoothing and equal priors.
+    Trains in well under a millisecond on the built-in EXAMPLES; classify() costs microseconds.
+    """
+
+    def __init__(self, examples=EXAMPLES):
+        self.counts = {intent: Counter(token for phrase in phrases for token in tokenize(phrase))
+                       for intent, phrases in examples.items()}
+        self.totals = {intent: sum(counts.values()) for intent, counts in self.counts.items()}
+        self.vocabulary = len(set().union(*self.counts.values()))
+
+    def probabilities(self, text):
+        tokens = tokenize(text)
+        scores = {}
+        for intent, counts in self.counts.items():
+            denominator = self.totals[intent] + self.vocabulary
+            scores[intent] = sum(math.log((counts[token] + 1) / denominator) for token in tokens)
+        top = max(scores.values())
+        weights = {intent: math.exp(score - top) for intent, score in scores.items()}
+        total = sum(weights.values())
+        return {intent: weight / total for intent, weight in weights.items()}
+
+    def classify(self, text):
+        """Returns (intent, probability) for the most likely intent."""
+        probabilities = self.probabilities(text)
+        intent = max(probabilities, key=probabilities.get)
+        return intent, probabilities[intent]
+
+
+class IntentRouter:
+    """
+    Answers common commands (timers, camera, system info, project folders, time and date) before
+    the prompt reaches the LLM.
+
+    A compiled pattern has to find the command and its arguments, and the classifier has to pick the
+    same intent with at least `threshold` probability. Negated commands ("don't set a timer"), ones
+    that undo an intent ("cancel the timer"), times in another place and project commands without a
+    name fall through to the LLM too, as does anything longer than `max_words`. Tool intents run
+    through the backend's ToolRegistry.
+
+    Counters: how many turns were answered locally, and the time saved compared with the average
+    LLM turn (the backend reports those with observe_llm()).
+    """
+
+    def __init__(self, tools=None, threshold=0.8, max_words=12, classifier=None):
+        self.tools = tools
+        self.threshold = threshold
+        self.max_words = max_words
+        self.classifier = classifier or IntentClassifier()
+
+        self.turns = 0
+        self.hits = Counter()
+        self.route_time = 0.0
+        self.saved = 0.0
+        self.llm_turns = 0
+        self.llm_time = 0.0
+
+    def match(self, text):
+        """Returns the route for `text` ({"intent", "confidence", "code" or "reply"}) or None."""
+        if len(text.split()) > self.max_words or QUESTION.search(text) or NEGATION.search(text):
+            return None
+        intent, confidence = self.classifier.classify(text)
+        if intent == "none" or confidence < self.threshold:
+            return None
+        if intent in GUARDS and GUARDS[intent].search(text):
+            return None
+        for name, pattern in PATTERNS:
+            if name == intent and pattern.search(text):
+                route = self._build(intent, text.strip().rstrip(".!?"))
+                if route is not None:
+                    route.update(intent=intent, confidence=round(confidence, 3))
+                return route
+        return None
+
+    def route(self, text):
+        """match() plus the hit counters. Call once per turn."""
+        start = time.perf_counter()
+        route = self.match(text)
+        self.turns += 1
+        self.route_time += time.perf_counter() - start
+        if route is not None:
+            self.hits[route["intent"]] += 1
+            print(f"[intent {route['intent']} ({route['confidence']:.2f}), answered without the LLM]")
+        return route
+
+    def _build(self, intent, text):
+        if intent == "timer.set":
+            seconds = sum((int(amount) if amount.isdigit() else NUMBER_WORDS[amount.lower()]) * UNIT_SECONDS[unit[0].lower()]
+                          for amount, unit in DURATION.findall(text))
+            if not 0 < seconds < 100 * 3600:
+                return None
+            time_str = f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+            return {"code": f"timer.set({time_str!r})"}
+        if intent == "project.create_folder":
+            for pattern in PROJECT_NAME:
+                match = pattern.search(text)
+                if match:
+                    words = match.group(1).strip(" '\"").split()
+                    while words and words[0].lower() in PROJECT_FILLER:
+                        words.pop(0)
+                    while words and words[-1].lower() in PROJECT_FILLER:
+                        words.pop()
+                    name = " ".join(words)
+                    if not name or "/" in name or "\\" in name or ".." in name:
+                        return None  # no name, or a path ("../../etc"): the LLM asks for a plain name
+                    return {"code": f"project.create_folder({name!r})"}
+            return None  # no name given, the LLM asks for one
+        if intent == "time":
+            return {"reply": f"It is {datetime.now().strftime('%I:%M %p').lstrip('0')}."}
+        if intent == "date":
+            return {"reply": f"Today is {datetime.now().strftime('%A, %B %d, %Y')}."}
+        return {"code": f"{intent}()"}
+
+    async def answer(self, route):
+        """Runs a route and returns (reply, tool result or None)."""
+        if "reply" in route:
+            return route["reply"], None
+        result = await self.tools.call(route["code"])
+        print(f"[tool {result['tool']}: {'ok' if result['ok'] else 'failed'} in {result['duration']:.2f} s]")
+        reply = str(result["result"]) if result["ok"] else f"Sorry Sir, that didn't work: {result['error']}"
+        return reply, result
+
+    def handled(self, seconds):
+        """A routed turn took `seconds`; counts what the average LLM turn would have taken on top."""
+        if self.llm_turns:
+            self.saved += max(0.0, self.llm_time / self.llm_turns - seconds)
+
+    def observe_llm(self, seconds):
+        """A turn that went to the LLM took `seconds` from request to the end of the answer."""
+        self.llm_turns += 1
+        self.llm_time += seconds
+
+    def stats(self):
+        if not self.turns:
+            return "no turns yet"
+        routed = sum(self.hits.values())
+        intents = ", ".join(f"{count} {intent}" for intent, count in self.hits.most_common())
+        saved = ""
+        if self.llm_turns:
+            saved = f", ~{self.saved:.1f} s saved against {self.llm_time / self.llm_turns * 1000:.0f} ms per LLM turn"
+        return (f"{routed}/{self.turns} turns answered locally ({routed / self.turns * 100:.0f}%"
+                f"{': ' + intents if intents else ''}){saved}, "
+                f"routing {self.route_time / self.turns * 1e6:.0f} us per turn")
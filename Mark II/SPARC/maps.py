@@ -0,0 +1,178 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import googlemaps
+
+MAPS_URL = os.getenv("SPARC_MAPS_URL", "https://maps.googleapis.com")
+
+MODES = ("driving", "walking", "bicycling", "transit")
+MODE_ALIASES = {
+    "drive": "driving", "car": "driving", "driving": "driving",
+    "walk": "walking", "walking": "walking", "foot": "walking", "on foot": "walking",
+    "bike": "bicycling", "bicycle": "bicycling", "cycle": "bicycling", "cycling": "bicycling", "bicycling": "bicycling",
+    "transit": "transit", "public transport": "transit", "public transit": "transit", "bus": "transit",
+    "train": "transit", "subway": "transit", "metro": "transit",
+}
+# Traffic and timetables change the answer within minutes; walking and cycling routes don't
+TIME_DEPENDENT = ("driving", "transit")
+
+
+def normalize(place):
+    """'  Vinings, GA ' and 'vinings,ga' are the same place."""
+    place = re.sub(r"\s*,\s*", ", ", place.strip().lower())
+    return re.sub(r"\s+", " ", place).strip(" .?!")
+
+
+def normalize_mode(mode):
+    """'walking', 'Walk', 'by bike', 'on foot' -> a Directions API mode. Defaults to driving."""
+    mode = re.sub(r"^(by|via|using|with)\s+", "", (mode or "driving").strip().lower()).strip(" .?!")
+    if mode not in MODE_ALIASES:
+        raise ValueError(f"Unknown travel mode '{mode}'. Use one of: {', '.join(MODES)}.")
+    return MODE_ALIASES[mode]
+
+
+def describe(route, origin, destination, mode):
+    """The sentence get_travel_duration returns to the model."""
+    if route is None:
+        return f"Could not find a route from {origin} to {destination} via {mode}."
+    if mode == "driving" and route["duration_in_traffic"]:
+        return f"Estimated travel duration ({mode}, with current traffic): {route['duration_in_traffic']}"
+    if route["duration"]:
+        return f"Estimated travel duration ({mode}): {route['duration']}"
+    return f"Duration information not found in response for {mode}."
+
+
+class RouteService:
+    """
+    Travel durations from the Google Maps Directions API, shared by the whole process.
+
+    One googlemaps.Client (and its HTTP session) is created on the first request and reused.
+    Routes are cached by normalized origin, destination and mode plus a departure-time bucket:
+    driving and transit answers are reused for `bucket` seconds, walking and cycling ones for
+    `static_bucket`. Concurrent identical requests share one API call, and a caller waits at most
+    `timeout` seconds (a late answer still lands in the cache).
+
+    The last origin and destination are remembered, so a follow-up that only names a mode
+    ("and by walking?") needs neither of them, and costs no request if that route is cached.
+    """
+
+    def __init__(self, key=None, base_url=MAPS_URL, bucket=300, static_bucket=3600, timeout=10.0, max_entries=128):
+        self.key = key  # None: MAPS_API_KEY from the environment, read on first use
+        self.base_url = base_url
+        self.bucket = bucket
+        self.static_bucket = static_bucket
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._gmaps = None
+        self._cache = OrderedDict()  # (origin, destination, mode, bucket) -> route dict or None (no route)
+        self._inflight = {}  # same key -> task of the request in flight
+        self.last = None  # (origin, destination) of the last answered request
+
+        self.lookups = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.follow_ups = 0  # lookups that reused the last origin and destination
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.request_time = 0.0
+
+    def _client(self):
+        if self._gmaps is None:
+            key = self.key or os.getenv("MAPS_API_KEY")
+            if not key or key == "YOUR_PROVIDED_KEY":
+                raise ValueError("Missing or invalid Google Maps API Key configuration.")
+            # Bounded retries: the caller gives up after `timeout` anyway
+            self._gmaps = googlemaps.Client(key=key, timeout=self.timeout, retry_timeout=self.timeout,
+                                            base_url=self.base_url)
+        return self._gmaps
+
+    def _key(self, origin, destination, mode, now):
+        size = self.bucket if mode in TIME_DEPENDENT else self.static_bucket
+        return normalize(origin), normalize(destination), mode, int(now // size)
+
+    async def get(self, origin=None, destination=None, mode="driving"):
+        """
+        Returns (route, origin, destination, mode). route is {"duration", "duration_in_traffic",
+        "distance", "start_address", "end_address"}, or None if there is no route for that mode.
+        A missing origin or destination is taken from the previous request.
+        """
+        mode = normalize_mode(mode)
+        origin, destination = (origin or "").strip(), (destination or "").strip()
+        if not origin or not destination:
+            if self.last is None:
+                raise ValueError("Please say where you are travelling from and to.")
+            origin, destination = origin or self.last[0], destination or self.last[1]
+            self.follow_ups += 1
+        self.lookups += 1
+
+        key = self._key(origin, destination, mode, time.time())
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            self.last = (origin, destination)
+            return self._cache[key], origin, destination, mode
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, origin, destination, mode))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.coalesced += 1
+        try:
+            route = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        self.last = (origin, destination)
+        return route, origin, destination, mode
+
+    def _done(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here too, in case every caller timed out before it failed
+
+    async def _fetch(self, key, origin, destination, mode):
+        self.requests += 1
+        start = time.perf_counter()
+        print(f"Requesting directions: From='{origin}', To='{destination}', Mode='{mode}'")
+        try:
+            gmaps = self._client()
+            result = await asyncio.to_thread(gmaps.directions, origin, destination, mode=mode,
+                                             departure_time=datetime.now())
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.request_time += time.perf_counter() - start
+
+        route = None
+        if result:
+            leg = result[0]["legs"][0]
+            route = {
+                "duration": leg.get("duration", {}).get("text"),
+                "duration_in_traffic": leg.get("duration_in_traffic", {}).get("text"),
+                "distance": leg.get("distance", {}).get("text"),
+                "start_address": leg.get("start_address"),
+                "end_address": leg.get("end_address"),
+            }
+        self._cache[key] = route
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return route
+
+    def stats(self):
+        if not self.lookups:
+            return "no lookups yet"
+        average = f", {self.request_time / self.requests * 1000:.0f} ms per request" if self.requests else ""
+        return (f"{self.hits}/{self.lookups} routes cached ({self.hits / self.lookups * 100:.0f}%), "
+                f"{self.follow_ups} follow-ups, {self.coalesced} coalesced, {self.requests} requests{average}, "
+                f"{self.errors} failed, {self.timeouts} timed out")
+
+
+service = RouteService()
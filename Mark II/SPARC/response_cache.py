@@ -0,0 +1,134 @@
+import os
+import re
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# off, exact (normalized text only) or semantic (normalized text, then embedding similarity)
+RESPONSE_CACHE = os.getenv("SPARC_RESPONSE_CACHE", "off")
+
+CONTRACTIONS = {"what's": "what is", "who's": "who is", "where's": "where is", "how's": "how is", "it's": "it is",
+                "that's": "that is", "there's": "there is", "i'm": "i am", "don't": "do not", "can't": "cannot"}
+FILLER = re.compile(r"^(?:(?:hey|ok|okay|so|um|uh|sparc|spark)\b[\s,]*)+|\b(?:please|sir)\b", re.I)
+# The answer depends on the conversation ("what about it") or on when it is asked ("what's new today")
+CONTEXT_WORDS = re.compile(r"\b(it|its|that|this|these|those|they|them|he|she|him|her|again|more|else|"
+                           r"today|tonight|tomorrow|yesterday|now|latest|current|recent|news|weather)\b", re.I)
+
+
+def normalize(text):
+    """Lowercase, expand contractions, drop fillers and punctuation, collapse whitespace."""
+    text = text.lower().replace("’", "'")
+    text = " ".join(CONTRACTIONS.get(word, word) for word in text.split())
+    text = FILLER.sub(" ", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class ResponseCache:
+    """
+    Opt-in cache of answers to repeated questions, so "what's the speed of light?" is spoken
+    without another LLM round trip.
+
+    Lookups match on normalized text first; with an `embed` coroutine (text -> vector) they also
+    match the most similar cached question at cosine similarity >= `similarity`. Entries expire
+    after `ttl` seconds and the least recently used one is evicted beyond `max_entries`.
+    Prompts that refer to the conversation or to the current time are never cached, and callers
+    only put() answers that used no tool or search grounding.
+    """
+
+    def __init__(self, max_entries=256, ttl=6 * 3600, embed=None, similarity=0.92, min_words=3):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed
+        self.similarity = similarity
+        self.min_words = min_words
+        self._entries = OrderedDict()  # normalized prompt -> (stored_at, answer, unit vector or None)
+        self._pending = OrderedDict()  # vectors computed by get() misses, reused by put()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.skipped = 0  # prompts that can't be cached
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def cacheable(self, text):
+        key = normalize(text)
+        return len(key.split()) >= self.min_words and not CONTEXT_WORDS.search(key)
+
+    async def _vector(self, key):
+        try:
+            vector = np.asarray(await self.embed(key), dtype=np.float32)
+        except Exception as e:
+            print(f"Embedding failed, the response cache falls back to exact matches: {e}")
+            self.embed = None
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _expire(self, now):
+        for key in [key for key, (stored_at, _, _) in self._entries.items() if now - stored_at > self.ttl]:
+            del self._entries[key]
+            self.expirations += 1
+
+    async def get(self, text):
+        """Returns the cached answer for `text`, or None."""
+        if not self.cacheable(text):
+            self.skipped += 1
+            return None
+        key = normalize(text)
+        self._expire(time.monotonic())
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry[1]
+
+        if self.embed is not None:
+            vector = await self._vector(key)
+            if vector is not None:
+                self._pending[key] = vector
+                while len(self._pending) > 8:
+                    self._pending.popitem(last=False)
+                candidates = [(k, v) for k, (_, _, v) in self._entries.items() if v is not None and v.shape == vector.shape]
+                if candidates:
+                    scores = np.stack([v for _, v in candidates]) @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity:
+                        match = candidates[best][0]
+                        self._entries.move_to_end(match)
+                        self.semantic_hits += 1
+                        print(f"[response cache: '{key}' matched '{match}' ({scores[best]:.2f})]")
+                        return self._entries[match][1]
+        self.misses += 1
+        return None
+
+    def put(self, text, answer):
+        """Stores the answer to a question that was just looked up with get() and missed."""
+        if not answer.strip() or not self.cacheable(text):
+            return
+        key = normalize(text)
+        self._entries[key] = (time.monotonic(), answer.strip(), self._pending.pop(key, None))
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hits(self):
+        return self.exact_hits + self.semantic_hits
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return (f"{self.hits}/{self.hits + self.misses} hits ({self.hit_rate() * 100:.0f}%: {self.exact_hits} exact, "
+                f"{self.semantic_hits} semantic), {self.skipped} not cacheable, {len(self)} entries, "
+                f"{self.evictions} evicted, {self.expirations} expired")
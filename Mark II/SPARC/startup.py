@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BAR_WIDTH = 40
+
+
+class StartupTimeline:
+    """Records when each startup step began and finished so the slow ones are easy to spot."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.steps = []  # (name, start, end, error)
+
+    def record(self, name, start, end, error=None):
+        self.steps.append((name, start - self.start, end - self.start, error))
+
+    def print(self):
+        total = max((end for _, _, end, _ in self.steps), default=0.0)
+        print(f"Startup timeline ({total:.2f} s total):")
+        for name, start, end, error in sorted(self.steps, key=lambda step: step[1]):
+            offset = int(BAR_WIDTH * start / total) if total else 0
+            width = max(1, int(BAR_WIDTH * (end - start) / total)) if total else 1
+            status = f"  FAILED: {error}" if error else ""
+            print(f"  {name:<10} {start:6.2f} -> {end:6.2f} s  {end - start:6.2f} s  |{' ' * offset}{'#' * width}{' ' * (BAR_WIDTH - offset - width)}|{status}")
+
+
+def warm_start(steps, timeline=None):
+    """
+    Runs the startup steps in parallel and returns {name: result}.
+
+    Each step is a callable that loads (and ideally warms up) one component. Model loading mostly
+    happens in native code that releases the GIL, so threads are enough to overlap them. A step that
+    raises gets None as its result and the error is printed, like the sequential setup did.
+    """
+    timeline = timeline or StartupTimeline()
+
+    def run(name, step):
+        start = time.perf_counter()
+        try:
+            result = step()
+        except Exception as e:
+            print(f"Error initializing {name}: {e}")
+            timeline.record(name, start, time.perf_counter(), e)
+            return None
+        timeline.record(name, start, time.perf_counter())
+        return result
+
+    with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="warm-start") as pool:
+        futures = {name: pool.submit(run, name, step) for name, step in steps.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+    timeline.print()
+    return results
@@ -0,0 +1,170 @@
+import asyncio
+import re
+import time
+
+# End of a sentence or clause: punctuation (plus closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*\s+')
+CLAUSE_END = re.compile(r'[,;:—–]["\'”’)\]]*\s+|\s[-–—]\s+')
+WORD_END = re.compile(r'\s+')
+
+
+class TextChunker:
+    """
+    Regroups streamed LLM text into speakable chunks for TTS.
+
+    Text is only ever cut after whitespace, so words are never split. Each chunk has a target
+    length from `schedule` (short first, so the first clause is voiced quickly, longer later, so
+    the TTS has more context for prosody). A chunk ends at the last sentence boundary before the
+    target, else the last clause boundary, else the last word; a complete sentence goes out even
+    when it is shorter than the target. poll() releases whole words early in two cases: the first
+    chunk of a turn has waited `max_wait` seconds, or the model stalled for `max_wait` seconds.
+
+    Every chunk comes with the reason it was cut ("sentence", "clause", "word", "timeout", "end").
+    stats() reports how the chunks ended and the delay from a turn's first text to its first chunk.
+    """
+
+    def __init__(self, schedule=(40, 80, 160, 250), max_wait=0.3, min_sentence=8):
+        self.schedule = schedule
+        self.max_wait = max_wait
+        self.min_sentence = min_sentence  # don't send "1." or "Dr." on its own
+        self.buffer = ""
+        self._index = 0  # chunk number within the turn, indexes the schedule
+        self._pending_since = None  # when the oldest unsent text arrived
+        self._last_text = None  # when text last arrived
+        self._turn_start = None
+
+        self.reasons = {"sentence": 0, "clause": 0, "word": 0, "timeout": 0, "end": 0}
+        self.first_chunk_delays = []
+
+    def reset(self):
+        """Drops unsent text, e.g. when the turn was interrupted."""
+        self.buffer = ""
+        self._index = 0
+        self._pending_since = None
+        self._last_text = None
+        self._turn_start = None
+
+    @property
+    def target(self):
+        return self.schedule[min(self._index, len(self.schedule) - 1)]
+
+    def _last_end(self, pattern, text, minimum=1):
+        end = None
+        for match in pattern.finditer(text):
+            if match.end() >= minimum:
+                end = match.end()
+        return end
+
+    def _emit(self, cut, reason, now):
+        text = self.buffer[:cut].strip()
+        self.buffer = self.buffer[cut:]
+        self._pending_since = now if self.buffer.strip() else None
+        if not text:
+            return None
+        if self._index == 0 and self._turn_start is not None:
+            self.first_chunk_delays.append(now - self._turn_start)
+        self._index += 1
+        self.reasons[reason] += 1
+        return text, reason
+
+    def _next_cut(self):
+        text = self.buffer
+        target = self.target
+        if len(text) < target:
+            cut = self._last_end(SENTENCE_END, text, self.min_sentence)
+            return (cut, "sentence") if cut else (None, None)
+        window = text[:target + 1]  # cut at or before the target length
+        half = target // 2
+        for pattern, reason in ((SENTENCE_END, "sentence"), (CLAUSE_END, "clause")):
+            cut = self._last_end(pattern, window, max(half, self.min_sentence))
+            if cut:
+                return cut, reason
+        cut = self._last_end(WORD_END, window) or self._last_end(WORD_END, text)
+        return (cut, "word") if cut else (None, None)
+
+    def feed(self, text, now=None):
+        """Adds streamed text and returns the chunks it completed as (text, reason) tuples."""
+        now = time.monotonic() if now is None else now
+        if self._turn_start is None:
+            self._turn_start = now
+        if self._pending_since is None and text.strip():
+            self._pending_since = now
+        self._last_text = now
+        self.buffer += text
+        chunks = []
+        while True:
+            cut, reason = self._next_cut()
+            if cut is None:
+                return chunks
+            chunk = self._emit(cut, reason, now)
+            if chunk:
+                chunks.append(chunk)
+
+    def time_to_flush(self, now=None):
+        """Seconds until poll() would release text, or None if nothing is waiting."""
+        if self._pending_since is None:
+            return None
+        now = time.monotonic() if now is None else now
+        # The first chunk is on the clock from its first word; later ones only if the text stalls
+        since = self._pending_since if self._index == 0 else max(self._pending_since, self._last_text)
+        return max(0.0, since + self.max_wait - now)
+
+    def poll(self, now=None):
+        """Releases the whole words that have waited too long, preferring a clause boundary."""
+        now = time.monotonic() if now is None else now
+        remaining = self.time_to_flush(now)
+        if remaining is None or remaining > 0:
+            return []
+        cut = self._last_end(CLAUSE_END, self.buffer) or self._last_end(WORD_END, self.buffer)
+        if cut is None:
+            self._pending_since = self._last_text = now  # one long word so far, give it another max_wait
+            return []
+        chunk = self._emit(cut, "timeout", now)
+        return [chunk] if chunk else []
+
+    def flush(self, now=None):
+        """End of the turn: returns what is left and starts a new turn."""
+        now = time.monotonic() if now is None else now
+        chunk = self._emit(len(self.buffer), "end", now)
+        self.reset()
+        return [chunk] if chunk else []
+
+    def stats(self):
+        total = sum(self.reasons.values())
+        if not total:
+            return "no chunks yet"
+        boundaries = (self.reasons["sentence"] + self.reasons["clause"] + self.reasons["end"]) / total * 100
+        delays = sorted(self.first_chunk_delays)
+        first = f", first chunk after p50 {delays[len(delays) // 2] * 1000:.0f} ms" if delays else ""
+        split = ", ".join(f"{count} {reason}" for reason, count in self.reasons.items() if count)
+        return f"{total} chunks ({split}), {boundaries:.0f}% on sentence/clause boundaries{first}"
+
+
+async def chunked(queue, chunker):
+    """
+    Reads (generation, text) items from a response queue and yields (generation, chunk, reason).
+    A (generation, None) item ends the turn: the rest of the buffer is yielded, then (generation, None, "end").
+    Text left over from an earlier generation is dropped when a new generation shows up.
+    """
+    generation = None
+    while True:
+        timeout = chunker.time_to_flush()
+        try:
+            if timeout is None:
+                item_generation, text = await queue.get()
+            else:
+                item_generation, text = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            for chunk, reason in chunker.poll():
+                yield generation, chunk, reason
+            continue
+        if item_generation != generation:
+            chunker.reset()
+            generation = item_generation
+        if text is None:
+            for chunk, reason in chunker.flush():
+                yield generation, chunk, reason
+            yield generation, None, "end"
+        elif text:
+            for chunk, reason in chunker.feed(text):
+                yield generation, chunk, reason
@@ -0,0 +1,91 @@
+import ast
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ToolRegistry:
+    """
+    Runs tool calls written by the model without eval().
+
+    The call is parsed with ast and must be a single call to a registered name with literal
+    arguments, e.g. timer.set("00:00:10"). Tools run on a small thread pool so a slow one never
+    blocks the event loop, and each has its own timeout. Results come back as dicts:
+
+        {"tool": "system.info", "ok": True, "result": ..., "duration": 0.01}
+        {"tool": "timer.set", "ok": False, "error": "...", "duration": 0.0}
+
+    A thread can't be stopped, so a call that times out keeps its worker busy until the tool returns
+    on its own. At most `max_workers - 1` such calls are tolerated; beyond that new calls fail right
+    away instead of queueing behind them, so one worker is always left for calls that do finish.
+    """
+
+    def __init__(self, max_workers=4):
+        self.tools = {}
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self.stuck = set()  # futures of calls that timed out and still hold a worker
+
+    def register(self, name, func, timeout=10.0):
+        """Registers func under the dotted name the model uses."""
+        self.tools[name] = (func, timeout)
+
+    def parse(self, code):
+        """Returns (name, args, kwargs) for a call like `module.func("a", b=1)` or raises ValueError."""
+        try:
+            tree = ast.parse(code.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Not a valid call: {e.msg}")
+        call = tree.body
+        if not isinstance(call, ast.Call):
+            raise ValueError("Expected a single function call")
+        name = self._dotted_name(call.func)
+        if name not in self.tools:
+            raise ValueError(f"Unknown tool: {name}")
+        try:
+            args = [ast.literal_eval(arg) for arg in call.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords if kw.arg is not None}
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            # literal_eval raises all of these on hostile or malformed input ("{[]: 1}", "1" * 10**6, deep nesting)
+            raise ValueError("Tool arguments must be literal values")
+        if len(kwargs) != len(call.keywords):
+            raise ValueError("**kwargs are not allowed in tool calls")
+        return name, args, kwargs
+
+    async def call(self, code):
+        start = time.perf_counter()
+        try:
+            name, args, kwargs = self.parse(code)
+        except ValueError as e:
+            return {"tool": code.strip(), "ok": False, "error": str(e), "duration": 0.0}
+
+        func, timeout = self.tools[name]
+        if len(self.stuck) >= self.max_workers - 1:
+            return {"tool": name, "ok": False, "error": f"{len(self.stuck)} earlier tool calls are still running after timing out",
+                    "duration": 0.0}
+        work = self.pool.submit(functools.partial(func, *args, **kwargs))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(work), timeout)
+        except asyncio.TimeoutError:
+            if not work.done():
+                self.stuck.add(work)
+                work.add_done_callback(self.stuck.discard)
+            return {"tool": name, "ok": False, "error": f"Timed out after {timeout} s", "duration": time.perf_counter() - start}
+        except Exception as e:
+            return {"tool": name, "ok": False, "error": f"{type(e).__name__}: {e}", "duration": time.perf_counter() - start}
+        return {"tool": name, "ok": True, "result": result, "duration": time.perf_counter() - start}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _dotted_name(node):
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            raise ValueError("Tool calls must name a function directly")
+        parts.append(node.id)
+        return ".".join(reversed(parts))
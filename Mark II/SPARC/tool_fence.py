@@ -0,0 +1,89 @@
+FENCE = "```"
+
+
+class ToolFenceParser:
+    """
+    Incremental parser that splits a streamed LLM reply into speakable text and ```fenced``` tool calls.
+
+    Tokens are fed in as they arrive. Each call to feed() only scans the new token plus the
+    (at most two) backticks held back from the previous token, so the cost per token is constant
+    no matter how long the reply or the code block gets, and a fence is found however the model
+    splits it ("``" + "`tool_code", "text.```", "```\\n", ...).
+
+    feed() and flush() return a list of events:
+        ("text", str)  text outside any fence, safe to send to TTS
+        ("tool", str)  a complete fenced block, including both fences, ready for extract_tool_call
+    """
+
+    def __init__(self):
+        self.in_fence = False
+        self._pending = ""  # trailing backticks that might be the start of a fence
+        self._code = []
+
+    def feed(self, token):
+        events = []
+        buf = self._pending + token
+        self._pending = ""
+        i = 0
+        while True:
+            j = buf.find(FENCE, i)
+            if j == -1:
+                keep = self._trailing_backticks(buf, i)
+                part = buf[i:len(buf) - keep]
+                self._pending = buf[len(buf) - keep:]
+                if self.in_fence:
+                    self._code.append(part)
+                elif part:
+                    events.append(("text", part))
+                return events
+
+            if self.in_fence:
+                # Closing fence: hand the tool call off right away
+                self._code.append(buf[i:j])
+                events.append(("tool", FENCE + "".join(self._code) + FENCE))
+                self._code = []
+                self.in_fence = False
+            else:
+                if j > i:
+                    events.append(("text", buf[i:j]))
+                self.in_fence = True
+            i = j + len(FENCE)
+
+    def flush(self):
+        """Ends the stream. Held back backticks are released as text, an unclosed fence is dropped."""
+        events = []
+        if self.in_fence:
+            print(f"Dropping unterminated code block: {FENCE}{''.join(self._code)}{self._pending}")
+        elif self._pending:
+            events.append(("text", self._pending))
+        self.in_fence = False
+        self._pending = ""
+        self._code = []
+        return events
+
+    @staticmethod
+    def _trailing_backticks(buf, start):
+        """Number of backticks (at most len(FENCE) - 1) at the end of buf[start:]."""
+        keep = 0
+        while keep < len(FENCE) - 1 and len(buf) - keep > start and buf[len(buf) - keep - 1] == "`":
+            keep += 1
+        return keep
+
+
+def parse_stream(chunks):
+    """Runs a whole recorded chunk stream through a fresh parser and returns every event."""
+    parser = ToolFenceParser()
+    events = []
+    for chunk in chunks:
+        content = chunk['message']['content'] if isinstance(chunk, dict) else chunk
+        events.extend(parser.feed(content))
+    events.extend(parser.flush())
+    return events
+
+
+if __name__ == "__main__":
+    # Chunk stream recorded from gemma3:4b-it-q4_K_M for "set a 10 second timer"
+    recorded = ["``", "`tool", "_code", "\n", "timer", ".set", "(\"", "00", ":", "00", ":", "10", "\")", "\n`", "``"]
+    print(parse_stream(recorded))
+    # Fence merged with the surrounding text
+    print(parse_stream(["Certainly sir.```", "tool_code\nsystem.info()\n```", " Done."]))
@@ -0,0 +1,227 @@
+"""
+Per-turn latency tracing for both backends.
+
+Each turn collects timestamped events (end of speech, transcribed, request sent, first token,
+tool start/end, first TTS byte, first sample played) plus the LLM's own counters. When the next
+turn starts or the tracer is closed, it is handed to a writer thread that appends it as one JSON
+line, so no file I/O happens on the event loop. Past SPARC_TRACE_MAX_BYTES (5 MB by default) the
+file is rotated to <file>.1, replacing the previous one.
+
+Print p50/p95 per stage from a trace file:
+
+    python -m SPARC.tracing report [sparc_traces.jsonl]
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+TRACE_FILE = os.getenv("SPARC_TRACE_FILE", "sparc_traces.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("SPARC_TRACE_MAX_BYTES", 5 * 2 ** 20))
+
+# Stages reported by `report`: name, from event, to event
+STAGES = [
+    ("stt", "end_of_speech", "transcribed"),
+    ("to request", "transcribed", "request_sent"),
+    ("first token", "request_sent", "first_token"),
+    ("tools", "tool_start", "tool_end"),
+    ("to TTS", "first_token", "tts_request"),
+    ("first TTS byte", "tts_request", "first_tts_byte"),
+    ("to speaker", "first_tts_byte", "first_sample_played"),
+    ("total", "start", "first_sample_played"),
+]
+
+
+class Tracer:
+    """
+    Collects the events of the current turn. Thread-safe: audio callbacks and the recorder
+    thread mark events too. Events are kept the first time they happen in a turn, in ms since
+    the turn started (the end of speech when the turn came from the microphone).
+    """
+
+    def __init__(self, path=TRACE_FILE, backend="", max_bytes=TRACE_MAX_BYTES):
+        self.path = path  # None or "" disables the file, the per-turn summary is still printed
+        self.backend = backend
+        self.max_bytes = max_bytes  # the file is rotated to <path>.1 once it would grow past this
+        self._lock = threading.Lock()
+        self._turn = None
+        self._next = {}  # events that happen before the turn exists (speech end, transcription)
+        self._queue = queue.SimpleQueue()  # finished turns for the writer thread, None stops it
+        self._writer = None
+
+    def mark_next(self, event, t=None):
+        """Records an event for the turn that is about to start."""
+        with self._lock:
+            self._next[event] = time.perf_counter() if t is None else t
+
+    def begin(self, generation, **attrs):
+        """Starts a turn, writing out the previous one."""
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._turn
+            pending, self._next = self._next, {}
+            start = min(pending.values(), default=now)
+            self._turn = {
+                "turn": generation,
+                "backend": self.backend,
+                "time": time.time() - (now - start),
+                "start": start,
+                "events": {event: t for event, t in pending.items()},
+                "spans": [],
+                "llm": [],
+                **attrs,
+            }
+            self._turn["events"].setdefault("start", start)
+        self._submit(previous)
+
+    def mark(self, event, generation=None, t=None):
+        """Records the first time `event` happens in the current turn (ignored for stale generations)."""
+        t = time.perf_counter() if t is None else t
+        with self._lock:
+            turn = self._turn
+            if turn is None or (generation is not None and generation != turn["turn"]):
+                return
+            turn["events"].setdefault(event, t)
+
+    def span(self, name, start, end, generation=None, **attrs):
+        """Records something with a duration, e.g. a tool call. The first one also marks tool_start/tool_end."""
+        with self._lock:
+            turn = self._turn
+            if turn is None or (generation is not None and generation != turn["turn"]):
+                return
+            turn["spans"].append({"name": name, "start": start, "end": end, **attrs})
+            turn["events"].setdefault("tool_start", start)
+            turn["events"]["tool_end"] = end
+
+    def llm(self, generation=None, **stats):
+        """Attaches one LLM call's counters (eval_count, eval_duration, ...) to the turn."""
+        with self._lock:
+            turn = self._turn
+            if turn is not None and (generation is None or generation == turn["turn"]):
+                turn["llm"].append(stats)
+
+    def events(self, generation=None):
+        """Copy of the current turn's events as perf_counter() times ({} if that turn is not current)."""
+        with self._lock:
+            turn = self._turn
+            if turn is None or (generation is not None and generation != turn["turn"]):
+                return {}
+            return dict(turn["events"])
+
+    def close(self):
+        """Writes out the current turn and waits for the writer thread to finish the file."""
+        with self._lock:
+            previous, self._turn = self._turn, None
+        self._submit(previous)
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout=5.0)
+
+    def _submit(self, turn):
+        if turn is None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="tracer", daemon=True)
+                self._writer.start()
+        self._queue.put(turn)
+
+    def _write_loop(self):
+        while True:
+            turn = self._queue.get()
+            if turn is None:
+                return
+            try:
+                self._write(turn)
+            except Exception as e:
+                print(f"Error writing trace: {e}")
+
+    def _write(self, turn):
+        start = turn.pop("start")
+        turn["events"] = {event: round((t - start) * 1000, 1) for event, t in sorted(turn["events"].items(), key=lambda item: item[1])}
+        for span in turn["spans"]:
+            span["start"] = round((span["start"] - start) * 1000, 1)
+            span["end"] = round((span["end"] - start) * 1000, 1)
+        events = turn["events"]
+        if "first_sample_played" in events:
+            first_token = f"first token {events['first_token']:.0f} ms, " if "first_token" in events else ""
+            origin = "end of speech" if "end_of_speech" in events else "input"
+            print(f"[turn {turn['turn']}: {first_token}first audio {events['first_sample_played']:.0f} ms after {origin}]")
+        if self.path:
+            line = json.dumps(turn) + "\n"
+            try:
+                if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+            except OSError:
+                pass  # no file yet
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def load(path=TRACE_FILE, backend=None):
+    with open(path, encoding="utf-8") as f:
+        turns = [json.loads(line) for line in f if line.strip()]
+    return [turn for turn in turns if not backend or turn.get("backend") == backend]
+
+
+def summarize(turns):
+    """
+    Returns {"turns", "stages": {name: {"n", "p50", "p95"}}, "tools": {...}, "decode_tokens_per_s"}
+    for a list of traced turns. Durations are in ms.
+    """
+    def distribution(values):
+        return {"n": len(values), "p50": _percentile(values, 50), "p95": _percentile(values, 95)}
+
+    stages = {}
+    for name, first, second in STAGES:
+        values = [turn["events"][second] - turn["events"][first] for turn in turns
+                  if first in turn["events"] and second in turn["events"]]
+        if values:
+            stages[name] = distribution(values)
+    tools = {}
+    for turn in turns:
+        for span in turn["spans"]:
+            tools.setdefault(span["name"], []).append(span["end"] - span["start"])
+    calls = [call for turn in turns for call in turn["llm"] if call.get("eval_count") and call.get("eval_duration")]
+    rates = [call["eval_count"] / (call["eval_duration"] / 1e9) for call in calls]
+    return {
+        "turns": len(turns),
+        "stages": stages,
+        "tools": {name: distribution(values) for name, values in sorted(tools.items())},
+        "decode_tokens_per_s": _percentile(rates, 50) if rates else None,
+    }
+
+
+def print_summary(summary):
+    print(f"{'stage':<24}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, stage in list(summary["stages"].items()) + list(summary["tools"].items()):
+        print(f"{name:<24}{stage['n']:>5}{stage['p50']:>10.0f}{stage['p95']:>10.0f}")
+    if summary["decode_tokens_per_s"]:
+        print(f"LLM decode: p50 {summary['decode_tokens_per_s']:.1f} tokens/s")
+
+
+def report(path=TRACE_FILE, backend=None):
+    """Prints p50/p95 per stage, tool durations and the LLM throughput for a trace file."""
+    turns = load(path, backend)
+    print(f"{len(turns)} turns from {path}")
+    print_summary(summarize(turns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m SPARC.tracing")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="print p50/p95 per stage")
+    report_parser.add_argument("path", nargs="?", default=TRACE_FILE)
+    report_parser.add_argument("--backend", default=None, help="only turns from this backend (local or online)")
+    args = parser.parse_args()
+    report(args.path, args.backend)
@@ -0,0 +1,38 @@
+import time
+
+
+class TurnController:
+    """
+    Hands out a generation ID per turn so barge-in can tell stale output from current output.
+
+    Every chunk that travels through the queues carries the generation it was produced for.
+    interrupt() moves to a new generation, so anything still in flight from the previous turn
+    is dropped on sight by whichever stage sees it next.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.speech_start = None  # perf_counter() of the speech that interrupted playback
+
+    def new_turn(self):
+        self.generation += 1
+        return self.generation
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def interrupt(self, speech_start=None):
+        self.generation += 1
+        if speech_start is not None:
+            self.speech_start = speech_start
+        return self.generation
+
+    def silenced(self, was_playing=True):
+        """Call once playback has actually stopped; reports how long that took after speech started."""
+        if self.speech_start is None:
+            return None
+        latency = time.perf_counter() - self.speech_start
+        self.speech_start = None
+        if was_playing:
+            print(f"Barge-in: {latency * 1000:.0f} ms from speech start to silence")
+        return latency
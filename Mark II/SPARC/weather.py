@@ -0,0 +1,127 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import quote_plus
+
+import aiohttp
+
+# wttr.in JSON API (what python-weather used); point it at a local stand-in for tests
+WEATHER_URL = os.getenv("SPARC_WEATHER_URL", "https://wttr.in")
+
+
+def normalize(location):
+    """'  London, UK ' and 'london,uk' are the same lookup."""
+    location = re.sub(r"\s*,\s*", ", ", location.strip().lower())
+    return re.sub(r"\s+", " ", location).strip(" .?!")
+
+
+class WeatherService:
+    """
+    Current conditions for a location, shared by the whole process.
+
+    One aiohttp session (keep-alive connection pool) is opened on the first lookup and reused
+    until close(), so only the first request pays DNS and the TLS handshake. Results are cached
+    per normalized location for `ttl` seconds; concurrent lookups of the same location share one
+    request, and a caller that is cancelled (barge-in) doesn't cancel it for the others.
+    Failed lookups raise and are not cached. Requests time out after `timeout` seconds.
+
+    The session belongs to the event loop that made it; call close() before that loop ends.
+    """
+
+    def __init__(self, base_url=WEATHER_URL, ttl=60.0, timeout=10.0, max_entries=64):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._session = None
+        self._cache = OrderedDict()  # normalized location -> (fetched_at, conditions)
+        self._inflight = {}  # normalized location -> task of the request in flight
+
+        self.lookups = 0
+        self.hits = 0
+        self.coalesced = 0  # lookups that joined a request already in flight
+        self.requests = 0
+        self.errors = 0
+        self.request_time = 0.0
+
+    def _client(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=120),
+                headers={"User-Agent": "SPARC"},
+            )
+        return self._session
+
+    async def get(self, location):
+        """Returns {"location", "current_temp_f", "precipitation", "description"} for `location`."""
+        key = normalize(location)
+        if not key:
+            raise ValueError("The location must not be empty.")
+        self.lookups += 1
+        entry = self._cache.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[0] < self.ttl:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1], location=location)
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, location))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.coalesced += 1
+        conditions = await asyncio.shield(task)
+        return dict(conditions, location=location)
+
+    def _done(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here too, in case every caller was cancelled before it failed
+
+    async def _fetch(self, key, location):
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            async with self._client().get(f"{self.base_url}/{quote_plus(location)}", params={"format": "j1"}) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)  # wttr.in answers with text/plain
+            current = data["current_condition"][0]
+            conditions = {
+                "location": location,
+                "current_temp_f": int(current["temp_F"]),
+                "precipitation": float(current["precipInches"]),
+                "description": current["weatherDesc"][0]["value"].strip(),
+            }
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.request_time += time.perf_counter() - start
+
+        self._cache[key] = (time.monotonic(), conditions)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return conditions
+
+    async def close(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self):
+        if not self.lookups:
+            return "no lookups yet"
+        average = f", {self.request_time / self.requests * 1000:.0f} ms per request" if self.requests else ""
+        return (f"{self.hits}/{self.lookups} lookups cached ({self.hits / self.lookups * 100:.0f}%), "
+                f"{self.coalesced} coalesced, {self.requests} requests{average}, {self.errors} failed")
+
+
+service = WeatherService()
@@ -4,7 +4,7 @@
 To install the dependencies for this script, run:
 
 ``` 
-pip install google-genai opencv-python pyaudio pillow mss
+pip install google-genai opencv-python pyaudio mss numpy
 ```
 
 Before running this script, ensure the `GOOGLE_API_KEY` environment
@@ -31,22 +31,25 @@ python Get_started_LiveAPI.py --mode screen
 """
 
 import asyncio
-import base64
-import io
 import os
 import sys
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-import cv2
 import pyaudio
-import PIL.Image
-import mss
 
 import argparse
 
 from google import genai
 from dotenv import load_dotenv # Added for API key loading
 
+from SPARC.WIDGETS import camera
+from SPARC.audio_input import AudioInput
+from SPARC.audio_output import AudioOutput
+from SPARC.frame_pipeline import FramePipeline
+from SPARC.screen_capture import ScreenCapture
+
 # --- Load Environment Variables ---
 load_dotenv()
 
@@ -76,14 +79,22 @@ pya = pyaudio.PyAudio()
 
 
 class AudioLoop:
-    def __init__(self, video_mode=DEFAULT_MODE):
+    def __init__(self, video_mode=DEFAULT_MODE, monitor=0, region=None):
         self.video_mode = video_mode
+        self.screen = ScreenCapture(monitor=monitor, region=region)
 
         self.audio_in_queue = None
-        self.out_queue = None
+        self.out_queue = None  # video frames
+        self.audio_out_queue = None  # microphone chunks, always sent before video
+        self.uplink_ready = None
+        self.audio_dropped = 0
 
         self.session = None
 
+        self.frame_pipeline = FramePipeline()
+        self.output = AudioOutput(pya, rate=RECEIVE_SAMPLE_RATE, channels=CHANNELS)
+        self.mic = AudioInput(pya, rate=SEND_SAMPLE_RATE, channels=CHANNELS, chunk=CHUNK_SIZE)
+
         self.send_text_task = None
         self.receive_audio_task = None
         self.play_audio_task = None
@@ -98,97 +109,86 @@ class AudioLoop:
                 break
             await self.session.send(input=text or ".", end_of_turn=True)
 
-    def _get_frame(self, cap):
-        # Read the frameq
-        ret, frame = cap.read()
-        # Check if the frame was read successfully
-        if not ret:
-            return None
-        # Fix: Convert BGR to RGB color space
-        # OpenCV captures in BGR but PIL expects RGB format
-        # This prevents the blue tint in the video feed
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = PIL.Image.fromarray(frame_rgb)  # Now using RGB frame
-        img.thumbnail([1024, 1024])
-
-        image_io = io.BytesIO()
-        img.save(image_io, format="jpeg")
-        image_io.seek(0)
-
-        mime_type = "image/jpeg"
-        image_bytes = image_io.read()
-        return {"mime_type": mime_type, "data": base64.b64encode(image_bytes).decode()}
-
     async def get_frames(self):
-        # This takes about a second, and will block the whole program
-        # causing the audio pipeline to overflow if you don't to_thread it.
-        cap = await asyncio.to_thread(
-            cv2.VideoCapture, 0
-        )  # 0 represents the default camera
+        # The shared camera service owns the device: it pays the ~1 s open cost on its own
+        # thread and keeps the latest frames in a ring buffer that the camera tool can read too.
+        camera.service.start()
+        seq = 0
+        frame = None  # reused buffer, each frame is copied out of the ring exactly once
 
         while True:
-            frame = await asyncio.to_thread(self._get_frame, cap)
-            if frame is None:
+            seq = await asyncio.to_thread(camera.service.wait_for_frame, seq, 5.0)
+            if seq is None:
+                print(f"Camera stopped: {camera.service.error}")
                 break
+            seq, frame = camera.service.read(frame)
+            # Unchanged frames come back as None and are not sent at all
+            msg = await asyncio.to_thread(self.frame_pipeline.process, frame)
 
-            await asyncio.sleep(1.0)
+            await asyncio.sleep(self.frame_pipeline.interval)
 
-            await self.out_queue.put(frame)
-
-        # Release the VideoCapture object
-        cap.release()
+            if msg is not None:
+                await self.out_queue.put(msg)
+                self.uplink_ready.set()
 
     def _get_screen(self):
-        sct = mss.mss()
-        monitor = sct.monitors[0]
-
-        i = sct.grab(monitor)
-
-        mime_type = "image/jpeg"
-        image_bytes = mss.tools.to_png(i.rgb, i.size)
-        img = PIL.Image.open(io.BytesIO(image_bytes))
-
-        image_io = io.BytesIO()
-        img.save(image_io, format="jpeg")
-        image_io.seek(0)
-
-        image_bytes = image_io.read()
-        return {"mime_type": mime_type, "data": base64.b64encode(image_bytes).decode()}
+        # Raw BGRA grab -> dirty-tile check -> downscaled JPEG, all from one buffer
+        frame = self.screen.grab()
+        dirty = self.screen.dirty_tiles(frame)
+        return self.frame_pipeline.process(frame, changed=dirty > 0)
 
     async def get_screen(self):
-
-        while True:
-            frame = await asyncio.to_thread(self._get_screen)
-            if frame is None:
-                break
-
-            await asyncio.sleep(1.0)
-
-            await self.out_queue.put(frame)
+        # mss handles belong to the thread that created them, so every grab runs on the same one
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen") as executor:
+            try:
+                while True:
+                    # Only screens that changed (or a periodic keyframe) come back as a message
+                    msg = await loop.run_in_executor(executor, self._get_screen)
+
+                    await asyncio.sleep(self.frame_pipeline.interval)
+
+                    if msg is not None:
+                        await self.out_queue.put(msg)
+                        self.uplink_ready.set()
+            finally:
+                executor.submit(self.screen.close)
 
     async def send_realtime(self):
         while True:
-            msg = await self.out_queue.get()
+            # Two lanes: queued audio always goes first, a video frame only when no audio is waiting
+            if not self.audio_out_queue.empty():
+                msg = self.audio_out_queue.get_nowait()
+            elif not self.out_queue.empty():
+                msg = self.out_queue.get_nowait()
+            else:
+                self.uplink_ready.clear()
+                await self.uplink_ready.wait()
+                continue
+            start = time.perf_counter()
             await self.session.send(input=msg)
+            if msg["mime_type"] == "image/jpeg":
+                # Lets the frame pipeline trade quality, size and rate for a slow uplink
+                self.frame_pipeline.report_send_latency(time.perf_counter() - start)
 
     async def listen_audio(self):
-        mic_info = pya.get_default_input_device_info()
-        self.audio_stream = await asyncio.to_thread(
-            pya.open,
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=SEND_SAMPLE_RATE,
-            input=True,
-            input_device_index=mic_info["index"],
-            frames_per_buffer=CHUNK_SIZE,
-        )
-        if __debug__:
-            kwargs = {"exception_on_overflow": False}
-        else:
-            kwargs = {}
-        while True:
-            data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
-            await self.out_queue.put({"data": data, "mime_type": "audio/pcm"})
+        # PortAudio's callback fills the mic ring; only chunks that pass the voice gate are streamed
+        await self.mic.start()
+        try:
+            while True:
+                data = await self.mic.read()
+                for chunk in self.mic.gate(data):
+                    msg = {"data": chunk, "mime_type": "audio/pcm"}
+                    try:
+                        self.audio_out_queue.put_nowait(msg)
+                    except asyncio.QueueFull:
+                        # Uplink is behind: drop the oldest chunk rather than fall further behind
+                        self.audio_out_queue.get_nowait()
+                        self.audio_out_queue.put_nowait(msg)
+                        self.audio_dropped += 1
+                    self.uplink_ready.set()
+        finally:
+            self.mic.close()
 
     async def receive_audio(self):
         "Background task to reads from the websocket and write pcm chunks to the output queue"
@@ -200,25 +200,27 @@ class AudioLoop:
                     continue
                 if text := response.text:
                     print(text, end="")
+                if response.server_content and response.server_content.interrupted:
+                    # The user talked over the model: drop everything not yet played.
+                    while not self.audio_in_queue.empty():
+                        self.audio_in_queue.get_nowait()
+                    self.output.flush()
 
-            # If you interrupt the model, it sends a turn_complete.
-            # For interruptions to work, we need to stop playback.
-            # So empty out the audio queue because it may have loaded
-            # much more audio than has played yet.
-            while not self.audio_in_queue.empty():
-                self.audio_in_queue.get_nowait()
+            # End of the turn: play out the tail even if it is shorter than the prebuffer
+            self.audio_in_queue.put_nowait(None)
 
     async def play_audio(self):
-        stream = await asyncio.to_thread(
-            pya.open,
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RECEIVE_SAMPLE_RATE,
-            output=True,
-        )
-        while True:
-            bytestream = await self.audio_in_queue.get()
-            await asyncio.to_thread(stream.write, bytestream)
+        # PortAudio pulls from the output ring on its own thread, so queueing a chunk is just a copy
+        await asyncio.to_thread(self.output.start)
+        try:
+            while True:
+                bytestream = await self.audio_in_queue.get()
+                if bytestream is None:
+                    self.output.end()
+                else:
+                    await self.output.play(bytestream)
+        finally:
+            self.output.close()
 
     async def run(self):
         try:
@@ -230,6 +232,8 @@ class AudioLoop:
 
                 self.audio_in_queue = asyncio.Queue()
                 self.out_queue = asyncio.Queue(maxsize=5)
+                self.audio_out_queue = asyncio.Queue(maxsize=32)
+                self.uplink_ready = asyncio.Event()
 
                 send_text_task = tg.create_task(self.send_text())
                 tg.create_task(self.send_realtime())
@@ -248,8 +252,13 @@ class AudioLoop:
         except asyncio.CancelledError:
             pass
         except ExceptionGroup as EG:
-            self.audio_stream.close()
+            self.mic.close()
             traceback.print_exception(EG)
+        finally:
+            print(f"Audio out: {self.output.stats()}")
+            print(f"Audio in: {self.mic.stats()}, {self.audio_dropped} dropped by the uplink")
+            if self.video_mode != "none":
+                print(f"Video uplink: {self.frame_pipeline.stats()}")
 
 
 if __name__ == "__main__":
@@ -261,6 +270,18 @@ if __name__ == "__main__":
         help="pixels to stream from",
         choices=["camera", "screen", "none"],
     )
+    parser.add_argument(
+        "--monitor",
+        type=int,
+        default=0,
+        help="monitor to share in screen mode, 0 is all monitors together",
+    )
+    parser.add_argument(
+        "--region",
+        type=lambda value: tuple(int(v) for v in value.split(",")),
+        default=None,
+        help="part of the monitor to share in screen mode, as left,top,width,height",
+    )
     args = parser.parse_args()
-    main = AudioLoop(video_mode=args.mode)
+    main = AudioLoop(video_mode=args.mode, monitor=args.monitor, region=args.region)
     asyncio.run(main.run())
@@ -0,0 +1,152 @@
+'''
+Checks SPARC.announcer: a timer alert that fires while an answer is streaming waits for the answer
+to finish and is then spoken as a turn of its own, in full.
+
+Both backends are also run against the stand-ins of test/e2e_latency_benchmark.py to check that
+the second identical announcement is played from the audio cache instead of being synthesized again.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/announcer_test.py
+'''
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import pyaudio
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.announcer import Announcer
+from SPARC.audio_cache import AudioCache
+from SPARC.text_chunker import TextChunker, chunked
+from SPARC.turns import TurnController
+
+ANSWER = "A PID controller measures the error, then corrects it with three terms. It is used everywhere. "
+ANNOUNCEMENT = "Sir, your 10 second timer is up."
+
+
+async def answer_with_alert():
+    """Streams ANSWER word by word as turn 1 and fires the alert halfway. Returns what the TTS would get."""
+    turns = TurnController()
+    queue = asyncio.Queue()
+    answering = True
+    announcer = Announcer(turns, queue, idle=lambda: not answering and queue.empty(), poll=0.01)
+    announcer.start()
+    spoken = []
+
+    async def tts():
+        async for generation, chunk, reason in chunked(queue, TextChunker(max_wait=0.05)):
+            if chunk is not None and turns.is_current(generation):
+                spoken.append((generation, chunk))
+
+    reader = asyncio.create_task(tts())
+    generation = turns.new_turn()
+    words = ANSWER.split(" ")
+    for i, word in enumerate(words):
+        if i == len(words) // 2:
+            announcer.say(ANNOUNCEMENT)  # timer thread
+        await queue.put((generation, word + " "))
+        await asyncio.sleep(0.01)
+    await queue.put((generation, None))
+    answering = False
+    await asyncio.sleep(0.3)
+    reader.cancel()
+    await announcer.close()
+    return spoken, announcer
+
+
+def test_alert_waits_for_the_answer():
+    spoken, announcer = asyncio.run(answer_with_alert())
+    answer = " ".join(chunk for generation, chunk in spoken if generation == 1)
+    alert = [chunk for generation, chunk in spoken if generation == 2]
+    assert answer == ANSWER.strip(), spoken  # not cut, nothing spliced in
+    assert alert == [ANNOUNCEMENT], spoken  # whole, in one chunk, on its own generation
+    assert [generation for generation, _ in spoken] == sorted(generation for generation, _ in spoken), spoken
+    assert announcer.spoken == 1
+
+
+async def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def announce_twice(sparc):
+    """Announces the same alert twice, each time once the backend is idle. Returns the audio cache."""
+    await wait_until(lambda: sparc.loop is not None)
+    cache = sparc.audio_cache
+    sparc.announce(ANNOUNCEMENT)
+    await wait_until(lambda: cache.stores == 1 and sparc.idle())
+    sparc.announce(ANNOUNCEMENT)
+    await wait_until(lambda: cache.hits == 1 and sparc.idle())
+    return cache
+
+
+async def announce_twice_local():
+    from SPARC import SPARC_Local
+    from e2e_latency_benchmark import NullPyAudio, NullTTSStream
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        stream = NullTTSStream(latency=0.02, chars_per_second=15.0, speed=10.0)
+        engine = SimpleNamespace(get_stream_info=lambda: (pyaudio.paInt16, 1, 24000))
+        components = {"stt": lambda: None, "pyaudio": NullPyAudio, "tts": lambda: (engine, stream),
+                      "llm": lambda: None, "telemetry": lambda: None}
+        sparc = await asyncio.to_thread(SPARC_Local.SPARC, components=components, audio_cache=AudioCache(cache_dir))
+        stream.on_audio_stream_stop = sparc.on_audio_stream_stop
+        sparc.tracer.path = None
+        tasks = [asyncio.create_task(sparc.send_prompt()), asyncio.create_task(sparc.tts())]
+        try:
+            return await announce_twice(sparc)
+        finally:
+            await sparc.input_queue.put(None)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sparc.tools.shutdown()
+
+
+async def announce_twice_online():
+    from SPARC import SPARC_Online
+    from e2e_latency_benchmark import NullPyAudio, ScriptedLiveClient, elevenlabs_echo
+
+    client = ScriptedLiveClient(first_token_ms=50, token_ms=5, seed=0)
+    async with websockets.serve(elevenlabs_echo(20, 0, 150.0, 0), "127.0.0.1", 0) as server:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            uri = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            components = {"stt": lambda: None, "pyaudio": NullPyAudio}
+            sparc = await asyncio.to_thread(SPARC_Online.SPARC, elevenlabs_uri=uri, client=client,
+                                            components=components, audio_cache=AudioCache(cache_dir))
+            sparc.tracer.path = None
+            tasks = [asyncio.create_task(sparc.send_prompt()), asyncio.create_task(sparc.tts()),
+                     asyncio.create_task(sparc.play_audio())]
+            try:
+                return await announce_twice(sparc)
+            finally:
+                await sparc.input_queue.put("exit")
+                await asyncio.sleep(0.05)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_second_announcement_is_cached_local():
+    cache = asyncio.run(announce_twice_local())
+    assert (cache.stores, cache.hits) == (1, 1), cache.stats()
+
+
+def test_second_announcement_is_cached_online():
+    cache = asyncio.run(announce_twice_online())
+    assert (cache.stores, cache.hits) == (1, 1), cache.stats()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,65 @@
+'''
+Checks SPARC.conversation_context.ConversationContext with a stand-in for ollama.AsyncClient that
+counts summary requests: a short conversation never asks for a summary, and a long one folds
+rarely, in batches, so the summary after the system prompt (and the cached prefix) rarely changes.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/conversation_context_test.py
+'''
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.conversation_context import ConversationContext, estimate_tokens
+
+
+class SummaryClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def chat(self, model, messages, options=None, keep_alive=None):
+        self.calls += 1
+        return {"message": {"content": f"Summary {self.calls}."}}
+
+
+async def converse(turns, words_per_message):
+    """Adds `turns` turns of about `words_per_message` words each. Returns the client, context and history sizes."""
+    client = SummaryClient()
+    context = ConversationContext(client, "gemma3", token_budget=1536, keep_turns=4)
+    sizes = []
+    for i in range(turns):
+        text = " ".join(["word"] * words_per_message)
+        context.add_turn({"role": "user", "content": f"Question {i}: {text}"},
+                         {"role": "assistant", "content": f"Answer {i}: {text}"})
+        if context.summary_task is not None:
+            await context.summary_task  # the fold runs between turns
+        sizes.append(context.history_tokens())
+    return client, context, sizes
+
+
+def test_short_conversation_never_summarizes():
+    client, context, _ = asyncio.run(converse(30, 6))
+    assert client.calls == 0 and context.summary == "" and len(context.turns) == 30
+
+
+def test_long_conversation_folds_in_batches():
+    client, context, sizes = asyncio.run(converse(100, 20))
+    turn_tokens = 2 * estimate_tokens("Question 10: " + " ".join(["word"] * 20))
+    assert 0 < client.calls <= 100 // ((1536 - 768) // turn_tokens), (client.calls, turn_tokens)
+    assert max(sizes) <= 1536 + turn_tokens, max(sizes)
+    assert context.summary == f"Summary {client.calls}."
+
+
+def test_turns_over_budget_fold_past_keep_turns():
+    client, context, sizes = asyncio.run(converse(6, 400))
+    assert client.calls > 0 and len(context.turns) < 4, (client.calls, len(context.turns))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,606 @@
+'''
+Offline end-to-end latency benchmark for SPARC_Local and SPARC_Online.
+
+Runs the real pipelines (send_prompt, tool calls, text chunking, tts, play_audio, tracing) against
+deterministic local stand-ins instead of live services:
+
+- a stub Ollama HTTP server that streams scripted replies (SPARC_Local)
+- a scripted Gemini Live session (SPARC_Online)
+- an ElevenLabs stream-input WebSocket echo server that answers every text message with silent PCM
+- a null PyAudio whose output streams drive the callback in real time and discard the audio,
+  and a null RealtimeTTS stream for SPARC_Local
+
+The response cache and the audio cache are off, so every turn goes through the LLM and the TTS
+and p50/p95 time full turns only; a repeated phrase would otherwise be served from a cache and
+pull the percentiles down. --caches turns both on (exact response cache, empty audio cache in a
+temporary folder) to time a session the way a user hears it, cached turns included.
+
+Latency, jitter and token rate of the stand-ins are configurable and seeded, so two runs of the
+same commit give the same numbers within scheduling noise. Every turn is traced by SPARC.tracing;
+the summary (p50/p95 per stage, turns per minute, decode tokens/s) can be saved with --out and
+compared against an earlier run with --compare.
+
+Turns come from a JSONL file, one object per line (the built-in TURNS are used otherwise):
+
+    {"text": "What's the weather in London?", "reply": "...",
+     "tool": {"code": "system.info()", "name": "get_weather", "args": {"location": "London"},
+              "result": {"temp": 64}, "latency_ms": 150},
+     "follow_up": "..."}
+
+"tool" is optional: SPARC_Local runs "code" through its tool registry, SPARC_Online gets a Live API
+tool call for "name"/"args" answered by a fake tool that returns "result" after "latency_ms".
+A turn can use "wav": "path.wav" (16 kHz mono) instead of "text"; it is fed through RealtimeSTT
+with use_microphone=False, so that needs the Whisper model given by --stt-model.
+
+Run from the Mark II folder:
+
+    python test/e2e_latency_benchmark.py --backend both --repeat 3 --out before.json
+    python test/e2e_latency_benchmark.py --backend both --repeat 3 --compare before.json
+'''
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC import tracing
+from SPARC.audio_cache import AudioCache
+
+TURNS = [
+    {"text": "Good morning, how are you today?",
+     "reply": "Good morning, Sir. I'm running splendidly, thank you for asking. What shall we build today?"},
+    {"text": "How busy is my computer right now?",
+     "reply": "Let me check the system for you.",
+     "tool": {"code": "system.info()", "name": "get_weather", "args": {"location": "London, UK"},
+              "result": {"temperature": 64, "description": "Cloudy"}, "latency_ms": 150},
+     "follow_up": "Everything looks calm, Sir. The processor is mostly idle and there's plenty of memory to spare."},
+    {"text": "Explain what a PID controller does in one or two sentences.",
+     "reply": "A PID controller measures the error between where a system is and where you want it, "
+              "then corrects it using three terms: proportional for the present error, integral for the "
+              "accumulated past, and derivative for where the error is heading."},
+    {"text": "Thanks, that's all.",
+     "reply": "My pleasure, Sir. Give me a shout whenever you need me."},
+]
+
+
+def tokenize(text, rng):
+    """Splits text into 1-6 character fragments, like a streamed LLM reply."""
+    tokens, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        tokens.append(text[i:i + size])
+        i += size
+    return tokens
+
+
+# --- Null audio: PortAudio stand-in that runs stream callbacks in real time and discards the output ---
+
+class NullStream:
+    def __init__(self, rate, channels, frames_per_buffer, stream_callback, output, latency):
+        self.rate = rate
+        self.channels = channels
+        self.frames = frames_per_buffer or 1024
+        self.callback = stream_callback
+        self.output = output
+        self.latency = latency
+        self._running = False
+        self._thread = None
+
+    def start_stream(self):
+        if self.callback is not None and self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="null-audio", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        period = self.frames / self.rate
+        silence = bytes(self.frames * self.channels * 2)
+        next_time = time.perf_counter()
+        while self._running:
+            now = time.perf_counter()
+            time_info = {"current_time": now, "output_buffer_dac_time": now + self.latency, "input_buffer_adc_time": now}
+            self.callback(None if self.output else silence, self.frames, time_info, 0)
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def write(self, data):
+        time.sleep(len(data) / (self.rate * self.channels * 2))
+
+    def is_active(self):
+        return self._running
+
+    def stop_stream(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def close(self):
+        self.stop_stream()
+
+
+class NullPyAudio:
+    latency = 0.02  # pretend device latency reported to the callback
+
+    def open(self, format=None, channels=1, rate=24000, input=False, output=False, frames_per_buffer=None,
+             stream_callback=None, input_device_index=None, **kwargs):
+        stream = NullStream(rate, channels, frames_per_buffer, stream_callback, output, self.latency)
+        if stream_callback is not None:
+            stream.start_stream()
+        return stream
+
+    def get_default_input_device_info(self):
+        return {"index": 0, "name": "null"}
+
+    def terminate(self):
+        pass
+
+
+class NullTTSStream:
+    """RealtimeTTS TextToAudioStream stand-in: 'synthesizes' after a delay and 'plays' for as long as the text would take."""
+
+    def __init__(self, latency, chars_per_second, speed, on_audio_stream_start=None, on_audio_stream_stop=None):
+        self.latency = latency
+        self.chars_per_second = chars_per_second
+        self.speed = speed  # >1 plays faster than real time
+        self.on_audio_stream_start = on_audio_stream_start
+        self.on_audio_stream_stop = on_audio_stream_stop
+        self._text = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def feed(self, text):
+        with self._lock:
+            self._text.append(text)
+        return self
+
+    def play_async(self, on_audio_chunk=None, **kwargs):
+        if not self.is_playing():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._play, args=(on_audio_chunk,), name="null-tts", daemon=True)
+            self._thread.start()
+
+    def _play(self, on_audio_chunk):
+        if self._stop.wait(self.latency):
+            return
+        started = False
+        while not self._stop.is_set():
+            with self._lock:
+                text = "".join(self._text)
+                self._text.clear()
+            if not text:
+                break
+            if on_audio_chunk is not None:
+                on_audio_chunk(bytes(480))
+            if not started:
+                started = True
+                if self.on_audio_stream_start is not None:
+                    self.on_audio_stream_start()
+            self._stop.wait(len(text) / self.chars_per_second / self.speed)
+        if started and self.on_audio_stream_stop is not None:
+            self.on_audio_stream_stop()
+
+    def is_playing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            self._text.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+# --- Stub Ollama: /api/chat streaming NDJSON with scripted replies ---
+
+class OllamaStub:
+    def __init__(self, first_token_ms, token_ms, seed):
+        self.first_token = first_token_ms / 1000
+        self.token = token_ms / 1000
+        self.rng = random.Random(seed)
+        self.turn = {"reply": "Hello, Sir."}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.handle(self, body)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="ollama-stub", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+    def reply_for(self, body):
+        messages = body.get("messages") or []
+        last = messages[-1]["content"] if messages else ""
+        options = body.get("options") or {}
+        if options.get("num_predict") == 1:
+            return "Hello"  # warm-up request
+        if not body.get("stream", True):
+            return "The user and SPARC chatted about the day."  # ConversationContext summary
+        tool = self.turn.get("tool")
+        if last.startswith("```tool_output"):
+            return self.turn.get("follow_up", "Done, Sir.")
+        if tool and tool.get("code"):
+            return f"```tool_code\n{tool['code']}\n```"
+        return self.turn.get("reply", "Certainly, Sir.")
+
+    def handle(self, request, body):
+        if request.path != "/api/chat":
+            request.send_response(404)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        reply = self.reply_for(body)
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages") or []) // 4
+        model = body.get("model", "stub")
+        start = time.perf_counter()
+        time.sleep(self.first_token)
+        prompt_done = time.perf_counter()
+
+        def done_chunk(eval_count):
+            end = time.perf_counter()
+            return {
+                "model": model, "created_at": "2024-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": "" if body.get("stream", True) else reply},
+                "done": True, "done_reason": "stop",
+                "total_duration": int((end - start) * 1e9), "load_duration": 0,
+                "prompt_eval_count": prompt_tokens, "prompt_eval_duration": int((prompt_done - start) * 1e9),
+                "eval_count": eval_count, "eval_duration": int((end - prompt_done) * 1e9),
+            }
+
+        if not body.get("stream", True):
+            payload = json.dumps(done_chunk(len(reply) // 4)).encode()
+            request.send_response(200)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("Content-Length", str(len(payload)))
+            request.end_headers()
+            request.wfile.write(payload)
+            return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "application/x-ndjson")
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+
+        def send(obj):
+            data = (json.dumps(obj) + "\n").encode()
+            request.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            request.wfile.flush()
+
+        tokens = tokenize(reply, self.rng)
+        try:
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(self.token * self.rng.uniform(0.5, 1.5))
+                send({"model": model, "created_at": "2024-01-01T00:00:00Z",
+                      "message": {"role": "assistant", "content": token}, "done": False})
+            send(done_chunk(len(tokens)))
+            request.wfile.write(b"0\r\n\r\n")
+            request.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # SPARC closed the stream early (tool call or barge-in)
+
+
+# --- Scripted Gemini Live session ---
+
+class ScriptedSession:
+    def __init__(self, client):
+        self.client = client
+        self._inputs = asyncio.Queue()
+        self.context = []  # turns sent as context only (routed and cached exchanges), never answered
+
+    async def send(self, input=None, end_of_turn=False):
+        if isinstance(input, list) and not end_of_turn:
+            self.context.extend(input)
+            return
+        await self._inputs.put(input)
+
+    async def receive(self):
+        message = await self._inputs.get()
+        turn = self.client.turn
+        rng = self.client.rng
+        await asyncio.sleep(self.client.first_token)
+        tool = turn.get("tool")
+        if tool and tool.get("name"):
+            call = SimpleNamespace(id="call-1", name=tool["name"], args=tool.get("args", {}))
+            yield self.client.response(tool_call=SimpleNamespace(function_calls=[call]))
+            await self._inputs.get()  # the FunctionResponse
+            await asyncio.sleep(self.client.first_token)
+            reply = turn.get("follow_up", "Done, Sir.")
+        else:
+            reply = turn.get("reply", "Certainly, Sir.")
+        tokens = tokenize(reply, rng)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.client.token * rng.uniform(0.5, 1.5))
+            yield self.client.response(text=token)
+        usage = SimpleNamespace(prompt_token_count=len(str(message)) // 4, response_token_count=len(tokens),
+                                total_token_count=len(str(message)) // 4 + len(tokens))
+        yield self.client.response(server_content=SimpleNamespace(turn_complete=True, model_turn=None), usage_metadata=usage)
+
+
+class ScriptedLiveClient:
+    """Stands in for genai.Client: client.aio.live.connect(model=..., config=...) yields a ScriptedSession."""
+
+    def __init__(self, first_token_ms, token_ms, seed):
+        self.first_token = first_token_ms / 1000
+        self.token = token_ms / 1000
+        self.rng = random.Random(seed)
+        self.turn = {}
+        self.session = None  # the last session opened
+        self.aio = SimpleNamespace(live=SimpleNamespace(connect=self.connect))
+
+    def connect(self, model=None, config=None):
+        client = self
+
+        class Connection:
+            async def __aenter__(self):
+                client.session = ScriptedSession(client)
+                return client.session
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Connection()
+
+    @staticmethod
+    def response(tool_call=None, text=None, server_content=None, usage_metadata=None):
+        return SimpleNamespace(tool_call=tool_call, text=text, server_content=server_content,
+                               usage_metadata=usage_metadata, data=None)
+
+
+# --- ElevenLabs stream-input echo server ---
+
+def elevenlabs_echo(latency_ms, jitter_ms, chars_per_second, seed):
+    rng = random.Random(seed)
+    bytes_per_char = int(24000 * 2 / chars_per_second)
+
+    async def handler(websocket):
+        async for message in websocket:
+            text = json.loads(message).get("text")
+            if text == "":
+                await websocket.send(json.dumps({"isFinal": True}))
+                break
+            if not text.strip():
+                continue  # initial message with the voice settings
+            await asyncio.sleep(max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000)
+            pcm = bytes(len(text) * bytes_per_char)
+            for start in range(0, len(pcm), 4800):  # 100 ms chunks
+                await websocket.send(json.dumps({"audio": base64.b64encode(pcm[start:start + 4800]).decode()}))
+    return handler
+
+
+# --- Runners ---
+
+def wav_feeder(recorder, path):
+    """Feeds a 16 kHz mono WAV into RealtimeSTT in real time, followed by a second of silence."""
+    def run():
+        with wave.open(path, "rb") as f:
+            if f.getframerate() != 16000 or f.getnchannels() != 1:
+                raise ValueError(f"{path}: expected 16 kHz mono")
+            frames = f.readframes(f.getnframes())
+        frames += bytes(32000)
+        for start in range(0, len(frames), 1024):
+            recorder.feed_audio(frames[start:start + 1024], original_sample_rate=16000)
+            time.sleep(512 / 16000)
+    threading.Thread(target=run, name="wav-feeder", daemon=True).start()
+
+
+async def play_turns(sparc, turns, fakes, args, finished):
+    """Sends each turn like input_message/stt would and waits until its answer has finished playing."""
+    durations = []
+    for turn in turns:
+        for fake in fakes:
+            fake.turn = turn
+        start = time.perf_counter()
+        generation = sparc.turns.generation
+        if turn.get("wav"):
+            wav_feeder(sparc.recorder, turn["wav"])
+        else:
+            sparc.tracer.mark_next("typed")
+            await sparc.input_queue.put(turn["text"])
+        deadline = start + args.turn_timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+            if sparc.turns.generation != generation and finished() and "first_sample_played" in sparc.tracer.events():
+                break
+        else:
+            print(f"Turn timed out: {turn.get('text') or turn.get('wav')}")
+        durations.append(time.perf_counter() - start)
+        await asyncio.sleep(args.gap)
+    return durations
+
+
+def caches(args, cache_dir):
+    """(response_cache, audio_cache) for a run: both off unless --caches."""
+    if args.caches:
+        return "exact", AudioCache(cache_dir)
+    return "off", AudioCache(cache_dir, max_chars=0)  # no phrase is short enough to cache
+
+
+async def run_local(turns, args, trace_path):
+    from SPARC import SPARC_Local
+
+    with OllamaStub(args.first_token_ms, args.token_ms, args.seed) as stub, tempfile.TemporaryDirectory() as cache_dir:
+        tts_stream = NullTTSStream(args.tts_latency_ms / 1000, args.chars_per_second, args.speed)
+        components = {"pyaudio": NullPyAudio, "tts": lambda: (None, tts_stream), "telemetry": lambda: None}
+        stt_options = {"use_microphone": False, "model": args.stt_model}
+        if not any(turn.get("wav") for turn in turns):
+            components["stt"] = lambda: None
+        response_cache, audio_cache = caches(args, cache_dir)
+        sparc = await asyncio.to_thread(SPARC_Local.SPARC, ollama_host=stub.url, components=components, stt_options=stt_options,
+                                        response_cache=response_cache, audio_cache=audio_cache)
+        tts_stream.on_audio_stream_start = sparc.on_audio_stream_start
+        tts_stream.on_audio_stream_stop = sparc.on_audio_stream_stop
+        sparc.tracer.path = trace_path
+        tasks = [asyncio.create_task(sparc.send_prompt()), asyncio.create_task(sparc.tts())]
+        if sparc.recorder is not None:
+            tasks.append(asyncio.create_task(sparc.stt()))
+
+        def finished():
+            task = sparc.generation_task
+            return task is not None and task.done() and sparc.response_queue.empty() and not tts_stream.is_playing()
+
+        try:
+            await asyncio.sleep(0.1)  # let send_prompt pick up the loop
+            return await play_turns(sparc, turns, [stub], args, finished)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sparc.tracer.close()
+            sparc.tools.shutdown()
+
+
+async def run_online(turns, args, trace_path):
+    from SPARC import SPARC_Online
+
+    client = ScriptedLiveClient(args.first_token_ms, args.token_ms, args.seed)
+    handler = elevenlabs_echo(args.tts_latency_ms, args.tts_jitter_ms, args.chars_per_second * args.speed, args.seed)
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        cache_dir = tempfile.TemporaryDirectory()
+        uri = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        components = {"pyaudio": NullPyAudio}
+        stt_options = {"use_microphone": False, "model": args.stt_model}
+        if not any(turn.get("wav") for turn in turns):
+            components["stt"] = lambda: None
+        response_cache, audio_cache = caches(args, cache_dir.name)
+        sparc = await asyncio.to_thread(SPARC_Online.SPARC, elevenlabs_uri=uri, client=client,
+                                        components=components, stt_options=stt_options,
+                                        response_cache=response_cache, audio_cache=audio_cache)
+        sparc.tracer.path = trace_path
+
+        async def fake_tool(**kwargs):
+            tool = client.turn.get("tool") or {}
+            await asyncio.sleep(tool.get("latency_ms", 0) / 1000)
+            return tool.get("result", {})
+        sparc.available_functions = {name: fake_tool for name in sparc.available_functions}
+
+        tasks = [asyncio.create_task(sparc.send_prompt()), asyncio.create_task(sparc.tts()),
+                 asyncio.create_task(sparc.play_audio())]
+        if sparc.recorder is not None:
+            tasks.append(asyncio.create_task(sparc.stt()))
+
+        def finished():
+            return (sparc.input_queue.empty() and sparc.response_queue.empty() and sparc.audio_queue.empty()
+                    and sparc.tts_generation is None and sparc.output.buffered == 0)
+
+        try:
+            await asyncio.sleep(0.1)
+            return await play_turns(sparc, turns, [client], args, finished)
+        finally:
+            await sparc.input_queue.put("exit")
+            await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sparc.tracer.close()
+            cache_dir.cleanup()
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline):
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    print(f"{'backend / stage':<32}{'p50 ms':>10}{'delta':>9}{'p95 ms':>10}{'delta':>9}")
+    for backend, summary in results["backends"].items():
+        before = baseline.get("backends", {}).get(backend)
+        if not before:
+            continue
+        for name, stage in summary["stages"].items():
+            old = before["stages"].get(name)
+            if old:
+                print(f"{backend + ' / ' + name:<32}{stage['p50']:>10.0f}{stage['p50'] - old['p50']:>+9.0f}"
+                      f"{stage['p95']:>10.0f}{stage['p95'] - old['p95']:>+9.0f}")
+        print(f"{backend + ' / turns per minute':<32}{summary['turns_per_minute']:>10.1f}"
+              f"{summary['turns_per_minute'] - before['turns_per_minute']:>+9.1f}")
+
+
+async def main(args):
+    turns = TURNS
+    if args.turns:
+        with open(args.turns, encoding="utf-8") as f:
+            turns = [json.loads(line) for line in f if line.strip()]
+    turns = turns * args.repeat
+    runners = {"local": run_local, "online": run_online}
+    backends = ["local", "online"] if args.backend == "both" else [args.backend]
+
+    results = {"commit": commit(), "settings": vars(args), "backends": {}}
+    for backend in backends:
+        trace_path = f"{args.trace_prefix}_{backend}.jsonl"
+        if os.path.exists(trace_path):
+            os.remove(trace_path)
+        print(f"\n=== {backend}: {len(turns)} turns, caches {'on' if args.caches else 'off'} ===")
+        durations = await runners[backend](turns, args, trace_path)
+        summary = tracing.summarize(tracing.load(trace_path))
+        summary["turns_per_minute"] = 60 * len(durations) / sum(durations) if durations else 0.0
+        results["backends"][backend] = summary
+        print(f"\n{backend}: {summary['turns']} turns traced, {summary['turns_per_minute']:.1f} turns per minute")
+        tracing.print_summary(summary)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["local", "online", "both"], default="both")
+    parser.add_argument("--turns", default=None, help="JSONL file of turns (default: the built-in script)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--first-token-ms", type=float, default=150.0, help="stand-in LLM time to first token")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="stand-in LLM time per token")
+    parser.add_argument("--tts-latency-ms", type=float, default=120.0, help="stand-in TTS time to first audio")
+    parser.add_argument("--tts-jitter-ms", type=float, default=30.0)
+    parser.add_argument("--chars-per-second", type=float, default=15.0, help="speaking rate of the synthetic audio")
+    parser.add_argument("--speed", type=float, default=4.0, help="play the synthetic audio this much faster than real time")
+    parser.add_argument("--stt-model", default="tiny.en", help="Whisper model for wav turns")
+    parser.add_argument("--gap", type=float, default=0.2, help="seconds between turns")
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--caches", action="store_true", help="use the response and audio caches (cached turns count in p50/p95)")
+    parser.add_argument("--trace-prefix", default="e2e_trace")
+    parser.add_argument("--out", default=None, help="save the summary as JSON")
+    parser.add_argument("--compare", default=None, help="JSON saved by an earlier --out run")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+'''
+Checks SPARC.elevenlabs_ws against a local stand-in for the ElevenLabs stream-input WebSocket.
+
+The stand-in answers every text message with a short chunk of silent PCM and closes the stream
+after EOS, like the real server. The script prints how long each turn waited for a connection
+(cold connect vs. hot spare) and the backoff delays while the server is unreachable.
+
+Run from the Mark II folder:
+
+    python test/elevenlabs_ws_test.py --turns 5 --handshake-ms 150
+'''
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.elevenlabs_ws import ElevenLabsStreams
+
+SILENCE = base64.b64encode(bytes(2400)).decode()  # 50 ms of 24 kHz 16-bit mono
+
+
+def stand_in(handshake_ms):
+    async def handler(websocket):
+        await asyncio.sleep(handshake_ms / 1000)  # stands in for TLS + auth on the real server
+        async for message in websocket:
+            text = json.loads(message).get("text")
+            if text == "":
+                await websocket.send(json.dumps({"isFinal": True}))
+                break
+            if text.strip():
+                await websocket.send(json.dumps({"audio": SILENCE}))
+    return handler
+
+
+async def speak(websocket, text):
+    """One turn: send text + EOS, return the time to the first audio chunk."""
+    start = time.perf_counter()
+    await websocket.send(json.dumps({"text": text + " "}))
+    await websocket.send(json.dumps({"text": ""}))
+    first = None
+    async for message in websocket:
+        data = json.loads(message)
+        if data.get("audio") and first is None:
+            first = time.perf_counter() - start
+        if data.get("isFinal"):
+            break
+    await websocket.close()
+    return first
+
+
+async def main(turns, handshake_ms, gap):
+    async with websockets.serve(stand_in(handshake_ms), "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        streams = ElevenLabsStreams(f"ws://127.0.0.1:{port}", "test-key")
+        for turn in range(turns):
+            start = time.perf_counter()
+            websocket = await streams.acquire()
+            waited = time.perf_counter() - start
+            first_audio = await speak(websocket, f"Turn {turn}.")
+            print(f"turn {turn}: waited {waited * 1000:6.1f} ms for a stream, first audio after {first_audio * 1000:5.1f} ms")
+            await asyncio.sleep(gap)  # the user talks, the spare connects meanwhile
+        await streams.close()
+        print(streams.stats())
+
+    # Nothing listens on the port any more: connects fail and back off with jitter
+    streams = ElevenLabsStreams(f"ws://127.0.0.1:{port}", "test-key", backoff_base=0.05, backoff_max=0.4)
+    try:
+        await asyncio.wait_for(streams.acquire(), timeout=2.0)
+    except asyncio.TimeoutError:
+        pass
+    await streams.close()
+    print(streams.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--handshake-ms", type=float, default=150.0)
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds between turns")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.handshake_ms, args.gap))
@@ -1,153 +1,283 @@
-import ollama
-import re 
-import time
+'''
+Function-call accuracy and speed benchmark for the local (Ollama) backend.
+
+Sends every prompt below with the same system prompt, sampling options and message layout as
+SPARC_Local, and checks the reply: a prompt that should call a tool must answer with a
+```tool_code``` block naming that tool, in a form SPARC's ToolRegistry accepts; any other prompt
+must not call a tool at all. Prompts run on a bounded pool of concurrent requests, and several
+models (or quantizations of one model) can be compared in one run.
+
+Responses are cached on disk, keyed by model, options, system prompt and prompt, so re-scoring
+after a change to the test cases costs nothing; pass --no-cache to measure latency again.
+Latency percentiles only cover the prompts sent to the model in this run (the cached count is
+printed next to them), and speed is only compared with a baseline when neither run used the cache.
+Results go to a JSON file that can be stored as a baseline and diffed against later runs.
+
+Run from the Mark II folder:
+
+    python test/function_call_accuracy_test.py --models gemma3:4b-it-q4_K_M gemma3:4b-it-q8_0 --workers 4
+    python test/function_call_accuracy_test.py --save-baseline function_call_baseline.json
+    python test/function_call_accuracy_test.py --baseline function_call_baseline.json
+'''
+
+import argparse
+import asyncio
+import hashlib
 import json
+import os
+import re
+import sys
+import time
 
-response_array = []
-success_count = 0
-failure_count = 0
-
-# extract the tool call from the response
-def extract_tool_call(text, function_name):
-    import io
-    from contextlib import redirect_stdout
-
-    pattern = r"```tool_code\s*(.*?)\s*```"
-    match = re.search(pattern, text, re.DOTALL)
-    if match:
-        code = match.group(1).strip()
-        if function_name is None:
-            return False # No function name expected, but code was found
-        if function_name in code:
-            return True
-        else:
-            return False
-    else:
-        return None
+from ollama import AsyncClient
 
-system_instructions = """
-    Your name is ADA (Advanced Design Assistant) you are a helpful AI assistant.  You are an expert in All STEM Fields providing concise and accurate information. When asked to perform a task, respond with the code to perform that task wrapped in ```tool_code```.  If the task does not require a function call, provide a direct answer without using ```tool_code```.  Always respond in a helpful and informative manner."
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# SPARC.prompts is what SPARC_Local sends; importing SPARC_Local itself would load the STT/TTS stack
+from SPARC.prompts import SYSTEM_PROMPT, TOOL_INSTRUCTIONS, MODEL, MODEL_PARAMS
+from SPARC.tool_executor import ToolRegistry
 
-    You speak with a british accent and address people as Sir.
-"""
+TOOL_CODE = re.compile(r"```tool_code\s*(.*?)\s*```", re.DOTALL)  # same pattern as SPARC_Local.extract_tool_call
 
-instruction_prompt_with_function_calling = '''At each turn, if you decide to invoke any of the function(s), it should be wrapped with ```tool_code```. If you decide to call a function the response should only have the function wrapped in tool code nothing more. The python methods described below are imported and available, you can only use defined methods also only call methods when you are sure they need to be called. The generated code should be readable and efficient. The response to a method will be wrapped in ```tool_output``` use it generate a helpful, friendly response. For example if the tool output says ```tool_output camera on```. You should say something like "The Camera is on".
+# (prompt, should call a tool, expected tool)
+prompts_and_expectations = [
+    ("Hello, how are you?", False, None),
+    ("set 10 second timer", True, "timer.set"),
+    ("Difference between DC and AC", False, None),
+    ("Show me System Info", True, "system.info"),
+    ("Briefly explain gravity", False, None),
+    ("can you open the camera", True, "camera.open"),
+    ("Give me a short explanation of the internet", False, None),
+    ("set me a timer for 1 minute", True, "timer.set"),
+    ("What is the chemical symbol for water?", False, None),
+    ("open the camera", True, "camera.open"),
+    ("What is a synonym for happy?", False, None),
+    ("set me 33 second timer", True, "timer.set"),
+    ("What is the largest planet in our solar system?", False, None),
+    ("open camera", True, "camera.open"),
+    ("How many continents are there?", False, None),
+    ("Start a 10 hour timer", True, "timer.set"),
+    ("What is the opposite of up?", False, None),
+    ("Turn on the Camera", True, "camera.open"),
+    ("What is the speed of light in a vacuum?", False, None),
+    ("Timer for 10 minutes and 10 seconds", True, "timer.set"),
+    ("Who painted the Mona Lisa?", False, None),
+    ("Start the Camera", True, "camera.open"),
+    ("Thank you very much.", False, None),
+    ("Create new web shooter project", True, "project.create_folder"),
+    ("Please and thank you.", False, None),
+    ("Give me system info", True, "system.info"),
+    ("No, thank you.", False, None),
+    ("Create new project called Iron Man", True, "project.create_folder"),
+    ("Where do Lions live", False, None),
+    ("Show me GPU information", True, "system.info"),
+    ("What ocean is larger the atlantic or pacific", False, None),
+    ("Make a new project folder name robot arm", True, "project.create_folder"),
+    ("What is the largest country in the world", False, None),
+    ("How much RAM am I using", True, "system.info"),
+    ("Briefly explain AI", False, None),
+    ("Start a new project called robot car", True, "project.create_folder"),
+    ("Give me CPU Info", True, "system.info"),
+    ("What is a brushless motor?", False, None),
+    ("Make me a new project folder called AI assistant", True, "project.create_folder"),
+    ("Goodnight!", False, None),
+]
 
-For regular prompts do not call any functions or wrap the response in ```tool_code```.
 
-The following Python methods are available:
+def tool_registry():
+    """A registry holding every tool the live prompt advertises, so parse() accepts exactly what SPARC_Local would."""
+    registry = ToolRegistry(max_workers=1)
+    for name in re.findall(r"def ([\w.]+)\(", TOOL_INSTRUCTIONS):
+        registry.register(name, None)
+    return registry
 
-```python
-def camera.open() -> None:
-    """Open the camera"""
 
-def system.info() -> None:
-    """ Gathers and prints system information including CPU, RAM, and GPU details. """
+def evaluate(registry, text, should_call_function, function_name):
+    """Returns (passed, reason)."""
+    match = TOOL_CODE.search(text)
+    if not match:
+        return (False, "no tool call") if should_call_function else (True, "answered")
+    if not should_call_function:
+        return False, f"unexpected tool call: {match.group(1)}"
+    try:
+        name, _, _ = registry.parse(match.group(1))
+    except ValueError as e:
+        return False, f"rejected by ToolRegistry: {e}"
+    if name != function_name:
+        return False, f"called {name}"
+    return True, "called"
 
-def timer.set(time_str):
-    """
-    Counts down from a specified time in HH:MM:SS format.
 
-    Args:
-        time_str (str): The time to count down from in HH:MM:SS format.
-    """
-def project.create_folder(folder_name):
-    """
-    Creates a project folder and a text file to store chat history.
+def cache_key(model, options, prompt):
+    key = json.dumps({"model": model, "options": options, "system": SYSTEM_PROMPT, "prompt": prompt}, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
-    Args:
-        folder_name (str): The name of the project folder to create.
-    """
 
-```
+def load_json(path, default):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return default
 
-User: {user_message}
-'''
 
-def test(prompt, should_call_function, function_name):
-    global success_count
-    global failure_count
-    messages = [{"role": "system", "content": system_instructions}, {"role": "user", "content": instruction_prompt_with_function_calling.format(user_message=prompt)}]
-    response = ollama.chat(model="gemma3:4b-it-q4_K_M", messages=messages)
-    #print(response['message']['content'])
-    returned_value = extract_tool_call(response['message']['content'], function_name)
-
-    if should_call_function == False:
-        if returned_value == None:
-            result = "Passed"
-        else:
-            result = "Failed"
-    else:
-        if returned_value == True:
-            result = "Passed"
+def save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+
+
+async def ask(client, model, options, keep_alive, prompt):
+    """Streams one reply like SPARC_Local.stream_chat and returns its text, timings and token counts."""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+    start = time.perf_counter()
+    first_token = None
+    parts = []
+    final = {}
+    async for chunk in await client.chat(model=model, messages=messages, stream=True, options=options, keep_alive=keep_alive):
+        content = chunk["message"]["content"]
+        if content and first_token is None:
+            first_token = time.perf_counter()
+        parts.append(content)
+        if chunk.get("done"):
+            final = chunk
+    end = time.perf_counter()
+    eval_count = final.get("eval_count") or 0
+    eval_duration = final.get("eval_duration") or 0
+    return {
+        "response": "".join(parts),
+        "latency_ms": round((end - start) * 1000, 1),
+        "first_token_ms": round(((first_token or end) - start) * 1000, 1),
+        "prompt_tokens": final.get("prompt_eval_count") or 0,
+        "eval_tokens": eval_count,
+        "tokens_per_s": round(eval_count / (eval_duration / 1e9), 1) if eval_duration else None,
+    }
+
+
+async def run_model(client, model, options, keep_alive, workers, cache, use_cache, registry):
+    semaphore = asyncio.Semaphore(workers)
+
+    async def one(prompt, should_call_function, function_name):
+        key = cache_key(model, options, prompt)
+        cached = use_cache and key in cache
+        if cached:
+            reply = cache[key]
         else:
-            result = "Failed"
-    print(result)
-    if result == "Passed":
-        success_count += 1
-    else:
-        failure_count += 1
-    
-    data = (prompt, result, response['message']['content'])
-    response_array.append(data)   
+            async with semaphore:
+                reply = await ask(client, model, options, keep_alive, prompt)
+            cache[key] = reply
+        passed, reason = evaluate(registry, reply["response"], should_call_function, function_name)
+        print(f"{'Passed' if passed else 'Failed'}  {model}  {prompt!r}  ({reason}, {reply['latency_ms']:.0f} ms{', cached' if cached else ''})")
+        return {"prompt": prompt, "expected": function_name, "passed": passed, "reason": reason, "cached": cached, **reply}
 
-prompts_and_expectations = [
-    ("Hello, how are you?", False, None),  # Should NOT call a function
-    ("set 10 second timer", True, "timer.set"),  # Should call timer.set()
-    ("Difference between DC and AC", False, None),  # Should NOT call a function
-    ("Show me System Info", True, "system.info"),  # Should call system.info()
-    ("Briefly explain gravity", False, None),  # Should NOT call a function
-    ("can you open the camera", True, "camera.open"),  # Should call camera.open()
-    ("Give me a short explanation of the internet", False, None),  # Should NOT call a function
-    ("set me a timer for 1 minute", True, "timer.set"),  # Should call timer.set()
-    ("What is the chemical symbol for water?", False, None),  # Should NOT call a function
-    ("open the camera", True, "camera.open"),  # Should call camera.open()
-    ("What is a synonym for happy?", False, None),  # Should NOT call a function
-    ("set me 33 second timer", True, "timer.set"),  # Should call timer.set()
-    ("What is the largest planet in our solar system?", False, None),  # Should NOT call a function
-    ("open camera", True, "camera.open"),  # Should call camera.open()
-    ("How many continents are there?", False, None),  # Should NOT call a function
-    ("Start a 10 hour timer", True, "timer.set"),  # Should call timer.set()
-    ("What is the opposite of up?", False, None),  # Should NOT call a function
-    ("Turn on the Camera", True, "camera.open"),  # Should call camera.open()
-    ("What is the speed of light in a vacuum?", False, None),  # Should NOT call a function
-    ("Timer for 10 minutes and 10 seconds", True, "timer.set"),  # Should call timer.set()
-    ("Who painted the Mona Lisa?", False, None),  # Should NOT call a function
-    ("Start the Camera", True, "camera.open"),  # Should call camera.open()
-    ("Thank you very much.", False, None),  # Should NOT call a function
-    ("Create new web shooter project", True, "project.create_folder"),  # Should call project.create_folder()
-    ("Please and thank you.", False, None),  # Should NOT call a function
-    ("Give me system info", True, "system.info"),  # Should call system.info()
-    ("No, thank you.", False, None),  # Should NOT call a function
-    ("Create new project called Iron Man", True, "project.create_folder"),  # Should call project.create_folder()
-    ("Where do Lions live", False, None),  # Should NOT call a function
-    ("Show me GPU information", True, "system.info"),  # Should call system.info()
-    ("What ocean is larger the atlantic or pacific", False, None), #Should NOT call a function
-    ("Make a new project folder name robot arm", True, "project.create_folder"), #Should call project.create_folder()
-    ("What is the largest country in the world", False, None), #Should NOT call a function
-    ("How much RAM am I using", True, "system.info"), #Should call system.info()
-    ("Briefly explain AI", False, None), #Should NOT call a function
-    ("Start a new project called robot car", True, "project.create_folder"), #Should call project.create_folder()
-    ("Give me CPU Info", True, "system.info"), #Should call system.info()
-    ("What is a brushless motor?", False, None), #Should NOT call a function
-    ("Make me a new project folder called AI assistant", True, "project.create_folder"), #Should call project.create_folder()
-    ("Goodnight!", False, None), #Should NOT call a function
-]
-start_time = time.time()
+    start = time.perf_counter()
+    cases = await asyncio.gather(*(one(*case) for case in prompts_and_expectations))
+    return {"wall_s": round(time.perf_counter() - start, 2), "summary": summarize(cases), "cases": cases}
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else None
+
+
+def summarize(cases):
+    # Speed only from requests made in this run: a cached reply carries the latency of the run that stored it
+    measured = [case for case in cases if not case["cached"]]
+
+    def distribution(field):
+        values = [case[field] for case in measured if case.get(field) is not None]
+        return {"p50": _percentile(values, 50), "p95": _percentile(values, 95)}
+
+    passed = sum(case["passed"] for case in cases)
+    return {
+        "passed": passed,
+        "total": len(cases),
+        "accuracy": round(passed / len(cases) * 100, 1),
+        "missed_calls": sum(1 for case in cases if case["expected"] and case["reason"] == "no tool call"),
+        "unexpected_calls": sum(1 for case in cases if not case["expected"] and not case["passed"]),
+        "latency_ms": distribution("latency_ms"),
+        "first_token_ms": distribution("first_token_ms"),
+        "tokens_per_s": distribution("tokens_per_s"),
+        "prompt_tokens": round(sum(case["prompt_tokens"] for case in cases) / len(cases)),
+        "eval_tokens": round(sum(case["eval_tokens"] for case in cases) / len(cases)),
+        "cached": sum(case["cached"] for case in cases),
+    }
+
+
+def _ms(value, width, digits=0):
+    return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+
+def print_summary(results):
+    """Latency columns only cover the cases sent to the model in this run, `cached` counts the others."""
+    print(f"\n{'model':<28}{'accuracy':>10}{'missed':>8}{'extra':>7}{'cached':>8}{'p50 ms':>9}{'p95 ms':>9}{'TTFT p50':>10}{'tok/s':>8}{'wall s':>8}")
+    for model, result in results["models"].items():
+        s = result["summary"]
+        print(f"{model:<28}{s['accuracy']:>9.1f}%{s['missed_calls']:>8}{s['unexpected_calls']:>7}"
+              f"{s['cached']:>5}/{s['total']:<2}{_ms(s['latency_ms']['p50'], 9)}{_ms(s['latency_ms']['p95'], 9)}"
+              f"{_ms(s['first_token_ms']['p50'], 10)}{_ms(s['tokens_per_s']['p50'], 8, 1)}{result['wall_s']:>8.1f}")
+
+
+def compare(results, baseline):
+    """Prints accuracy and latency changes against a stored baseline, and the prompts that changed outcome."""
+    print(f"\nAgainst baseline from {baseline.get('time', 'unknown')}:")
+    for model, result in results["models"].items():
+        before = baseline["models"].get(model)
+        if before is None:
+            print(f"  {model}: not in baseline")
+            continue
+        s, b = result["summary"], before["summary"]
+        accuracy = f"accuracy {b['accuracy']:.1f}% -> {s['accuracy']:.1f}% ({s['accuracy'] - b['accuracy']:+.1f})"
+        if s["cached"] or b.get("cached"):
+            # Cached replies are old measurements: only runs that asked the model every time compare on speed
+            print(f"  {model}: {accuracy}, speed not compared ({s['cached']}/{s['total']} cached now, "
+                  f"{b.get('cached', 0)}/{b['total']} in the baseline; use --no-cache)")
+        else:
+            print(f"  {model}: {accuracy}, "
+                  f"p50 {b['latency_ms']['p50']:.0f} -> {s['latency_ms']['p50']:.0f} ms ({s['latency_ms']['p50'] - b['latency_ms']['p50']:+.0f}), "
+                  f"TTFT p50 {b['first_token_ms']['p50']:.0f} -> {s['first_token_ms']['p50']:.0f} ms ({s['first_token_ms']['p50'] - b['first_token_ms']['p50']:+.0f})")
+        previous = {case["prompt"]: case for case in before["cases"]}
+        for case in result["cases"]:
+            old = previous.get(case["prompt"])
+            if old is not None and old["passed"] != case["passed"]:
+                change = "now passes" if case["passed"] else f"now fails ({case['reason']})"
+                print(f"    {case['prompt']!r} {change}")
+    missing = sorted(set(baseline["models"]) - set(results["models"]))
+    if missing:
+        print(f"  not run this time: {', '.join(missing)}")
 
-for prompt, should_call_function, function_name in prompts_and_expectations:
-    test(prompt, should_call_function, function_name)
 
-end_time = time.time()
-execution_time = end_time - start_time
+async def main(args):
+    options = dict(MODEL_PARAMS)
+    cache = {} if args.no_cache else load_json(args.cache, {})
+    registry = tool_registry()
+    client = AsyncClient(host=args.host)
+    results = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "options": options, "workers": args.workers, "models": {}}
+    try:
+        # One model at a time so they don't evict each other from memory mid-run
+        for model in args.models:
+            results["models"][model] = await run_model(client, model, options, args.keep_alive, args.workers, cache, not args.no_cache, registry)
+    finally:
+        registry.shutdown()
+        if not args.no_cache:
+            save_json(args.cache, cache)
 
-print(f"Execution time: {execution_time} seconds")
-print(f"Success rate: {success_count / (success_count + failure_count) * 100}%")
+    print_summary(results)
+    save_json(args.out, results)
+    print(f"\nResults written to '{args.out}'")
+    if args.baseline:
+        compare(results, load_json(args.baseline, {"models": {}}))
+    if args.save_baseline:
+        save_json(args.save_baseline, results)
+        print(f"Baseline saved to '{args.save_baseline}'")
 
-log_filename = "response_log.json"
-with open(log_filename, "w") as f:
-    json.dump(
-        [{"prompt": item[0], "result": item[1], "model_response": item[2]} for item in response_array], f, indent=4
-    )
 
-print(f"\nLog file '{log_filename}' created successfully.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=[MODEL], help="Ollama models/quantizations to compare")
+    parser.add_argument("--workers", type=int, default=4, help="requests in flight at once (Ollama serves OLLAMA_NUM_PARALLEL of them)")
+    parser.add_argument("--host", default=None, help="Ollama host, default OLLAMA_HOST or localhost")
+    parser.add_argument("--keep-alive", default="30m")
+    parser.add_argument("--cache", default="function_call_cache.json")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update the response cache")
+    parser.add_argument("--out", default="response_log.json")
+    parser.add_argument("--baseline", default=None, help="results file to diff against")
+    parser.add_argument("--save-baseline", default=None, help="also store this run as a baseline")
+    asyncio.run(main(parser.parse_args()))
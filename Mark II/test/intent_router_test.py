@@ -0,0 +1,118 @@
+'''
+Checks SPARC.intent_router: commands it answers locally, and commands that only look like them
+(cancelled, negated, in another place, without a name) falling through to the LLM.
+
+SPARC_Online is also run against the stand-ins of test/e2e_latency_benchmark.py to check that a
+routed exchange is added to the Gemini session as context.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/intent_router_test.py
+'''
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.intent_router import IntentRouter
+
+ROUTED = {
+    "set a timer for ten minutes": "timer.set('00:10:00')",
+    "start a 5 minute timer": "timer.set('00:05:00')",
+    "timer for 2 hours": "timer.set('02:00:00')",
+    "open the camera": "camera.open()",
+    "turn off the camera": "camera.close()",
+    "give me system info": "system.info()",
+    "list my timers": "timer.list()",
+    "create new project called iron man": "project.create_folder('iron man')",
+    "make a new project folder name robot arm": "project.create_folder('robot arm')",
+    "start a new project called robot car": "project.create_folder('robot car')",
+    "create new web shooter project": "project.create_folder('web shooter')",
+    "make me a new project folder called ai assistant": "project.create_folder('ai assistant')",
+    "create a project named drone": "project.create_folder('drone')",
+    "can you open the camera": "camera.open()",
+    "turn the camera on": "camera.open()",
+    "camera on please": "camera.open()",
+}
+FALL_THROUGH = [
+    "cancel the 10 minute timer",
+    "delete my 5 minute timer",
+    "stop the timer",
+    "remove the timer",
+    "don't set a timer for 10 minutes",
+    "do not set a timer",
+    "what time is it in tokyo",
+    "what time is it in london",
+    "what is the date in sydney",
+    "create a project",
+    "create a new project folder",
+    "start a new project called",
+    "make a new project",
+    "how does a 555 timer work",
+    "what is the time complexity of quicksort",
+    "what's the date of the moon landing",
+    "what is the date of easter this year",
+    "what day is it tomorrow",
+    "current time zone",
+    "what time is it there",
+    "is the camera on",
+    "can you check if the camera on my laptop works",
+    "add 5 minutes to the timer",
+    "extend the timer by 5 minutes",
+    "pause the timer",
+    "create a project called ../../etc",
+    "create new project called robot/arm",
+]
+
+router = IntentRouter()
+
+
+def test_commands_are_routed():
+    for text, code in ROUTED.items():
+        route = router.match(text)
+        assert route is not None and route["code"] == code, (text, route)
+
+
+def test_time_and_date_are_answered():
+    for text in ["what time is it", "what time is it now?", "what's the time"]:
+        assert router.match(text)["reply"].startswith("It is "), (text, router.match(text))
+    for text in ["what is the date today", "what day is it?", "what's the date"]:
+        assert router.match(text)["reply"].startswith("Today is "), (text, router.match(text))
+
+
+def test_lookalikes_fall_through():
+    for text in FALL_THROUGH:
+        assert router.match(text) is None, (text, router.match(text))
+
+
+async def route_online(text):
+    from SPARC import SPARC_Online
+    from e2e_latency_benchmark import NullPyAudio, ScriptedLiveClient
+
+    client = ScriptedLiveClient(first_token_ms=50, token_ms=5, seed=0)
+    sparc = await asyncio.to_thread(SPARC_Online.SPARC, client=client,
+                                    components={"stt": lambda: None, "pyaudio": NullPyAudio})
+    sparc.tracer.path = None
+    await sparc.input_queue.put(text)
+    await sparc.input_queue.put("exit")
+    await sparc.send_prompt()
+    replies = []
+    while not sparc.response_queue.empty():
+        replies.append(sparc.response_queue.get_nowait()[1])
+    return client.session, replies
+
+
+def test_online_routed_exchange_is_session_context():
+    session, replies = asyncio.run(route_online("what time is it"))
+    assert replies[0].startswith("It is ") and replies[-1] is None, replies
+    assert [(turn.role, turn.parts[0].text) for turn in session.context] == \
+        [("user", "what time is it"), ("model", replies[0])], session.context
+    assert session._inputs.empty()  # nothing for Gemini to answer
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,145 @@
+'''
+Checks SPARC.maps against a local stand-in for the Google Maps Directions API.
+
+The stand-in answers /maps/api/directions/json after a configurable delay, with a duration that
+depends on the mode, and counts requests and TCP connections. The script compares a new
+googlemaps.Client per request (what get_travel_duration used to do) with the shared route
+service: connection reuse, cached routes, coalesced duplicates, mode-only follow-ups
+("and by walking?"), the timeout, and "no route" answers.
+
+Run from the Mark II folder:
+
+    python test/maps_route_test.py --requests 5 --delay-ms 80
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import googlemaps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.maps import RouteService, describe
+
+KEY = "AIza-test-key"  # googlemaps checks the prefix
+MINUTES = {"driving": 25, "walking": 95, "bicycling": 35, "transit": 40}
+
+
+class StandIn:
+    def __init__(self, delay_ms):
+        self.delay_ms = delay_ms
+        self.requests = 0
+        self.connections = set()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stand_in.requests += 1
+                stand_in.connections.add(self.client_address)
+                time.sleep(stand_in.delay_ms / 1000)  # stands in for the API's own latency
+                query = parse_qs(urlparse(self.path).query)
+                mode = query.get("mode", ["driving"])[0]
+                if query["destination"][0].lower() == "atlantis":
+                    body = {"status": "ZERO_RESULTS", "routes": []}
+                else:
+                    leg = {"duration": {"text": f"{MINUTES[mode]} mins"}, "distance": {"text": "9.8 mi"},
+                           "start_address": query["origin"][0], "end_address": query["destination"][0]}
+                    if mode == "driving":
+                        leg["duration_in_traffic"] = {"text": f"{MINUTES[mode] + 6} mins"}
+                    body = {"status": "OK", "routes": [{"legs": [leg]}]}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def main(requests, delay_ms):
+    stand_in = StandIn(delay_ms)
+
+    # Before: a new client (and connection) for every request
+    def new_client_per_request():
+        client = googlemaps.Client(key=KEY, base_url=stand_in.url)
+        return client.directions("Home", "Office", mode="driving", departure_time=datetime.now())
+
+    total = 0.0
+    for _ in range(requests):
+        _, ms = await timed(asyncio.to_thread(new_client_per_request))
+        total += ms
+    print(f"new client per request: {total / requests:5.1f} ms per request, "
+          f"{stand_in.requests} requests, {len(stand_in.connections)} connections")
+
+    # After: one service, so one client and cached routes
+    stand_in.requests, stand_in.connections = 0, set()
+    service = RouteService(KEY, base_url=stand_in.url, timeout=2.0)
+    (route, origin, destination, mode), ms = await timed(service.get("Home", "Office", "driving"))
+    print(f"first request: {ms:5.1f} ms -> {describe(route, origin, destination, mode)}")
+    total = 0.0
+    for _ in range(requests):
+        _, ms = await timed(service.get(" home", "office. ", "Drive"))
+        total += ms
+    print(f"repeated requests: {total / requests * 1000:5.1f} us per request, {stand_in.requests} request so far")
+    assert stand_in.requests == 1
+
+    # "And by walking?": only the mode, the trip comes from the previous request
+    (route, origin, destination, mode), ms = await timed(service.get(mode="walking"))
+    print(f"follow-up: {ms:5.1f} ms -> {describe(route, origin, destination, mode)}")
+    (route, origin, destination, mode), ms = await timed(service.get(mode="by car"))
+    print(f"back to driving: {ms * 1000:5.1f} us -> {describe(route, origin, destination, mode)}")
+    assert stand_in.requests == 2
+
+    # Concurrent duplicates share one request
+    results = await asyncio.gather(*(service.get("Home", "Gym", "bicycling") for _ in range(requests)))
+    print(f"{requests} concurrent requests: {stand_in.requests - 2} request, all equal: {all(r == results[0] for r in results)}")
+    assert stand_in.requests == 3
+
+    # No route is an answer too, and it is cached
+    for _ in range(2):
+        route, origin, destination, mode = await service.get("Home", "Atlantis", "transit")
+        print(describe(route, origin, destination, mode))
+    assert stand_in.requests == 4
+
+    # A slow API: the caller gives up after the timeout, the late answer still lands in the cache
+    stand_in.delay_ms, service.timeout = 300, 0.1
+    try:
+        await service.get("Office", "Home", "transit")
+    except asyncio.TimeoutError:
+        print(f"timed out after {service.timeout:.1f} s")
+    await asyncio.sleep(0.4)
+    route, *_ = await service.get("Office", "Home", "transit")
+    print(f"late answer cached: {route['duration']}, {stand_in.requests} requests over {len(stand_in.connections)} connection(s)")
+    assert stand_in.requests == 5
+
+    print(service.stats())
+    stand_in.server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--delay-ms", type=float, default=80.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.delay_ms))
@@ -0,0 +1,116 @@
+'''
+Measures Ollama prompt-eval time per turn for the old and the cache-friendly prompt layouts.
+
+legacy: the tool catalogue is formatted into every user message, after the history,
+        so the server has to re-evaluate most of the prompt each turn.
+prefix: system prompt + tool catalogue sent once as the first message, then the history
+        (the layout SPARC_Local uses), so the cached prefix is reused.
+
+Both layouts build the history the way SPARC_Local does: through ConversationContext, with the
+same model, options, token budget and kept turns. Once the history is over the budget, old turns
+are folded into a summary right after the system prompt; the turn after a fold is marked, since
+it has to re-evaluate the prompt from the summary on, and the slope is also given without those turns.
+
+Run from the Mark II folder with Ollama running:
+
+    python test/prompt_cache_benchmark.py --turns 24
+'''
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import ollama
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.conversation_context import ConversationContext
+from SPARC.prompts import MODEL, MODEL_PARAMS, SYSTEM_BEHAVIOR, SYSTEM_PROMPT, TOOL_INSTRUCTIONS
+
+PROMPTS = [
+    "Briefly explain gravity",
+    "What is the speed of light in a vacuum?",
+    "Difference between DC and AC",
+    "What is a brushless motor?",
+    "How does a PID controller work?",
+    "What is the chemical symbol for water?",
+    "Give me a short explanation of the internet",
+    "What is Ohm's law?",
+    "Explain torque in one sentence",
+    "What is a transistor?",
+    "Briefly explain AI",
+    "What is the largest planet in our solar system?",
+]
+
+
+def legacy_messages(context, prompt):
+    return context.messages(SYSTEM_BEHAVIOR, {"role": "user", "content": f"{TOOL_INSTRUCTIONS}\n\nUser: {prompt}"})
+
+
+def prefix_messages(context, prompt):
+    return context.messages(SYSTEM_PROMPT, {"role": "user", "content": prompt})
+
+
+async def run(client, model, layout, turns, keep_alive, token_budget, keep_turns):
+    build = legacy_messages if layout == "legacy" else prefix_messages
+    # Same settings as SPARC_Local; summaries run in the background between turns, as they do there
+    context = ConversationContext(client, model, token_budget=token_budget, keep_turns=keep_turns, keep_alive=keep_alive)
+    rows = []
+    folds = context.folds
+    for i in range(turns):
+        prompt = PROMPTS[i % len(PROMPTS)]
+        messages = build(context, prompt)
+        start = time.perf_counter()
+        response = await client.chat(model=model, messages=messages, options=MODEL_PARAMS, keep_alive=keep_alive)
+        wall = time.perf_counter() - start
+        rows.append({
+            "turn": i + 1,
+            "prompt_eval_count": response.get('prompt_eval_count') or 0,
+            "prompt_eval_ms": (response.get('prompt_eval_duration') or 0) / 1e6,
+            "wall_ms": wall * 1000,
+            "folded": context.folds != folds,  # the summary was rewritten since the previous turn
+        })
+        folds = context.folds
+        context.add_turn({"role": "user", "content": prompt}, {"role": "assistant", "content": response['message']['content']})
+    if context.summary_task is not None:
+        await asyncio.gather(context.summary_task, return_exceptions=True)
+    return rows
+
+
+def slope(rows):
+    """Least-squares slope of prompt-eval ms per turn."""
+    n = len(rows)
+    xs = [r["turn"] for r in rows]
+    ys = [r["prompt_eval_ms"] for r in rows]
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    den = sum((x - mean_x) ** 2 for x in xs) or 1
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / den
+
+
+async def main(args):
+    client = ollama.AsyncClient()
+    await client.generate(model=args.model, prompt="", keep_alive=args.keep_alive)  # load the model before timing
+
+    layouts = ["legacy", "prefix"] if args.layout == "both" else [args.layout]
+    for layout in layouts:
+        rows = await run(client, args.model, layout, args.turns, args.keep_alive, args.token_budget, args.keep_turns)
+        print(f"\n{layout} layout")
+        print(f"{'turn':>4} {'evaluated':>10} {'eval ms':>9} {'wall ms':>9}")
+        for r in rows:
+            folded = "  after a summary fold" if r["folded"] else ""
+            print(f"{r['turn']:>4} {r['prompt_eval_count']:>10} {r['prompt_eval_ms']:>9.1f} {r['wall_ms']:>9.1f}{folded}")
+        steady = [r for r in rows if not r["folded"]]
+        print(f"prompt-eval slope: {slope(rows):+.1f} ms/turn, {slope(steady):+.1f} ms/turn without the turns after a fold "
+              f"({len(rows) - len(steady)} folds)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--turns", type=int, default=2 * len(PROMPTS))
+    parser.add_argument("--keep-alive", default="30m")
+    parser.add_argument("--token-budget", type=int, default=1536, help="history token budget (SPARC_Local uses 1536)")
+    parser.add_argument("--keep-turns", type=int, default=4, help="turns always kept verbatim (SPARC_Local uses 4)")
+    parser.add_argument("--layout", choices=["legacy", "prefix", "both"], default="both")
+    asyncio.run(main(parser.parse_args()))
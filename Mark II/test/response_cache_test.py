@@ -0,0 +1,49 @@
+'''
+Checks that SPARC_Online adds an answer served from the response cache to the Gemini session as
+context, so a follow-up ("and why is that?") refers to an exchange the model has seen. Runs against
+the stand-ins of test/e2e_latency_benchmark.py.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/response_cache_test.py
+'''
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUESTION = "Explain what a PID controller does in one or two sentences."
+REPLY = "A PID controller corrects the error between where a system is and where you want it."
+
+
+async def ask_online(questions):
+    from SPARC import SPARC_Online
+    from e2e_latency_benchmark import NullPyAudio, ScriptedLiveClient
+
+    client = ScriptedLiveClient(first_token_ms=10, token_ms=1, seed=0)
+    client.turn = {"reply": REPLY}
+    sparc = await asyncio.to_thread(SPARC_Online.SPARC, client=client, response_cache="exact",
+                                    components={"stt": lambda: None, "pyaudio": NullPyAudio})
+    sparc.tracer.path = None
+    for question in questions:
+        await sparc.input_queue.put(question)
+    await sparc.input_queue.put("exit")
+    await sparc.send_prompt()
+    return client.session, sparc.cache
+
+
+def test_online_cache_hit_is_session_context():
+    session, cache = asyncio.run(ask_online([QUESTION, QUESTION]))
+    assert cache.hits == 1, cache.stats()
+    assert [(turn.role, turn.parts[0].text) for turn in session.context] == \
+        [("user", QUESTION), ("model", REPLY)], session.context
+    assert session._inputs.empty()  # asked once, answered once
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
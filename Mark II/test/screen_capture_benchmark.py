@@ -0,0 +1,84 @@
+'''
+Milliseconds per frame for the old and new screen capture paths of multimodal_live_api.py.
+
+old: new mss.mss() per frame -> grab -> PNG -> PIL decode -> full-size JPEG -> base64
+new: persistent ScreenCapture -> raw BGRA -> dirty-tile check -> downscaled JPEG -> base64
+
+Run from the Mark II folder:
+
+    python test/screen_capture_benchmark.py --frames 30
+    python test/screen_capture_benchmark.py --synthetic 3840x2160   # no display needed, skips the grab
+'''
+
+import argparse
+import base64
+import io
+import os
+import statistics
+import sys
+import time
+
+import mss
+import mss.tools
+import numpy as np
+import PIL.Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.frame_pipeline import FramePipeline
+from SPARC.screen_capture import ScreenCapture
+
+
+def old_path(monitor, synthetic=None):
+    if synthetic is None:
+        sct = mss.mss()
+        shot = sct.grab(sct.monitors[monitor])
+        rgb, size = shot.rgb, shot.size
+    else:
+        rgb, size = synthetic[:, :, 2::-1].tobytes(), (synthetic.shape[1], synthetic.shape[0])
+    image_bytes = mss.tools.to_png(rgb, size)
+    img = PIL.Image.open(io.BytesIO(image_bytes))
+    image_io = io.BytesIO()
+    img.save(image_io, format="jpeg")
+    return base64.b64encode(image_io.getvalue()).decode()
+
+
+def new_path(capture, pipeline, synthetic=None):
+    frame = capture.grab() if synthetic is None else synthetic
+    capture.dirty_tiles(frame)
+    jpeg = pipeline.encode(frame)
+    return base64.b64encode(jpeg).decode()
+
+
+def measure(label, step, frames):
+    step()  # warm-up
+    times = []
+    size = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        size = len(step())
+        times.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<4} median {statistics.median(times):7.1f} ms/frame   p95 {sorted(times)[int(len(times) * 0.95) - 1]:7.1f} ms   {size / 1024:6.0f} KiB base64")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--monitor", type=int, default=0)
+    parser.add_argument("--synthetic", default=None, help="benchmark a generated WxH frame instead of grabbing the screen")
+    args = parser.parse_args()
+
+    synthetic = None
+    if args.synthetic:
+        width, height = (int(v) for v in args.synthetic.split("x"))
+        # A gradient with some noise compresses roughly like a real desktop
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        gray = ((x + y) / 2).astype(np.uint8)
+        synthetic = np.dstack([gray, gray[::-1], gray[:, ::-1], np.full_like(gray, 255)])
+        synthetic[::7, ::5] = 0
+
+    capture = ScreenCapture(monitor=args.monitor)
+    pipeline = FramePipeline()
+    measure("old", lambda: old_path(args.monitor, synthetic), args.frames)
+    measure("new", lambda: new_path(capture, pipeline, synthetic), args.frames)
+    capture.close()
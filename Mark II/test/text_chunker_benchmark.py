@@ -0,0 +1,76 @@
+'''
+Replays a simulated token stream through SPARC.text_chunker and compares it with sending every
+fragment straight to the TTS (what both backends did before).
+
+For each strategy it prints the number of TTS sends, how many of them cut a word in half, how
+many end on a sentence or clause boundary (a proxy for prosody), and the delay from the first
+token to the first send (the chunker's share of time-to-first-audio).
+
+Run from the Mark II folder:
+
+    python test/text_chunker_benchmark.py --token-ms 25 --stall-ms 600
+'''
+
+import argparse
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.text_chunker import TextChunker
+
+ANSWER = (
+    "Certainly, Sir. The forecast for London shows light rain this morning, clearing by noon; "
+    "temperatures will reach about 17 degrees, with a gentle breeze from the west. "
+    "Your drive to the office should take roughly 25 minutes, although traffic on the A40 is building. "
+    "Shall I set a timer for your departure, or would you prefer a reminder in half an hour?"
+)
+
+
+def tokens(text, token_ms, stall_ms, seed):
+    """Yields (time, fragment) like an LLM stream: 1-6 characters per token, one stall mid-answer."""
+    rng = random.Random(seed)
+    now, i = 0.0, 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        now += token_ms / 1000 * rng.uniform(0.5, 1.5)
+        if i < len(text) // 2 <= i + size:
+            now += stall_ms / 1000
+        yield now, text[i:i + size]
+        i += size
+
+
+def score(sends, start):
+    words = set(ANSWER.split())
+    split = sum(1 for _, text in sends if text.split() and text.split()[-1] not in words)
+    boundary = sum(1 for _, text in sends if re.search(r'[.!?,;:]["\')]*$', text.strip()))
+    first = (sends[0][0] - start) * 1000
+    return f"{len(sends):4d} sends, {split:3d} split words, {boundary:3d} on a boundary, first after {first:5.0f} ms"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--token-ms", type=float, default=25.0)
+    parser.add_argument("--stall-ms", type=float, default=600.0, help="pause in the middle of the answer")
+    parser.add_argument("--max-wait", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stream = list(tokens(ANSWER, args.token_ms, args.stall_ms, args.seed))
+    start = stream[0][0]
+
+    # Before: every fragment is its own TTS send
+    print(f"per token : {score(stream, start)}")
+
+    chunker = TextChunker(max_wait=args.max_wait)
+    sends = []
+    for i, (now, fragment) in enumerate(stream):
+        # poll() as often as chunked() would wake up: whenever the flush deadline passes before the next token
+        deadline = chunker.time_to_flush(now)
+        if deadline is not None and i + 1 < len(stream) and now + deadline < stream[i + 1][0]:
+            sends += [(now + deadline, text) for text, _ in chunker.poll(now + deadline)]
+        sends += [(now, text) for text, _ in chunker.feed(fragment, now)]
+    sends += [(stream[-1][0], text) for text, _ in chunker.flush(stream[-1][0])]
+    print(f"chunker   : {score(sends, start)}")
+    print(chunker.stats())
@@ -0,0 +1,61 @@
+'''
+Checks SPARC.text_chunker.chunked() with the items the backends put on the response queue.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/text_chunker_test.py
+'''
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.text_chunker import TextChunker, chunked
+
+ANNOUNCEMENT = "Sir, your timer is up."
+
+
+async def speak(items, wait=0.5, max_wait=0.05):
+    """Puts (generation, text) items on a queue and returns what chunked() yields within `wait` seconds."""
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    spoken = []
+
+    async def read():
+        async for generation, chunk, reason in chunked(queue, TextChunker(max_wait=max_wait)):
+            spoken.append((generation, chunk, reason))
+            if chunk is None:
+                return
+
+    try:
+        await asyncio.wait_for(read(), wait)
+    except asyncio.TimeoutError:
+        pass
+    return spoken
+
+
+def test_announcement_is_spoken_in_full():
+    # What announce() queues: the text, then the end marker of its turn
+    spoken = asyncio.run(speak([(3, ANNOUNCEMENT), (3, None)]))
+    assert spoken == [(3, ANNOUNCEMENT, "end"), (3, None, "end")], spoken
+
+
+def test_announcement_without_end_marker_keeps_the_last_word():
+    # Without the end marker only whole words followed by a space come out, however long it waits
+    spoken = asyncio.run(speak([(3, ANNOUNCEMENT)]))
+    text = " ".join(chunk for _, chunk, _ in spoken)
+    assert text == "Sir, your timer is", spoken
+
+
+def test_stale_text_is_dropped_for_a_new_generation():
+    spoken = asyncio.run(speak([(3, "Half an answer that was"), (4, ANNOUNCEMENT), (4, None)]))
+    assert [chunk for _, chunk, _ in spoken if chunk] == [ANNOUNCEMENT], spoken
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,71 @@
+'''
+Checks SPARC.tool_executor.ToolRegistry: a malformed or hostile tool call written by the model
+comes back as a failed result instead of raising out of the turn, and calls that time out can't
+take every worker.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/tool_executor_test.py
+'''
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.tool_executor import ToolRegistry
+
+BAD_CALLS = [
+    'timer.set(',  # cut off
+    'timer.set(name)',  # not a literal
+    'timer.set({[]: 1})',  # unhashable key: TypeError
+    'timer.set(-"a")',  # TypeError
+    'timer.set(' + '[' * 10000 + ']' * 10000 + ')',  # nested too deep
+    'os.remove("x")',  # not a registered tool
+    'timer.set(**{"duration": "00:00:10"})',
+]
+
+
+async def call_all(registry, calls):
+    return [await registry.call(code) for code in calls]
+
+
+def test_bad_calls_fail_cleanly():
+    registry = ToolRegistry()
+    registry.register("timer.set", lambda duration: f"Timer set for {duration}", timeout=1.0)
+    try:
+        results = asyncio.run(call_all(registry, BAD_CALLS + ['timer.set("00:00:10")']))
+    finally:
+        registry.shutdown()
+    for code, result in zip(BAD_CALLS, results):
+        assert not result["ok"] and result["error"], (code[:40], result)
+    assert results[-1]["ok"] and results[-1]["result"] == "Timer set for 00:00:10", results[-1]
+
+
+async def time_out_twice(registry):
+    first = await registry.call("slow.tool()")  # times out, its worker keeps sleeping
+    second = await registry.call("slow.tool()")  # refused: only one worker left
+    await asyncio.sleep(0.5)
+    third = await registry.call('timer.set("00:00:10")')  # the stuck call has finished
+    return first, second, third
+
+
+def test_timed_out_calls_are_bounded():
+    registry = ToolRegistry(max_workers=2)
+    registry.register("slow.tool", lambda: time.sleep(0.4), timeout=0.05)
+    registry.register("timer.set", lambda duration: f"Timer set for {duration}", timeout=1.0)
+    try:
+        first, second, third = asyncio.run(time_out_twice(registry))
+    finally:
+        registry.shutdown()
+    assert first["error"].startswith("Timed out"), first
+    assert not second["ok"] and "still running" in second["error"], second
+    assert third["ok"] and not registry.stuck, third
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,101 @@
+'''
+Checks SPARC.tool_fence.ToolFenceParser with chunk streams recorded from gemma3:4b-it-q4_K_M, and
+SPARC_Local.respond() with those streams in place of Ollama: a ```tool_code``` block ends the answer,
+any other fenced block is skipped and the text after it is still spoken, and only the spoken text
+goes into the response cache.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/tool_fence_test.py
+'''
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.tool_fence import ToolFenceParser, parse_stream
+
+# "set a 10 second timer"
+TIMER = ["``", "`tool", "_code", "\n", "timer", ".set", "(\"", "00", ":", "00", ":", "10", "\")", "\n`", "``"]
+# "check the system", fence merged with the text around it
+SYSTEM = ["Certainly sir.```", "tool_code\nsystem.info()\n```", " Done."]
+# "how do I print in python", a code block that isn't a tool call
+PYTHON = ["Here", " is", " code", ":\n", "```", "python", "\n", "print", "(1)", "\n", "```", "\n", "That", " prints", " one", ". "]
+
+
+def test_tool_call_split_over_chunks():
+    assert parse_stream(TIMER) == [("tool", '```tool_code\ntimer.set("00:00:10")\n```')]
+
+
+def test_tool_call_merged_with_text():
+    assert parse_stream(SYSTEM) == [("text", "Certainly sir."), ("tool", "```tool_code\nsystem.info()\n```"),
+                                    ("text", " Done.")]
+
+
+def test_code_block_between_text():
+    events = parse_stream(PYTHON)
+    assert [kind for kind, _ in events if kind == "tool"] == ["tool"], events
+    assert "".join(text for kind, text in events if kind == "text") == "Here is code:\n\nThat prints one. ", events
+
+
+def test_backticks_held_back_until_flush():
+    parser = ToolFenceParser()
+    assert parser.feed("Use `x` or ``") == [("text", "Use `x` or ")]
+    assert parser.flush() == [("text", "``")]
+
+
+def test_unterminated_fence_is_dropped():
+    assert parse_stream(["Sure.", "```tool_code\n", "timer.set("]) == [("text", "Sure.")]
+
+
+async def respond(chunks, response_cache="off"):
+    """
+    Runs SPARC_Local.respond() with `chunks` as the Ollama stream.
+    Returns the text queued for the TTS and the response cache.
+    """
+    from SPARC import SPARC_Local
+    from e2e_latency_benchmark import NullPyAudio
+
+    components = {"stt": lambda: None, "pyaudio": NullPyAudio, "tts": lambda: None,
+                  "llm": lambda: None, "telemetry": lambda: None}
+    sparc = await asyncio.to_thread(SPARC_Local.SPARC, components=components,
+                                    response_cache=response_cache)
+    sparc.tracer.path = None
+
+    async def stream_chat(messages, generation=None):
+        for chunk in chunks:
+            yield chunk
+
+    sparc.stream_chat = stream_chat
+    try:
+        await sparc.respond("how do I print in python", 1)
+    finally:
+        sparc.tools.shutdown()
+    spoken = []
+    while not sparc.response_queue.empty():
+        generation, text = sparc.response_queue.get_nowait()
+        if text is not None:
+            spoken.append(text)
+    return "".join(spoken), sparc.cache
+
+
+def test_respond_speaks_the_text_after_a_code_block():
+    spoken, _ = asyncio.run(respond(PYTHON))
+    assert spoken == "Here is code:\n\nThat prints one. "
+    # The text after the block in the same chunk as its closing fence
+    spoken, _ = asyncio.run(respond(["Here is code:\n```python\nprint(1)\n```\nThat prints one. "]))
+    assert spoken == "Here is code:\n\nThat prints one. "
+
+
+def test_response_cache_stores_the_spoken_text():
+    spoken, cache = asyncio.run(respond(PYTHON, response_cache="exact"))
+    answer = asyncio.run(cache.get("how do I print in python"))
+    assert answer == spoken.strip() and "```" not in answer, answer
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
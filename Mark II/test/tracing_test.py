@@ -0,0 +1,52 @@
+'''
+Checks SPARC.tracing.Tracer: turns are written by its writer thread, every one of them is in the
+file once the tracer is closed, and the file is rotated to <file>.1 instead of growing past its cap.
+
+Run from the Mark II folder (or with pytest):
+
+    python test/tracing_test.py
+'''
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.tracing import Tracer, load
+
+
+def trace_turns(tracer, turns):
+    for generation in range(1, turns + 1):
+        tracer.begin(generation, intent=None)
+        tracer.mark("first_token", generation)
+        tracer.span("tool system.info", 0.0, 0.0, generation)
+    tracer.close()
+
+
+def test_turns_are_written_off_the_calling_thread():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "traces.jsonl")
+        tracer = Tracer(path, backend="local")
+        writers = []
+        write = tracer._write
+        tracer._write = lambda turn: (writers.append(threading.current_thread().name), write(turn))
+        trace_turns(tracer, 5)
+        assert [turn["turn"] for turn in load(path)] == [1, 2, 3, 4, 5]
+        assert set(writers) == {"tracer"}, writers
+
+
+def test_file_is_rotated_at_its_cap():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "traces.jsonl")
+        trace_turns(Tracer(path, backend="local", max_bytes=1000), 40)
+        assert os.path.getsize(path) <= 1000 and os.path.getsize(path + ".1") <= 1000
+        turns = load(path + ".1") + load(path)
+        assert [turn["turn"] for turn in turns] == list(range(41 - len(turns), 41)), turns  # the newest, in order
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,286 @@
+'''
+Headless benchmark of the RealtimeTTS engines SPARC_Local can use.
+
+Runs a text corpus through each engine, muted, and records per sentence:
+
+- time to first audio: from feed() until the engine hands over its first audio chunk
+- real-time factor: synthesis time / duration of the audio produced (below 1 keeps up with playback)
+- peak RSS and CPU use of this process and its children (Coqui synthesizes in a worker process)
+
+Results are grouped by sentence length (short, medium, long) and written to JSON, so the engine
+for SPARC_Local.load_tts can be chosen per machine from data.
+
+Engines: "system" (SystemEngine), "coqui" (CoquiEngine, on the CPU unless --coqui-device says
+otherwise), "elevenlabs-standin" (a local stand-in that behaves like the ElevenLabs stream: a
+network delay, then 24 kHz PCM generated faster than real time) and "elevenlabs" (the real
+ElevenlabsEngine, needs ELEVENLABS_API_KEY).
+
+The corpus is one sentence per line (--corpus), the built-in CORPUS otherwise.
+
+Run from the Mark II folder:
+
+    python test/tts_engine_benchmark.py --engines system coqui elevenlabs-standin --repeat 3
+'''
+
+import argparse
+import json
+import os
+import platform
+import random
+import threading
+import time
+
+import psutil
+import pyaudio
+from RealtimeTTS import TextToAudioStream
+from RealtimeTTS.engines.base_engine import BaseEngine
+
+CORPUS = [
+    "Certainly, Sir.",
+    "The camera is on.",
+    "Your timer is set for ten minutes.",
+    "The forecast for London shows light rain this morning, clearing by noon.",
+    "Your CPU is at twelve percent and you are using six gigabytes of memory.",
+    "A brushless motor uses electronic commutation instead of brushes, which makes it more efficient.",
+    ("Alternating current changes direction many times per second, while direct current flows one way; "
+     "that is why the grid uses AC and your laptop battery stores DC."),
+    ("The drive to the office should take roughly twenty-five minutes, although traffic on the A40 is "
+     "building, so leaving in the next ten minutes would be wise, Sir."),
+    ("I have created a project folder called robot arm with a chat history file inside it, and I will "
+     "keep our notes there until you tell me to start a new one."),
+]
+
+# Upper bounds in characters
+BUCKETS = [("short", 40), ("medium", 120), ("long", None)]
+
+
+def bucket(text):
+    for name, limit in BUCKETS:
+        if limit is None or len(text) <= limit:
+            return name
+
+
+class ElevenLabsStandIn(BaseEngine):
+    """Behaves like the ElevenLabs stream from the client's side: a network delay, then PCM faster than real time."""
+
+    def __init__(self, latency_ms=250.0, jitter_ms=50.0, chars_per_second=15.0, speedup=4.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bytes_per_char = int(24000 * 2 / chars_per_second)
+        self.speedup = speedup
+        self.rng = random.Random(seed)
+
+    def post_init(self):
+        self.engine_name = "elevenlabs-standin"
+
+    def get_stream_info(self):
+        return pyaudio.paInt16, 1, 24000
+
+    def synthesize(self, text, sentence_count=0):
+        super().synthesize(text, sentence_count)
+        time.sleep(max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+        pcm = bytes(len(text) * self.bytes_per_char)
+        for start in range(0, len(pcm), 4800):  # 100 ms chunks
+            if self.stop_synthesis_event.is_set():
+                return False
+            self.queue.put(pcm[start:start + 4800])
+            time.sleep(0.1 / self.speedup)
+        return True
+
+
+def create_engine(name, args):
+    if name == "system":
+        from RealtimeTTS import SystemEngine
+        return SystemEngine()
+    if name == "coqui":
+        from RealtimeTTS import CoquiEngine
+        return CoquiEngine(device=args.coqui_device)
+    if name == "elevenlabs-standin":
+        return ElevenLabsStandIn(args.standin_latency_ms, args.standin_jitter_ms, seed=args.seed)
+    if name == "elevenlabs":
+        from dotenv import load_dotenv
+        from RealtimeTTS import ElevenlabsEngine
+        load_dotenv()
+        return ElevenlabsEngine(os.getenv("ELEVENLABS_API_KEY"))
+    raise ValueError(f"Unknown engine: {name}")
+
+
+class ResourceMonitor:
+    """Samples RSS of this process and its children every `interval` seconds and keeps the peak."""
+
+    def __init__(self, interval=0.02):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def processes(self):
+        return [self.process] + self.process.children(recursive=True)
+
+    def rss(self):
+        total = 0
+        for process in self.processes():
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass  # child exited between listing and reading
+        return total
+
+    def cpu_seconds(self):
+        total = 0.0
+        for process in self.processes():
+            try:
+                times = process.cpu_times()
+                total += times.user + times.system
+            except psutil.Error:
+                pass
+        return total
+
+    def reset(self):
+        self.peak = self.rss()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.rss())
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def measure(stream, text, sample_width, rate, channels, monitor):
+    first_audio = None
+    audio_bytes = 0
+
+    def on_audio_chunk(chunk):
+        nonlocal first_audio, audio_bytes
+        if first_audio is None:
+            first_audio = time.perf_counter()
+        audio_bytes += len(chunk)
+
+    monitor.reset()
+    cpu = monitor.cpu_seconds()
+    start = time.perf_counter()
+    stream.feed(text)
+    stream.play(muted=True, on_audio_chunk=on_audio_chunk)
+    end = time.perf_counter()
+    audio_s = audio_bytes / (sample_width * channels * rate)
+    return {
+        "text": text,
+        "chars": len(text),
+        "length": bucket(text),
+        "first_audio_ms": round((first_audio - start) * 1000, 1) if first_audio else None,
+        "synthesis_ms": round((end - start) * 1000, 1),
+        "audio_s": round(audio_s, 3),
+        "rtf": round((end - start) / audio_s, 3) if audio_s else None,
+        "peak_rss_mb": round(monitor.peak / 2 ** 20, 1),
+        "cpu_percent": round((monitor.cpu_seconds() - cpu) / (end - start) * 100, 1),
+    }
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else None
+
+
+def summarize(runs):
+    summary = {}
+    for name, _ in BUCKETS:
+        group = [run for run in runs if run["length"] == name]
+        if not group:
+            continue
+        first_audio = [run["first_audio_ms"] for run in group if run["first_audio_ms"] is not None]
+        rtf = [run["rtf"] for run in group if run["rtf"] is not None]
+        summary[name] = {
+            "n": len(group),
+            "first_audio_ms_p50": _percentile(first_audio, 50),
+            "first_audio_ms_p95": _percentile(first_audio, 95),
+            "rtf_p50": _percentile(rtf, 50),
+            "peak_rss_mb": max(run["peak_rss_mb"] for run in group),
+            "cpu_percent_p50": _percentile([run["cpu_percent"] for run in group], 50),
+        }
+    return summary
+
+
+def run_engine(name, corpus, args, monitor):
+    print(f"--- {name} ---")
+    start = time.perf_counter()
+    try:
+        engine = create_engine(name, args)
+    except Exception as e:
+        print(f"Skipping {name}: {type(e).__name__}: {e}")
+        return {"error": f"{type(e).__name__}: {e}"}
+    init_s = time.perf_counter() - start
+    audio_format, channels, rate = engine.get_stream_info()
+    sample_width = pyaudio.get_sample_size(audio_format)
+    stream = TextToAudioStream(engine, muted=True)
+    try:
+        for _ in range(args.warmup):
+            measure(stream, corpus[0], sample_width, rate, channels, monitor)  # model load, caches
+        runs = []
+        for _ in range(args.repeat):
+            for text in corpus:
+                run = measure(stream, text, sample_width, rate, channels, monitor)
+                first_audio = f"{run['first_audio_ms']:.0f} ms" if run["first_audio_ms"] is not None else "no audio"
+                rtf = f"{run['rtf']:.2f}" if run["rtf"] is not None else "-"
+                print(f"{run['length']:<7} {run['chars']:4d} chars: first audio {first_audio}, RTF {rtf}, "
+                      f"peak RSS {run['peak_rss_mb']:.0f} MB, CPU {run['cpu_percent']:.0f}%")
+                runs.append(run)
+    finally:
+        engine.shutdown()
+    return {"init_s": round(init_s, 2), "sample_rate": rate, "summary": summarize(runs), "runs": runs}
+
+
+def print_summary(results):
+    print(f"\n{'engine':<20}{'length':<8}{'n':>4}{'first p50':>11}{'first p95':>11}{'RTF p50':>9}{'peak RSS':>10}{'CPU p50':>9}")
+    for name, result in results["engines"].items():
+        if "error" in result:
+            print(f"{name:<20}{result['error']}")
+            continue
+        for length, s in result["summary"].items():
+            first_p50 = f"{s['first_audio_ms_p50']:.0f} ms" if s["first_audio_ms_p50"] is not None else "-"
+            first_p95 = f"{s['first_audio_ms_p95']:.0f} ms" if s["first_audio_ms_p95"] is not None else "-"
+            rtf = f"{s['rtf_p50']:.2f}" if s["rtf_p50"] is not None else "-"
+            print(f"{name:<20}{length:<8}{s['n']:>4}{first_p50:>11}{first_p95:>11}{rtf:>9}"
+                  f"{s['peak_rss_mb']:>7.0f} MB{s['cpu_percent_p50']:>8.0f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+", default=["system", "coqui", "elevenlabs-standin"],
+                        choices=["system", "coqui", "elevenlabs-standin", "elevenlabs"])
+    parser.add_argument("--corpus", default=None, help="text file, one sentence per line")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed sentences per engine before measuring")
+    parser.add_argument("--coqui-device", default="cpu")
+    parser.add_argument("--standin-latency-ms", type=float, default=250.0)
+    parser.add_argument("--standin-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tts_engine_results.json")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [line.strip() for line in f if line.strip()]
+    else:
+        corpus = CORPUS
+
+    monitor = ResourceMonitor()
+    results = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                    "cpu_count": psutil.cpu_count(), "memory_gb": round(psutil.virtual_memory().total / 2 ** 30, 1)},
+        "engines": {},
+    }
+    try:
+        for name in args.engines:
+            results["engines"][name] = run_engine(name, corpus, args, monitor)
+    finally:
+        monitor.close()
+
+    print_summary(results)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\nResults written to '{args.out}'")
@@ -0,0 +1,132 @@
+'''
+Checks SPARC.weather against a local stand-in for the wttr.in JSON API.
+
+The stand-in answers /<location>?format=j1 after a configurable delay and counts requests and
+TCP connections. The script compares a new session per lookup (what get_weather used to do) with
+the shared service: connection reuse, cache hits within the TTL, concurrent lookups of the same
+location sharing one request, expiry, and errors not being cached.
+
+Run from the Mark II folder:
+
+    python test/weather_service_test.py --lookups 10 --delay-ms 80
+'''
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SPARC.weather import WeatherService
+
+
+class StandIn:
+    def __init__(self, delay_ms):
+        self.delay_ms = delay_ms
+        self.requests = 0
+        self.connections = set()
+
+    async def handle(self, request):
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(self.delay_ms / 1000)  # stands in for the API's own latency
+        location = request.match_info["location"].replace("+", " ")
+        if location.lower() == "atlantis":
+            return web.Response(status=404, text="Unknown location")
+        payload = {"current_condition": [{"temp_F": "61", "precipInches": "0.1",
+                                          "weatherDesc": [{"value": f"Light rain in {location} "}]}]}
+        return web.json_response(payload, content_type="text/plain")  # wttr.in's content type
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def main(lookups, delay_ms):
+    stand_in = StandIn(delay_ms)
+    app = web.Application()
+    app.router.add_get("/{location}", stand_in.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    # Before: a new client (and connection) for every lookup
+    total = 0.0
+    for _ in range(lookups):
+        start = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/London", params={"format": "j1"}) as resp:
+                await resp.json(content_type=None)
+        total += (time.perf_counter() - start) * 1000
+    print(f"new session per lookup: {total / lookups:5.1f} ms per lookup, "
+          f"{stand_in.requests} requests, {len(stand_in.connections)} connections")
+
+    # After: one service, so one pooled session and a 60 s cache
+    stand_in.requests, stand_in.connections = 0, set()
+    service = WeatherService(base_url, ttl=60.0)
+    result, ms = await timed(service.get("London, UK"))
+    print(f"first lookup: {ms:5.1f} ms -> {result}")
+    total = 0.0
+    for _ in range(lookups):
+        _, ms = await timed(service.get("  london,uk "))
+        total += ms
+    print(f"repeated lookups: {total / lookups * 1000:5.1f} us per lookup, {stand_in.requests} request so far")
+    assert stand_in.requests == 1
+
+    # Concurrent lookups of a location that isn't cached share one request
+    results = await asyncio.gather(*(service.get("Vinings, GA") for _ in range(lookups)))
+    print(f"{lookups} concurrent lookups: {stand_in.requests - 1} request, all equal: {all(r == results[0] for r in results)}")
+    assert stand_in.requests == 2
+
+    # A cancelled caller (barge-in) doesn't cancel the request for the others
+    waiter = asyncio.create_task(service.get("Paris"))
+    other = asyncio.create_task(service.get("Paris"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    print(f"cancelled one of two lookups, the other got: {(await other)['description']}")
+
+    # Failures raise and are not cached
+    for _ in range(2):
+        try:
+            await service.get("Atlantis")
+        except aiohttp.ClientResponseError as e:
+            print(f"Atlantis: {e.status} {e.message}")
+
+    # A failing lookup whose callers were all cancelled doesn't log "Task exception was never retrieved"
+    unretrieved = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context["message"]))
+    waiter = asyncio.create_task(service.get("Atlantis"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(delay_ms / 1000 + 0.1)
+    gc.collect()
+    print(f"all callers cancelled, then it failed: {len(unretrieved)} unretrieved exceptions")
+    assert not unretrieved, unretrieved
+
+    # Entries expire after the TTL
+    service.ttl = 0.05
+    await asyncio.sleep(0.06)
+    await service.get("London, UK")
+    print(f"after the TTL: {stand_in.requests} requests over {len(stand_in.connections)} connection(s)")
+    assert stand_in.requests == 7
+
+    print(service.stats())
+    await service.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=10)
+    parser.add_argument("--delay-ms", type=float, default=80.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.lookups, args.delay_ms))